@@ -1,4 +1,3 @@
-import json
 import logging
 import os
 import time
@@ -7,8 +6,12 @@ from uuid import uuid4
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram
+
+from shared_utils.logging import sample_access, setup_logging
+from shared_utils.deadline import DEADLINE_HEADER, bind_deadline, deadline_expired, reset_deadline
+from shared_utils.server import metric_path, metrics_payload
 
 SERVICE_NAME = os.getenv("SERVICE_NAME", "audit-service")
 SERVICE_VERSION = os.getenv("SERVICE_VERSION", "0.1.0")
@@ -16,7 +19,7 @@ ENVIRONMENT = os.getenv("ENVIRONMENT", "local")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*")
 
-logging.basicConfig(level=LOG_LEVEL, format="%(message)s")
+setup_logging(LOG_LEVEL)
 logger = logging.getLogger(SERVICE_NAME)
 
 app = FastAPI(title=SERVICE_NAME, version=SERVICE_VERSION)
@@ -51,18 +54,23 @@ def _get_correlation_id(request: Request) -> str:
 
 
 def _log_event(request: Request, status_code: int, duration: float) -> None:
-    event = {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "service": SERVICE_NAME,
-        "environment": ENVIRONMENT,
-        "method": request.method,
-        "path": request.url.path,
-        "status_code": status_code,
-        "duration_ms": round(duration * 1000, 2),
-        "correlation_id": getattr(request.state, "correlation_id", ""),
-        "client_ip": request.client.host if request.client else "",
-    }
-    logger.info(json.dumps(event))
+    duration_ms = round(duration * 1000, 2)
+    sample_rate = sample_access(status_code, duration_ms)
+    if sample_rate is None:
+        return
+    logger.info(
+        {
+            "service": SERVICE_NAME,
+            "environment": ENVIRONMENT,
+            "method": request.method,
+            "path": request.url.path,
+            "status_code": status_code,
+            "duration_ms": duration_ms,
+            "correlation_id": getattr(request.state, "correlation_id", ""),
+            "client_ip": request.client.host if request.client else "",
+            "sample_rate": sample_rate,
+        }
+    )
 
 
 @app.middleware("http")
@@ -70,22 +78,29 @@ async def metrics_and_logging(request: Request, call_next):
     start = time.time()
     correlation_id = _get_correlation_id(request)
     request.state.correlation_id = correlation_id
+    deadline_token = bind_deadline(request.headers.get(DEADLINE_HEADER))
     response = None
     try:
+        if deadline_expired():
+            # The caller (e.g. the gateway) has already given up; don't start the work.
+            response = JSONResponse(status_code=504, content={"detail": "Request deadline exceeded"})
+            return response
         response = await call_next(request)
         response.headers["X-Correlation-ID"] = correlation_id
         return response
     finally:
+        reset_deadline(deadline_token)
         duration = time.time() - start
         status_code = response.status_code if response else 500
+        path_label = metric_path(request)
         REQUEST_COUNT.labels(
             service=SERVICE_NAME,
             method=request.method,
-            path=request.url.path,
+            path=path_label,
             status_code=str(status_code),
         ).inc()
         REQUEST_LATENCY.labels(
-            service=SERVICE_NAME, method=request.method, path=request.url.path
+            service=SERVICE_NAME, method=request.method, path=path_label
         ).observe(duration)
         _log_event(request, status_code, duration)
 
@@ -122,7 +137,7 @@ async def live() -> dict:
 
 @app.get("/metrics")
 async def metrics() -> Response:
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    return Response(metrics_payload(), media_type=CONTENT_TYPE_LATEST)
 
 
 if __name__ == "__main__":
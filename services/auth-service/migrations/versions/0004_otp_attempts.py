@@ -0,0 +1,53 @@
+"""add otp attempt counter, expiry check and lookup index
+
+Revision ID: 0004_otp_attempts
+Revises: 0003_add_user_subscriber_id
+Create Date: 2026-10-16
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import inspect
+
+revision = "0004_otp_attempts"
+down_revision = "0003_add_user_subscriber_id"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    insp = inspect(bind)
+    cols = {c["name"] for c in insp.get_columns("otp_events", schema="auth")}
+    checks = {c["name"] for c in insp.get_check_constraints("otp_events", schema="auth")}
+    indexes = {i["name"] for i in insp.get_indexes("otp_events", schema="auth")}
+
+    if "attempts" not in cols:
+        op.add_column(
+            "otp_events",
+            sa.Column("attempts", sa.Integer(), nullable=False, server_default=sa.text("0")),
+            schema="auth",
+        )
+    if "ck_auth_otp_events_attempts" not in checks:
+        op.create_check_constraint(
+            "ck_auth_otp_events_attempts", "otp_events", "attempts >= 0", schema="auth"
+        )
+    if "ck_auth_otp_events_expiry" not in checks:
+        op.create_check_constraint(
+            "ck_auth_otp_events_expiry", "otp_events", "expires_at > created_at", schema="auth"
+        )
+    if "ix_auth_otp_events_lookup" not in indexes:
+        op.create_index(
+            "ix_auth_otp_events_lookup",
+            "otp_events",
+            ["identifier", "purpose", "created_at"],
+            unique=False,
+            schema="auth",
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_auth_otp_events_lookup", table_name="otp_events", schema="auth")
+    op.drop_constraint("ck_auth_otp_events_expiry", "otp_events", type_="check", schema="auth")
+    op.drop_constraint("ck_auth_otp_events_attempts", "otp_events", type_="check", schema="auth")
+    op.drop_column("otp_events", "attempts", schema="auth")
@@ -0,0 +1,47 @@
+"""add trigram search and keyset pagination indexes on users
+
+Revision ID: 0005_user_search_indexes
+Revises: 0004_otp_attempts
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+from sqlalchemy import inspect
+
+revision = "0005_user_search_indexes"
+down_revision = "0004_otp_attempts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    insp = inspect(bind)
+    indexes = {i["name"] for i in insp.get_indexes("users", schema="auth")}
+
+    # pg_trgm lets `ILIKE '%q%'` on email/phone use a GIN index instead of a sequential scan.
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY so the users table stays writable (logins update it) while indexes build.
+    with op.get_context().autocommit_block():
+        if "ix_auth_users_created_at_id" not in indexes:
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_auth_users_created_at_id "
+                "ON auth.users (created_at, id)"
+            )
+        if "ix_auth_users_email_trgm" not in indexes:
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_auth_users_email_trgm "
+                "ON auth.users USING gin (email gin_trgm_ops)"
+            )
+        if "ix_auth_users_phone_trgm" not in indexes:
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_auth_users_phone_trgm "
+                "ON auth.users USING gin (phone gin_trgm_ops)"
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS auth.ix_auth_users_phone_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS auth.ix_auth_users_email_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS auth.ix_auth_users_created_at_id")
@@ -0,0 +1,7 @@
+import os
+
+# bcrypt pool (`app/hashing.py`). Threads per uvicorn worker: set HASH_WORKERS to the CPUs
+# each worker may use (the container's CPU limit / WEB_CONCURRENCY).
+HASH_WORKERS = max(1, int(os.getenv("HASH_WORKERS", "1")))
+# Jobs allowed to wait for a thread before requests are shed with 503.
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", "64"))
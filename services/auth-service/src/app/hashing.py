@@ -0,0 +1,112 @@
+"""
+Bounded worker pool for bcrypt. A password or OTP hash takes 100-300 ms of CPU; run inline it
+blocks the worker's event loop and every other request on it. bcrypt releases the GIL while
+hashing, so a thread pool hashes in parallel without pickling or extra processes.
+
+The pool has `HASH_WORKERS` threads per uvicorn worker (`app/config.py`). At most
+`HASH_MAX_QUEUE` jobs wait for a thread; beyond that `HashQueueFull` is raised and answered
+with 503 + Retry-After, so a login burst fails fast instead of queueing past the client's
+timeout.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from . import config
+
+T = TypeVar("T")
+
+HASH_QUEUE_DEPTH = Gauge(
+    "auth_hash_queue_depth",
+    "Hash jobs waiting for a pool thread",
+    multiprocess_mode="livesum",
+)
+HASH_IN_PROGRESS = Gauge(
+    "auth_hash_in_progress",
+    "Hash jobs running on a pool thread",
+    multiprocess_mode="livesum",
+)
+HASH_WAIT = Histogram(
+    "auth_hash_queue_wait_seconds",
+    "Time a hash job waited for a pool thread",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+HASH_DURATION = Histogram(
+    "auth_hash_duration_seconds",
+    "bcrypt hash/verify time on a pool thread",
+    ["operation"],
+    buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.5),
+)
+HASH_REJECTED = Counter(
+    "auth_hash_rejected_total",
+    "Hash jobs rejected because the queue was full",
+    ["operation"],
+)
+
+
+class HashQueueFull(RuntimeError):
+    pass
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_waiting = 0
+_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=config.HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+def _started() -> None:
+    global _waiting
+    with _lock:
+        _waiting -= 1
+    HASH_QUEUE_DEPTH.dec()
+
+
+async def run_hash(operation: str, fn: Callable[..., T], *args) -> T:
+    """Run `fn(*args)` on the hash pool; raises HashQueueFull when the queue is at its bound."""
+    global _waiting
+    with _lock:
+        if _waiting >= config.HASH_MAX_QUEUE:
+            HASH_REJECTED.labels(operation=operation).inc()
+            raise HashQueueFull(operation)
+        _waiting += 1
+    HASH_QUEUE_DEPTH.inc()
+    queued_at = time.perf_counter()
+
+    def job() -> T:
+        started_at = time.perf_counter()
+        _started()
+        HASH_WAIT.labels(operation=operation).observe(started_at - queued_at)
+        HASH_IN_PROGRESS.inc()
+        try:
+            return fn(*args)
+        finally:
+            HASH_IN_PROGRESS.dec()
+            HASH_DURATION.labels(operation=operation).observe(time.perf_counter() - started_at)
+
+    future = _get_executor().submit(job)
+    try:
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        # Client went away: drop the job if no thread has picked it up yet.
+        if future.cancel():
+            _started()
+        raise
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from jose import jwk
+
+# Asymmetric signing; with any other JWT_ALGORITHM tokens are signed with JWT_SECRET.
+ASYMMETRIC_ALGORITHMS = ("RS256",)
+# How often JWT_KEYS_DIR is checked for added, replaced or removed key files.
+JWT_KEYS_RELOAD_SECONDS = float(os.getenv("JWT_KEYS_RELOAD_SECONDS", "30"))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    kid: str
+    # PEM private key; None for a retired key that is only published for verification.
+    private_pem: Optional[str]
+    public_jwk: Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class KeyRing:
+    """
+    Signing keys loaded from `JWT_KEYS_DIR`: `<kid>.pem` holds a private key and
+    `<kid>.pub.pem` a retired public key. Every key is published in the JWKS; the active
+    one (`JWT_ACTIVE_KID`, else the last private key by name) signs new tokens.
+    """
+
+    algorithm: str
+    keys: Dict[str, SigningKey]
+    active_kid: str
+    jwks_body: bytes
+    jwks_etag: str
+
+    @property
+    def active(self) -> SigningKey:
+        return self.keys[self.active_kid]
+
+    def public_key(self, kid: str) -> Optional[Dict[str, Any]]:
+        key = self.keys.get(kid)
+        return key.public_jwk if key else None
+
+
+def _public_jwk(pem: str, kid: str, algorithm: str) -> Dict[str, Any]:
+    key = jwk.construct(pem, algorithm)
+    if key.is_public():
+        public = key.to_dict()
+    else:
+        public = key.public_key().to_dict()
+    return {**public, "kid": kid, "use": "sig", "alg": algorithm}
+
+
+def load_key_ring(directory: str, algorithm: str, active_kid: str = "") -> KeyRing:
+    keys: Dict[str, SigningKey] = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".pem"):
+            continue
+        with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+            pem = f.read()
+        if name.endswith(".pub.pem"):
+            kid = name[: -len(".pub.pem")]
+            if kid not in keys:
+                keys[kid] = SigningKey(kid, None, _public_jwk(pem, kid, algorithm))
+        else:
+            kid = name[: -len(".pem")]
+            keys[kid] = SigningKey(kid, pem, _public_jwk(pem, kid, algorithm))
+
+    signing: List[str] = [kid for kid, key in keys.items() if key.private_pem]
+    if not signing:
+        raise RuntimeError(f"No private signing key in JWT_KEYS_DIR={directory}")
+    active = active_kid or signing[-1]
+    if active not in signing:
+        raise RuntimeError(f"JWT_ACTIVE_KID={active} has no private key in {directory}")
+
+    body = json.dumps(
+        {"keys": [key.public_jwk for key in keys.values()]}, separators=(",", ":"), sort_keys=True
+    ).encode("utf-8")
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return KeyRing(algorithm, keys, active, body, etag)
+
+
+def _key_files(directory: str) -> Tuple[Tuple[str, int, int], ...]:
+    """(name, mtime, size) of every key file; changes when a key is added, replaced or removed."""
+    files = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".pem"):
+            # stat() follows the symlinks a Kubernetes Secret volume swaps on update.
+            st = os.stat(os.path.join(directory, name))
+            files.append((name, st.st_mtime_ns, st.st_size))
+    return tuple(files)
+
+
+_key_ring: Optional[KeyRing] = None
+_key_files_seen: Tuple[Tuple[str, int, int], ...] = ()
+_checked_at = 0.0
+_reload_lock = threading.Lock()
+
+
+def get_key_ring() -> Optional[KeyRing]:
+    """
+    The process's key ring, or None when tokens are signed with the shared secret. Key files
+    are re-read when they change (checked every JWT_KEYS_RELOAD_SECONDS), so a rotated key is
+    picked up without a restart. A ring that fails to load keeps the previous one in service.
+    """
+    global _key_ring, _key_files_seen, _checked_at
+    algorithm = os.getenv("JWT_ALGORITHM", "HS256")
+    if algorithm not in ASYMMETRIC_ALGORITHMS:
+        return None
+    now = time.monotonic()
+    if _key_ring is not None and now - _checked_at < JWT_KEYS_RELOAD_SECONDS:
+        return _key_ring
+    with _reload_lock:
+        if _key_ring is not None and now - _checked_at < JWT_KEYS_RELOAD_SECONDS:
+            return _key_ring
+        directory = os.getenv("JWT_KEYS_DIR", "")
+        if not directory:
+            raise RuntimeError(f"JWT_KEYS_DIR is required for {algorithm}")
+        try:
+            files = _key_files(directory)
+            if _key_ring is None or files != _key_files_seen:
+                _key_ring = load_key_ring(directory, algorithm, os.getenv("JWT_ACTIVE_KID", ""))
+                _key_files_seen = files
+        except Exception as exc:
+            if _key_ring is None:
+                raise
+            logger.warning(
+                "Keeping the current signing keys; reloading %s failed: %s", directory, exc
+            )
+        _checked_at = now
+    return _key_ring
+
+
+EMPTY_JWKS_BODY = b'{"keys":[]}'
+EMPTY_JWKS_ETAG = '"' + hashlib.sha256(EMPTY_JWKS_BODY).hexdigest()[:32] + '"'
+
+
+def jwks_document() -> tuple[bytes, str]:
+    """Serialised JWKS and its ETag; empty while tokens are signed with the shared secret."""
+    ring = get_key_ring()
+    if ring is None:
+        return EMPTY_JWKS_BODY, EMPTY_JWKS_ETAG
+    return ring.jwks_body, ring.jwks_etag
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, String, Text
+from sqlalchemy import Boolean, CheckConstraint, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -10,7 +10,23 @@ from .db import Base
 
 class User(Base):
     __tablename__ = "users"
-    __table_args__ = {"schema": "auth"}
+    __table_args__ = (
+        # Admin user listing: keyset pagination and substring search (migration 0005).
+        Index("ix_auth_users_created_at_id", "created_at", "id"),
+        Index(
+            "ix_auth_users_email_trgm",
+            "email",
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_auth_users_phone_trgm",
+            "phone",
+            postgresql_using="gin",
+            postgresql_ops={"phone": "gin_trgm_ops"},
+        ),
+        {"schema": "auth"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
@@ -34,7 +50,13 @@ class User(Base):
 
 class OtpEvent(Base):
     __tablename__ = "otp_events"
-    __table_args__ = {"schema": "auth"}
+    __table_args__ = (
+        CheckConstraint("attempts >= 0", name="ck_auth_otp_events_attempts"),
+        CheckConstraint("expires_at > created_at", name="ck_auth_otp_events_expiry"),
+        # Latest live OTP for an identifier/purpose (`/otp/verify`).
+        Index("ix_auth_otp_events_lookup", "identifier", "purpose", "created_at"),
+        {"schema": "auth"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID | None] = mapped_column(
@@ -44,6 +66,8 @@ class OtpEvent(Base):
     otp_hash: Mapped[str] = mapped_column(String(255), nullable=False)
     purpose: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
     is_used: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # Verification attempts made against this OTP; it is dead once OTP_MAX_ATTEMPTS is reached.
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
 
@@ -0,0 +1,133 @@
+import logging
+import os
+import time
+
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+# Shared with the gateway, which checks these keys when it verifies tokens locally.
+REVOKED_JTI_PREFIX = "auth:revoked:jti:"
+REVOKED_USER_PREFIX = "auth:revoked:user:"
+# Published with the user id when a user's role, capabilities or status change; gateways drop
+# their cached lookups for that user.
+USER_CHANGED_CHANNEL = "auth:user-changed"
+# Per-user counter bumped when role, capabilities or status change. Access tokens carry the
+# value they were minted with ("cv"); older tokens must be re-checked against the database.
+# Never expires: a reset counter would make stale tokens look current again.
+CLAIMS_VERSION_PREFIX = "auth:claims-version:"
+
+# asyncio client: these calls run inside async handlers, where a blocking client would stall the
+# worker's event loop for up to socket_timeout whenever Redis is slow.
+
+_redis: Redis | None = None
+
+
+def _get_redis() -> Redis | None:
+    global _redis
+    if _redis is not None:
+        return _redis
+    redis_url = os.getenv("REDIS_URL", "")
+    if not redis_url:
+        return None
+    _redis = Redis.from_url(redis_url, decode_responses=True, socket_timeout=1.0)
+    return _redis
+
+
+async def close_redis() -> None:
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+
+def _access_ttl_seconds() -> int:
+    return int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "60")) * 60
+
+
+async def revoke_token(jti: str, exp: int) -> None:
+    """Revoke a single access token until it would have expired anyway."""
+    r = _get_redis()
+    ttl = int(exp - time.time())
+    if not r or not jti or ttl <= 0:
+        return
+    try:
+        await r.set(f"{REVOKED_JTI_PREFIX}{jti}", "1", ex=ttl)
+    except Exception:
+        logger.warning("token revocation failed for jti=%s", jti)
+
+
+async def revoke_user_tokens(user_id: str) -> None:
+    """Revoke every access token issued to a user up to now (e.g. on deactivation)."""
+    r = _get_redis()
+    if not r:
+        return
+    try:
+        await r.set(
+            f"{REVOKED_USER_PREFIX}{user_id}", str(int(time.time())), ex=_access_ttl_seconds()
+        )
+    except Exception:
+        logger.warning("user token revocation failed for user_id=%s", user_id)
+
+
+async def clear_user_revocation(user_id: str) -> None:
+    r = _get_redis()
+    if not r:
+        return
+    try:
+        await r.delete(f"{REVOKED_USER_PREFIX}{user_id}")
+    except Exception:
+        logger.warning("clearing user revocation failed for user_id=%s", user_id)
+
+
+async def get_claims_version(user_id: str) -> int | None:
+    """Current claims version (0 if never bumped); None when Redis is unavailable."""
+    r = _get_redis()
+    if not r:
+        return None
+    try:
+        return int(await r.get(f"{CLAIMS_VERSION_PREFIX}{user_id}") or 0)
+    except Exception:
+        return None
+
+
+async def bump_claims_version(user_id: str) -> None:
+    r = _get_redis()
+    if not r:
+        return
+    try:
+        await r.incr(f"{CLAIMS_VERSION_PREFIX}{user_id}")
+    except Exception:
+        logger.warning("claims version bump failed for user_id=%s", user_id)
+
+
+async def token_state(jti: str, user_id: str, issued_at: int) -> tuple[bool, int | None]:
+    """
+    One round trip for /validate: (revoked, claims version). The version is None when Redis
+    is unavailable, which sends the caller to the database.
+    """
+    r = _get_redis()
+    if not r:
+        return False, None
+    try:
+        jti_revoked, user_revoked_at, version = await r.mget(
+            f"{REVOKED_JTI_PREFIX}{jti}",
+            f"{REVOKED_USER_PREFIX}{user_id}",
+            f"{CLAIMS_VERSION_PREFIX}{user_id}",
+        )
+        revoked = bool(jti and jti_revoked) or (
+            user_revoked_at is not None and issued_at <= int(user_revoked_at)
+        )
+        return revoked, int(version or 0)
+    except Exception:
+        return False, None
+
+
+async def publish_user_changed(user_id: str) -> None:
+    r = _get_redis()
+    if not r:
+        return
+    try:
+        await r.publish(USER_CHANGED_CHANNEL, user_id)
+    except Exception:
+        logger.warning("user change publish failed for user_id=%s", user_id)
@@ -1,3 +1,5 @@
+import base64
+import json
 import os
 import uuid
 from datetime import datetime, timedelta, timezone
@@ -5,11 +7,21 @@ from typing import Optional
 
 import httpx
 from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
-from sqlalchemy import and_, desc, or_, select, text
+from prometheus_client import Counter
+from sqlalchemy import and_, delete, desc, func, or_, select, text, tuple_, update
 from sqlalchemy.orm import Session
 
 from ..deps import get_db
 from ..models import OtpEvent, Session as UserSession, User
+from ..revocation import (
+    bump_claims_version,
+    clear_user_revocation,
+    get_claims_version,
+    publish_user_changed,
+    revoke_token,
+    revoke_user_tokens,
+    token_state,
+)
 from ..schemas import (
     InternalUserLookupResponse,
     LogoutRequest,
@@ -26,6 +38,7 @@ from ..schemas import (
     TokenResponse,
     TokenUser,
     UpdateUserCapabilitiesRequest,
+    UpdateUserStatusRequest,
     UserListItem,
     UserListResponse,
     ValidateRequest,
@@ -34,8 +47,10 @@ from ..schemas import (
 from ..security import (
     create_access_token,
     decode_access_token,
+    has_current_claims,
     hash_otp,
     hash_password,
+    is_legacy_otp_hash,
     try_decode_access_token,
     verify_otp,
     verify_password,
@@ -43,6 +58,18 @@ from ..security import (
 
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 
+OTP_VERIFICATIONS = Counter(
+    "auth_otp_verifications_total",
+    "OTP verification attempts by stored hash scheme (hmac, legacy bcrypt) and result",
+    ["scheme", "result"],
+)
+
+TOKEN_VALIDATIONS = Counter(
+    "auth_token_validations_total",
+    "/validate calls by how they were answered (claims = from the token, database, invalid)",
+    ["source"],
+)
+
 
 def _now() -> datetime:
     return datetime.now(timezone.utc)
@@ -60,18 +87,34 @@ def _otp_expire_minutes() -> int:
     return int(os.getenv("OTP_EXPIRE_MINUTES", "5"))
 
 
+def _otp_max_attempts() -> int:
+    return int(os.getenv("OTP_MAX_ATTEMPTS", "5"))
+
+
+def _user_count_exact_limit() -> int:
+    return int(os.getenv("USER_COUNT_EXACT_LIMIT", "10000"))
+
+
 def _dev_static_otp() -> str:
     return os.getenv("DEV_STATIC_OTP", "123456")
 
 
-def _issue_tokens(db: Session, user: User, request: Request) -> TokenResponse:
-    access_token = create_access_token(
+async def _access_token_for(user: User) -> str:
+    return create_access_token(
         user_id=user.id,
         role=user.role,
         email=user.email,
         expires_minutes=_access_ttl_minutes(),
+        subscriber_id=getattr(user, "subscriber_id", None),
+        can_assign_leads=bool(getattr(user, "can_assign_leads", False)),
+        can_manage_unassigned_leads=bool(getattr(user, "can_manage_unassigned_leads", False)),
+        claims_version=await get_claims_version(str(user.id)) or 0,
     )
 
+
+async def _issue_tokens(db: Session, user: User, request: Request) -> TokenResponse:
+    access_token = await _access_token_for(user)
+
     refresh_token = str(uuid.uuid4())
     session = UserSession(
         user_id=user.id,
@@ -163,7 +206,7 @@ async def register(req: RegisterRequest, request: Request, db: Session = Depends
     user = User(
         email=str(req.email),
         phone=req.phone,
-        password_hash=hash_password(req.password),
+        password_hash=await hash_password(req.password),
         is_active=True,
         is_verified=False,
         role=req.role,
@@ -178,7 +221,7 @@ async def register(req: RegisterRequest, request: Request, db: Session = Depends
     db.commit()
     db.refresh(user)
 
-    otp_hash_val = hash_otp(_dev_static_otp())
+    otp_hash_val = hash_otp(_dev_static_otp(), identifier=user.email, purpose="registration")
     otp = OtpEvent(
         user_id=user.id,
         identifier=user.email,
@@ -215,7 +258,7 @@ async def otp_request(req: OtpRequestRequest, db: Session = Depends(get_db)):
     otp = OtpEvent(
         user_id=user.id if user else None,
         identifier=req.identifier,
-        otp_hash=hash_otp(_dev_static_otp()),
+        otp_hash=hash_otp(_dev_static_otp(), identifier=req.identifier, purpose=req.purpose),
         purpose=req.purpose,
         is_used=False,
         expires_at=now + timedelta(minutes=_otp_expire_minutes()),
@@ -244,16 +287,44 @@ async def otp_verify(req: OtpVerifyRequest, request: Request, db: Session = Depe
     otp = db.execute(stmt).scalar_one_or_none()
     if not otp:
         raise HTTPException(status_code=400, detail="OTP not found or expired")
+    otp_id, otp_hash, otp_user_id = otp.id, otp.otp_hash, otp.user_id
 
-    if not verify_otp(req.otp_code, otp.otp_hash):
+    # Spend an attempt before checking the code, in one conditional UPDATE, so concurrent
+    # guesses cannot share an attempt. An exhausted OTP stays dead until a new one is requested.
+    spent = db.execute(
+        update(OtpEvent)
+        .where(
+            OtpEvent.id == otp_id,
+            OtpEvent.is_used.is_(False),
+            OtpEvent.attempts < _otp_max_attempts(),
+        )
+        .values(attempts=OtpEvent.attempts + 1)
+    ).rowcount
+    db.commit()
+    if not spent:
+        raise HTTPException(status_code=429, detail="Too many OTP attempts; request a new OTP")
+
+    scheme = "bcrypt" if is_legacy_otp_hash(otp_hash) else "hmac"
+    if not await verify_otp(
+        req.otp_code, otp_hash, identifier=req.identifier, purpose=req.purpose
+    ):
+        OTP_VERIFICATIONS.labels(scheme=scheme, result="invalid").inc()
         raise HTTPException(status_code=401, detail="Invalid OTP")
-
-    otp.is_used = True
-    db.add(otp)
+    OTP_VERIFICATIONS.labels(scheme=scheme, result="valid").inc()
+
+    # Single use even if two correct submissions race.
+    claimed = db.execute(
+        update(OtpEvent)
+        .where(OtpEvent.id == otp_id, OtpEvent.is_used.is_(False))
+        .values(is_used=True)
+    ).rowcount
+    if not claimed:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="OTP not found or expired")
 
     user: Optional[User] = None
-    if otp.user_id:
-        user = db.get(User, otp.user_id)
+    if otp_user_id:
+        user = db.get(User, otp_user_id)
 
     if not user:
         # Best-effort lookup
@@ -268,17 +339,17 @@ async def otp_verify(req: OtpVerifyRequest, request: Request, db: Session = Depe
         db.add(user)
         db.commit()
 
-    return _issue_tokens(db, user, request)
+    return await _issue_tokens(db, user, request)
 
 
 @router.post("/login", response_model=TokenResponse)
 async def login(req: PasswordLoginRequest, request: Request, db: Session = Depends(get_db)):
     user = db.execute(select(User).where(User.email == str(req.email))).scalar_one_or_none()
-    if not user or not verify_password(req.password, user.password_hash):
+    if not user or not await verify_password(req.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     if not user.is_active:
         raise HTTPException(status_code=403, detail="User is inactive")
-    return _issue_tokens(db, user, request)
+    return await _issue_tokens(db, user, request)
 
 
 @router.post("/refresh", response_model=RefreshResponse)
@@ -295,12 +366,7 @@ async def refresh(req: RefreshRequest, db: Session = Depends(get_db)):
     db.add(session)
     db.commit()
 
-    access_token = create_access_token(
-        user_id=user.id,
-        role=user.role,
-        email=user.email,
-        expires_minutes=_access_ttl_minutes(),
-    )
+    access_token = await _access_token_for(user)
     return RefreshResponse(access_token=access_token, expires_in=_access_ttl_minutes() * 60)
 
 
@@ -317,6 +383,11 @@ async def logout(
     if session:
         db.delete(session)
         db.commit()
+
+    # Revoke the presented access token so gateways verifying locally stop accepting it.
+    payload = try_decode_access_token(authorization.split(" ", 1)[1].strip())
+    if payload:
+        await revoke_token(str(payload.get("jti") or ""), int(payload["exp"]))
     return {"message": "Logged out successfully"}
 
 
@@ -324,10 +395,34 @@ async def logout(
 async def validate(req: ValidateRequest, db: Session = Depends(get_db)):
     payload = try_decode_access_token(req.token)
     if not payload:
+        TOKEN_VALIDATIONS.labels(source="invalid").inc()
+        raise HTTPException(status_code=401, detail="Invalid token")
+    revoked, claims_version = await token_state(
+        str(payload.get("jti") or ""), str(payload["sub"]), int(payload.get("iat") or 0)
+    )
+    if revoked:
+        TOKEN_VALIDATIONS.labels(source="invalid").inc()
         raise HTTPException(status_code=401, detail="Invalid token")
+    if has_current_claims(payload, claims_version):
+        # Minted at the user's current claims version: nothing in the user row has changed.
+        TOKEN_VALIDATIONS.labels(source="claims").inc()
+        return ValidateResponse(
+            valid=True,
+            user_id=payload["sub"],
+            email=payload["email"],
+            role=payload["role"],
+            subscriber_id=payload.get("subscriber_id"),
+            can_assign_leads=bool(payload["can_assign_leads"]),
+            can_manage_unassigned_leads=bool(payload["can_manage_unassigned_leads"]),
+            expires_at=datetime.fromtimestamp(payload["exp"], tz=timezone.utc),
+        )
+
+    # Older token format, outdated claims or Redis unavailable: read the user.
     user = db.get(User, uuid.UUID(payload["sub"]))
     if not user or not user.is_active:
+        TOKEN_VALIDATIONS.labels(source="invalid").inc()
         raise HTTPException(status_code=401, detail="Invalid token")
+    TOKEN_VALIDATIONS.labels(source="database").inc()
     return ValidateResponse(
         valid=True,
         user_id=user.id,
@@ -372,6 +467,67 @@ def _require_admin(authorization: Optional[str]) -> dict:
     return payload
 
 
+def _encode_user_cursor(user: User) -> str:
+    raw = json.dumps({"c": user.created_at.isoformat(), "i": str(user.id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_user_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["c"]), uuid.UUID(data["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _user_conditions(role: Optional[str], like: Optional[str]) -> list:
+    conditions = []
+    if role:
+        conditions.append(User.role == role)
+    if like:
+        # Substring search served by the trigram indexes on email and phone (migration 0005).
+        conditions.append(
+            or_(User.email.ilike(like, escape="\\"), User.phone.ilike(like, escape="\\"))
+        )
+    return conditions
+
+
+def _estimate_users(db: Session, role: Optional[str], like: Optional[str]) -> int:
+    """The planner's row estimate for the filters `_user_conditions` builds."""
+    sql = "EXPLAIN (FORMAT JSON) SELECT id FROM auth.users WHERE TRUE"
+    params = {}
+    if role:
+        sql += " AND role = :role"
+        params["role"] = role
+    if like:
+        sql += " AND (email ILIKE :like ESCAPE '\\' OR phone ILIKE :like ESCAPE '\\')"
+        params["like"] = like
+    plan = db.execute(text(sql), params).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _count_users(db: Session, role: Optional[str], like: Optional[str]) -> tuple[int, bool]:
+    """
+    Exact COUNT(*) up to USER_COUNT_EXACT_LIMIT matches; past that, the planner's row estimate
+    (so the cost stays bounded however many users match). Returns (count, is_estimate).
+    """
+    cap = _user_count_exact_limit()
+    matching = select(User.id).where(*_user_conditions(role, like))
+    capped = db.execute(
+        select(func.count()).select_from(matching.limit(cap + 1).subquery())
+    ).scalar_one()
+    if capped <= cap:
+        return capped, False
+    return max(capped, _estimate_users(db, role, like)), True
+
+
 @router.get("/users", response_model=UserListResponse)
 async def list_users(
     authorization: Optional[str] = Header(default=None),
@@ -380,16 +536,24 @@ async def list_users(
     q: Optional[str] = Query(default=None),
     limit: int = Query(default=50, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None),
 ):
     _require_admin(authorization)
-    stmt = select(User)
-    if role:
-        stmt = stmt.where(User.role == role)
-    if q:
-        like = f"%{q}%"
-        stmt = stmt.where(or_(User.email.ilike(like), User.phone.ilike(like)))
-    total = len(db.execute(stmt).scalars().all())
-    rows = db.execute(stmt.order_by(User.created_at.desc()).limit(limit).offset(offset)).scalars().all()
+    like = f"%{_escape_like(q)}%" if q else None
+    total, total_is_estimate = _count_users(db, role, like)
+
+    # Keyset pagination on (created_at, id): each page is an index range scan, however deep.
+    # `offset` is still honoured for callers that page by number without a cursor.
+    stmt = select(User).where(*_user_conditions(role, like))
+    if cursor:
+        created_at, user_id = _decode_user_cursor(cursor)
+        stmt = stmt.where(tuple_(User.created_at, User.id) < (created_at, user_id))
+    elif offset:
+        stmt = stmt.offset(offset)
+    rows = db.execute(
+        stmt.order_by(User.created_at.desc(), User.id.desc()).limit(limit + 1)
+    ).scalars().all()
+    next_cursor = _encode_user_cursor(rows[limit - 1]) if len(rows) > limit else None
     return UserListResponse(
         items=[
             UserListItem(
@@ -403,9 +567,11 @@ async def list_users(
                 can_assign_leads=bool(u.can_assign_leads),
                 can_manage_unassigned_leads=bool(u.can_manage_unassigned_leads),
             )
-            for u in rows
+            for u in rows[:limit]
         ],
         total=total,
+        total_is_estimate=total_is_estimate,
+        next_cursor=next_cursor,
     )
 
 
@@ -429,6 +595,50 @@ async def update_user_capabilities(
     db.add(user)
     db.commit()
     db.refresh(user)
+    # Tokens minted before this change now carry outdated capabilities.
+    await bump_claims_version(str(user.id))
+    await publish_user_changed(str(user.id))
+
+    return UserListItem(
+        id=user.id,
+        email=user.email,  # type: ignore[arg-type]
+        phone=user.phone,
+        role=user.role,  # type: ignore[arg-type]
+        is_active=user.is_active,
+        is_verified=user.is_verified,
+        subscriber_id=getattr(user, "subscriber_id", None),
+        can_assign_leads=bool(user.can_assign_leads),
+        can_manage_unassigned_leads=bool(user.can_manage_unassigned_leads),
+    )
+
+
+@router.patch("/users/{user_id}/status", response_model=UserListItem)
+async def update_user_status(
+    user_id: uuid.UUID,
+    req: UpdateUserStatusRequest,
+    authorization: Optional[str] = Header(default=None),
+    db: Session = Depends(get_db),
+):
+    _require_admin(authorization)
+    user = db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    user.is_active = req.is_active
+    user.updated_at = _now()
+    db.add(user)
+    if not req.is_active:
+        # Deactivation ends all sessions and revokes outstanding access tokens.
+        db.execute(delete(UserSession).where(UserSession.user_id == user.id))
+    db.commit()
+    db.refresh(user)
+
+    if req.is_active:
+        await clear_user_revocation(str(user.id))
+    else:
+        await revoke_user_tokens(str(user.id))
+    await bump_claims_version(str(user.id))
+    await publish_user_changed(str(user.id))
 
     return UserListItem(
         id=user.id,
@@ -537,7 +747,7 @@ async def admin_create_staff_user(
     user = User(
         email=str(req.email),
         phone=req.phone,
-        password_hash=hash_password(req.password),
+        password_hash=await hash_password(req.password),
         is_active=True,
         is_verified=False,
         role=req.role,
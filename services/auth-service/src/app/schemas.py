@@ -118,6 +118,10 @@ class UserListItem(BaseModel):
 class UserListResponse(BaseModel):
     items: list[UserListItem]
     total: int
+    # True when more than USER_COUNT_EXACT_LIMIT users match and `total` is the planner estimate.
+    total_is_estimate: bool = False
+    # Pass as `cursor` to fetch the next page; None on the last page.
+    next_cursor: Optional[str] = None
 
 
 class UpdateUserCapabilitiesRequest(BaseModel):
@@ -125,6 +129,10 @@ class UpdateUserCapabilitiesRequest(BaseModel):
     can_manage_unassigned_leads: Optional[bool] = None
 
 
+class UpdateUserStatusRequest(BaseModel):
+    is_active: bool
+
+
 class InternalUserLookupResponse(BaseModel):
     id: UUID
     role: Role
@@ -1,3 +1,5 @@
+import hashlib
+import hmac
 import os
 import uuid
 from datetime import datetime, timedelta, timezone
@@ -6,25 +8,76 @@ from typing import Any, Dict, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
+from .hashing import run_hash
+from .keys import get_key_ring
+
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+# bcrypt runs on the hash pool (`app/hashing.py`) so it never blocks the event loop.
+async def hash_password(password: str) -> str:
+    return await run_hash("hash_password", pwd_context.hash, password)
+
+
+async def verify_password(password: str, password_hash: str) -> bool:
+    return await run_hash("verify_password", pwd_context.verify, password, password_hash)
+
+
+# OTPs are short-lived and attempt-limited (`OtpEvent.attempts`), so a keyed HMAC replaces
+# bcrypt: without the key a leaked row cannot be brute-forced over the small code space.
+OTP_HASH_PREFIX = "hmac-sha256$"
+
+
+def otp_key() -> bytes:
+    # Its own key, not JWT_SECRET: rotating one must not invalidate (or expose) the other.
+    key = os.getenv("OTP_HMAC_KEY", "")
+    if not key:
+        raise RuntimeError("OTP_HMAC_KEY is required")
+    return key.encode("utf-8")
+
+
+# bcrypt OTP rows written before the HMAC scheme are only checked until this ISO-8601 UTC
+# instant (deploy time + OTP_EXPIRE_MINUTES is enough). Unset: they are rejected.
+def _legacy_bcrypt_otp_until() -> Optional[datetime]:
+    value = os.getenv("OTP_LEGACY_BCRYPT_UNTIL", "")
+    if not value:
+        return None
+    until = datetime.fromisoformat(value)
+    return until if until.tzinfo else until.replace(tzinfo=timezone.utc)
+
+
+def accept_legacy_bcrypt_otp(now: Optional[datetime] = None) -> bool:
+    until = _legacy_bcrypt_otp_until()
+    return until is not None and (now or datetime.now(timezone.utc)) < until
+
+
+def _otp_digest(otp: str, identifier: str, purpose: str) -> str:
+    # Bound to identifier and purpose so a digest can't be replayed on another OTP row.
+    message = f"{purpose}\x00{identifier}\x00{otp}".encode("utf-8")
+    return hmac.new(otp_key(), message, hashlib.sha256).hexdigest()
 
 
-def verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
+def hash_otp(otp: str, *, identifier: str, purpose: str) -> str:
+    return OTP_HASH_PREFIX + _otp_digest(otp, identifier, purpose)
 
 
-def hash_otp(otp: str) -> str:
-    # Using password hasher keeps it simple (bcrypt)
-    return pwd_context.hash(otp)
+def is_legacy_otp_hash(otp_hash: str) -> bool:
+    return not otp_hash.startswith(OTP_HASH_PREFIX)
 
 
-def verify_otp(otp: str, otp_hash: str) -> bool:
-    return pwd_context.verify(otp, otp_hash)
+async def verify_otp(otp: str, otp_hash: str, *, identifier: str, purpose: str) -> bool:
+    if is_legacy_otp_hash(otp_hash):
+        if not accept_legacy_bcrypt_otp():
+            return False
+        return await run_hash("verify_otp", pwd_context.verify, otp, otp_hash)
+    expected = _otp_digest(otp, identifier, purpose)
+    return hmac.compare_digest(otp_hash[len(OTP_HASH_PREFIX):], expected)
+
+
+# Version 2 tokens carry every claim /validate returns plus the user's claims version ("cv"),
+# so they can be validated without reading the user row.
+ACCESS_TOKEN_VERSION = 2
 
 
 def _jwt_secret() -> str:
@@ -38,21 +91,73 @@ def _jwt_algorithm() -> str:
     return os.getenv("JWT_ALGORITHM", "HS256")
 
 
-def create_access_token(*, user_id: uuid.UUID, role: str, email: str, expires_minutes: int) -> str:
+# Migration switch for moving to RS256: keeps accepting tokens signed with JWT_SECRET until
+# they expire. To be removed with the HS256 path on 2026-12-01.
+def accept_legacy_hs256() -> bool:
+    return os.getenv("JWT_ACCEPT_LEGACY_HS256", "false").lower() in ("1", "true", "yes")
+
+
+def create_access_token(
+    *,
+    user_id: uuid.UUID,
+    role: str,
+    email: str,
+    expires_minutes: int,
+    subscriber_id: Optional[uuid.UUID] = None,
+    can_assign_leads: bool = False,
+    can_manage_unassigned_leads: bool = False,
+    claims_version: int = 0,
+) -> str:
     now = datetime.now(timezone.utc)
     exp = now + timedelta(minutes=expires_minutes)
+    # Authorization claims are embedded so the gateway can verify tokens locally.
     payload: Dict[str, Any] = {
         "sub": str(user_id),
         "role": role,
         "email": email,
+        "subscriber_id": str(subscriber_id) if subscriber_id else None,
+        "can_assign_leads": bool(can_assign_leads),
+        "can_manage_unassigned_leads": bool(can_manage_unassigned_leads),
+        "ver": ACCESS_TOKEN_VERSION,
+        "cv": int(claims_version),
+        "jti": uuid.uuid4().hex,
         "iat": int(now.timestamp()),
         "exp": int(exp.timestamp()),
     }
-    return jwt.encode(payload, _jwt_secret(), algorithm=_jwt_algorithm())
+    ring = get_key_ring()
+    if ring is None:
+        return jwt.encode(payload, _jwt_secret(), algorithm=_jwt_algorithm())
+    return jwt.encode(
+        payload, ring.active.private_pem, algorithm=ring.algorithm, headers={"kid": ring.active_kid}
+    )
 
 
 def decode_access_token(token: str) -> Dict[str, Any]:
-    return jwt.decode(token, _jwt_secret(), algorithms=[_jwt_algorithm()])
+    ring = get_key_ring()
+    if ring is None:
+        return jwt.decode(token, _jwt_secret(), algorithms=[_jwt_algorithm()])
+    header = jwt.get_unverified_header(token)
+    if header.get("alg") == ring.algorithm:
+        key = ring.public_key(str(header.get("kid") or ""))
+        if key is None:
+            raise JWTError("Unknown signing key")
+        return jwt.decode(token, key, algorithms=[ring.algorithm])
+    # While moving off the shared secret, tokens it signed stay valid only behind the flag.
+    secret = os.getenv("JWT_SECRET", "")
+    if not (secret and accept_legacy_hs256()):
+        raise JWTError("Unsupported signing algorithm")
+    return jwt.decode(token, secret, algorithms=["HS256"])
+
+
+def has_current_claims(payload: Dict[str, Any], claims_version: Optional[int]) -> bool:
+    """True when the token's embedded claims are still the user's (None = version unknown)."""
+    if claims_version is None:
+        return False
+    try:
+        current_format = int(payload.get("ver") or 0) >= ACCESS_TOKEN_VERSION
+        return current_format and int(payload["cv"]) >= claims_version
+    except (KeyError, TypeError, ValueError):
+        return False
 
 
 def try_decode_access_token(token: str) -> Optional[Dict[str, Any]]:
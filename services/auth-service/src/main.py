@@ -1,27 +1,49 @@
-import json
 import logging
 import os
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from uuid import uuid4
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
-
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram
+
+from shared_utils.logging import sample_access, setup_logging
+from shared_utils.deadline import DEADLINE_HEADER, bind_deadline, deadline_expired, reset_deadline
+from app.hashing import HashQueueFull, shutdown as shutdown_hash_pool
+from app.keys import get_key_ring, jwks_document
+from app.revocation import close_redis
+from app.security import accept_legacy_bcrypt_otp, accept_legacy_hs256, otp_key
 from app.routers.auth import router as auth_router
+from shared_utils.server import metric_path, metrics_payload
 
 SERVICE_NAME = os.getenv("SERVICE_NAME", "auth-service")
 SERVICE_VERSION = os.getenv("SERVICE_VERSION", "0.1.0")
 ENVIRONMENT = os.getenv("ENVIRONMENT", "local")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*")
+JWKS_MAX_AGE_SECONDS = int(os.getenv("JWKS_MAX_AGE_SECONDS", "300"))
 
-logging.basicConfig(level=LOG_LEVEL, format="%(message)s")
+setup_logging(LOG_LEVEL)
 logger = logging.getLogger(SERVICE_NAME)
 
-app = FastAPI(title=SERVICE_NAME, version=SERVICE_VERSION)
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Fail at boot, not on the first login, when signing or OTP keys are misconfigured.
+    if get_key_ring() is not None and accept_legacy_hs256():
+        logger.warning("JWT_ACCEPT_LEGACY_HS256 is set: HS256 tokens are still accepted")
+    otp_key()
+    if accept_legacy_bcrypt_otp():
+        logger.warning("OTP_LEGACY_BCRYPT_UNTIL is set: bcrypt OTP rows are still accepted")
+    yield
+    shutdown_hash_pool()
+    await close_redis()
+
+
+app = FastAPI(lifespan=lifespan, title=SERVICE_NAME, version=SERVICE_VERSION)
 
 origins = [o.strip() for o in CORS_ORIGINS.split(",") if o.strip()] or ["*"]
 app.add_middleware(
@@ -50,6 +72,16 @@ REQUEST_LATENCY = Histogram(
 app.include_router(auth_router)
 
 
+@app.exception_handler(HashQueueFull)
+async def hash_queue_full(_request: Request, _exc: HashQueueFull) -> JSONResponse:
+    # Shed the burst quickly; the queue drains within a few hash times.
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication is busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
 def _get_correlation_id(request: Request) -> str:
     return (
         request.headers.get("x-correlation-id")
@@ -59,18 +91,23 @@ def _get_correlation_id(request: Request) -> str:
 
 
 def _log_event(request: Request, status_code: int, duration: float) -> None:
-    event = {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "service": SERVICE_NAME,
-        "environment": ENVIRONMENT,
-        "method": request.method,
-        "path": request.url.path,
-        "status_code": status_code,
-        "duration_ms": round(duration * 1000, 2),
-        "correlation_id": getattr(request.state, "correlation_id", ""),
-        "client_ip": request.client.host if request.client else "",
-    }
-    logger.info(json.dumps(event))
+    duration_ms = round(duration * 1000, 2)
+    sample_rate = sample_access(status_code, duration_ms)
+    if sample_rate is None:
+        return
+    logger.info(
+        {
+            "service": SERVICE_NAME,
+            "environment": ENVIRONMENT,
+            "method": request.method,
+            "path": request.url.path,
+            "status_code": status_code,
+            "duration_ms": duration_ms,
+            "correlation_id": getattr(request.state, "correlation_id", ""),
+            "client_ip": request.client.host if request.client else "",
+            "sample_rate": sample_rate,
+        }
+    )
 
 
 @app.middleware("http")
@@ -78,22 +115,29 @@ async def metrics_and_logging(request: Request, call_next):
     start = time.time()
     correlation_id = _get_correlation_id(request)
     request.state.correlation_id = correlation_id
+    deadline_token = bind_deadline(request.headers.get(DEADLINE_HEADER))
     response = None
     try:
+        if deadline_expired():
+            # The caller (e.g. the gateway) has already given up; don't start the work.
+            response = JSONResponse(status_code=504, content={"detail": "Request deadline exceeded"})
+            return response
         response = await call_next(request)
         response.headers["X-Correlation-ID"] = correlation_id
         return response
     finally:
+        reset_deadline(deadline_token)
         duration = time.time() - start
         status_code = response.status_code if response else 500
+        path_label = metric_path(request)
         REQUEST_COUNT.labels(
             service=SERVICE_NAME,
             method=request.method,
-            path=request.url.path,
+            path=path_label,
             status_code=str(status_code),
         ).inc()
         REQUEST_LATENCY.labels(
-            service=SERVICE_NAME, method=request.method, path=request.url.path
+            service=SERVICE_NAME, method=request.method, path=path_label
         ).observe(duration)
         _log_event(request, status_code, duration)
 
@@ -130,7 +174,17 @@ async def live() -> dict:
 
 @app.get("/metrics")
 async def metrics() -> Response:
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    return Response(metrics_payload(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/.well-known/jwks.json")
+async def jwks(request: Request) -> Response:
+    """Public keys for verifying access tokens offline (empty while HS256 is in use)."""
+    body, etag = jwks_document()
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={JWKS_MAX_AGE_SECONDS}"}
+    if etag in {tag.strip() for tag in request.headers.get("if-none-match", "").split(",")}:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
 
 
 if __name__ == "__main__":
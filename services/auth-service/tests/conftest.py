@@ -0,0 +1,60 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+# Keep imports safe on fresh machines/CI (no Postgres or Redis required).
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("INTERNAL_API_KEY", "dev-internal")
+# Must be set because the session factory is created at import time.
+os.environ.setdefault("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "")
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("OTP_HMAC_KEY", "test-otp-key")
+os.environ.setdefault("SUBSCRIBER_SERVICE_URL", "")
+
+from app.db import Base  # type: ignore
+from app.deps import get_db  # type: ignore
+from main import app  # type: ignore
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(_type, _compiler, **_kw):
+    return "JSON"
+
+
+@pytest.fixture
+def db_factory(tmp_path):
+    """Sessions on a file-backed SQLite database with the `auth` schema attached."""
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'main.db'}")
+    auth_path = tmp_path / "auth.db"
+
+    @event.listens_for(engine, "connect")
+    def _attach_auth_schema(dbapi_connection, _record):
+        dbapi_connection.execute(f"ATTACH DATABASE '{auth_path}' AS auth")
+
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield factory
+    app.dependency_overrides.pop(get_db, None)
+    engine.dispose()
+
+
+@pytest.fixture
+def client(db_factory):
+    with TestClient(app) as c:
+        yield c
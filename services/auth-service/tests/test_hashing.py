@@ -0,0 +1,95 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+from app import config, hashing  # type: ignore
+from main import app  # type: ignore
+from prometheus_client import REGISTRY
+
+PASSWORD = "correct-horse-battery"
+
+
+@pytest.fixture
+def small_pool(monkeypatch):
+    """One bcrypt thread and room for a single waiting job."""
+    hashing.shutdown()
+    monkeypatch.setattr(config, "HASH_WORKERS", 1)
+    monkeypatch.setattr(config, "HASH_MAX_QUEUE", 1)
+    yield
+    hashing.shutdown()
+
+
+def _pool_count(operation: str) -> float:
+    value = REGISTRY.get_sample_value("auth_hash_duration_seconds_count", {"operation": operation})
+    return value or 0.0
+
+
+def _register(client, email: str = "owner@example.com"):
+    return client.post(
+        "/api/v1/auth/register",
+        json={"email": email, "password": PASSWORD, "role": "subscriber"},
+    )
+
+
+def test_register_and_login_verify_on_the_pool(client, small_pool):
+    hashed, verified = _pool_count("hash_password"), _pool_count("verify_password")
+
+    assert _register(client).status_code == 201
+    ok = client.post(
+        "/api/v1/auth/login", json={"email": "owner@example.com", "password": PASSWORD}
+    )
+    bad = client.post(
+        "/api/v1/auth/login", json={"email": "owner@example.com", "password": "wrong-password"}
+    )
+
+    assert ok.status_code == 200
+    assert ok.json()["access_token"]
+    assert bad.status_code == 401
+    assert _pool_count("hash_password") == hashed + 1
+    assert _pool_count("verify_password") == verified + 2
+
+
+def test_login_is_shed_with_503_when_the_hash_queue_is_full(client, small_pool):
+    assert _register(client).status_code == 201
+    rejected = (
+        REGISTRY.get_sample_value("auth_hash_rejected_total", {"operation": "verify_password"})
+        or 0.0
+    )
+
+    async def scenario():
+        running, release = threading.Event(), threading.Event()
+
+        def hold():
+            running.set()
+            release.wait()
+
+        # The first job holds the only thread, the second fills the queue.
+        blockers = [asyncio.create_task(hashing.run_hash("test", hold))]
+        await asyncio.to_thread(running.wait)
+        blockers.append(asyncio.create_task(hashing.run_hash("test", release.wait)))
+        await asyncio.sleep(0)
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://auth") as c:
+                return await c.post(
+                    "/api/v1/auth/login",
+                    json={"email": "owner@example.com", "password": PASSWORD},
+                )
+        finally:
+            release.set()
+            await asyncio.gather(*blockers)
+
+    resp = asyncio.run(scenario())
+
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+    assert (
+        REGISTRY.get_sample_value("auth_hash_rejected_total", {"operation": "verify_password"})
+        == rejected + 1
+    )
+    # Once the burst drains the same login goes through.
+    ok = client.post(
+        "/api/v1/auth/login", json={"email": "owner@example.com", "password": PASSWORD}
+    )
+    assert ok.status_code == 200
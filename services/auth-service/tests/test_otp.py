@@ -0,0 +1,127 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from app import security  # type: ignore
+from app.models import OtpEvent, User  # type: ignore
+from app.routers import auth as auth_router  # type: ignore
+from main import app  # type: ignore
+from sqlalchemy import select
+
+EMAIL = "owner@example.com"
+CODE = "123456"
+
+
+@pytest.fixture
+def registered(client, monkeypatch):
+    monkeypatch.setenv("DEV_STATIC_OTP", CODE)
+    resp = client.post(
+        "/api/v1/auth/register",
+        json={"email": EMAIL, "password": "correct-horse-battery", "role": "subscriber"},
+    )
+    assert resp.status_code == 201
+    return resp.json()["user_id"]
+
+
+def _verify(client, code: str = CODE):
+    return client.post(
+        "/api/v1/auth/otp/verify",
+        json={"identifier": EMAIL, "otp_code": code, "purpose": "registration"},
+    )
+
+
+def _otp_row(db_factory) -> OtpEvent:
+    with db_factory() as db:
+        return db.execute(select(OtpEvent).where(OtpEvent.identifier == EMAIL)).scalar_one()
+
+
+def test_otp_is_stored_as_hmac_and_verifies(client, db_factory, registered):
+    row = _otp_row(db_factory)
+    assert row.otp_hash.startswith(security.OTP_HASH_PREFIX)
+    assert CODE not in row.otp_hash
+
+    resp = _verify(client)
+
+    assert resp.status_code == 200
+    assert resp.json()["access_token"]
+    with db_factory() as db:
+        assert db.execute(select(User.is_verified).where(User.email == EMAIL)).scalar_one()
+    # Single use.
+    assert _verify(client).status_code == 400
+
+
+def test_hmac_is_bound_to_identifier_and_purpose():
+    digest = security.hash_otp(CODE, identifier=EMAIL, purpose="login")
+
+    assert digest != security.hash_otp(CODE, identifier="other@example.com", purpose="login")
+    assert digest != security.hash_otp(CODE, identifier=EMAIL, purpose="password_reset")
+
+
+def test_otp_key_is_required_without_a_jwt_secret_fallback(monkeypatch):
+    monkeypatch.delenv("OTP_HMAC_KEY")
+    monkeypatch.setenv("JWT_SECRET", "test-secret")
+
+    with pytest.raises(RuntimeError, match="OTP_HMAC_KEY"):
+        security.hash_otp(CODE, identifier=EMAIL, purpose="login")
+
+
+def test_wrong_codes_spend_attempts_until_429(client, registered, monkeypatch):
+    monkeypatch.setenv("OTP_MAX_ATTEMPTS", "3")
+
+    assert [_verify(client, "000000").status_code for _ in range(3)] == [401, 401, 401]
+    # Exhausted: even the right code is refused until a new OTP is requested.
+    assert _verify(client).status_code == 429
+
+
+def _store_legacy_bcrypt_otp(db_factory) -> None:
+    with db_factory() as db:
+        row = db.execute(select(OtpEvent).where(OtpEvent.identifier == EMAIL)).scalar_one()
+        row.otp_hash = security.pwd_context.hash(CODE)
+        db.commit()
+
+
+def test_legacy_bcrypt_row_verifies_before_the_cutoff(client, db_factory, registered, monkeypatch):
+    _store_legacy_bcrypt_otp(db_factory)
+    until = datetime.now(timezone.utc) + timedelta(minutes=5)
+    monkeypatch.setenv("OTP_LEGACY_BCRYPT_UNTIL", until.isoformat())
+
+    assert _verify(client).status_code == 200
+
+
+def test_legacy_bcrypt_row_is_rejected_after_the_cutoff(
+    client, db_factory, registered, monkeypatch
+):
+    _store_legacy_bcrypt_otp(db_factory)
+    until = datetime.now(timezone.utc) - timedelta(minutes=1)
+    monkeypatch.setenv("OTP_LEGACY_BCRYPT_UNTIL", until.isoformat())
+
+    assert _verify(client).status_code == 401
+    monkeypatch.delenv("OTP_LEGACY_BCRYPT_UNTIL")
+    assert _verify(client).status_code == 401
+
+
+def test_concurrent_correct_codes_claim_the_otp_once(client, registered, monkeypatch):
+    verify_otp = auth_router.verify_otp
+
+    async def scenario():
+        # Both requests have spent their attempt and checked the code before either claims.
+        barrier = asyncio.Barrier(2)
+
+        async def verify_together(*args, **kwargs):
+            ok = await verify_otp(*args, **kwargs)
+            await barrier.wait()
+            return ok
+
+        monkeypatch.setattr(auth_router, "verify_otp", verify_together)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://auth") as c:
+            body = {"identifier": EMAIL, "otp_code": CODE, "purpose": "registration"}
+            return await asyncio.gather(
+                c.post("/api/v1/auth/otp/verify", json=body),
+                c.post("/api/v1/auth/otp/verify", json=body),
+            )
+
+    responses = asyncio.run(scenario())
+
+    assert sorted(r.status_code for r in responses) == [200, 400]
@@ -0,0 +1,151 @@
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.models import User  # type: ignore
+from app.routers import auth as auth_router  # type: ignore
+from app.security import create_access_token  # type: ignore
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def admin_headers():
+    token = create_access_token(
+        user_id=uuid.uuid4(), role="admin", email="admin@example.com", expires_minutes=5
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def add_users(db_factory):
+    def add(*emails: str, created_at=None, phones=()) -> list[User]:
+        users = []
+        phones = list(phones) + [None] * (len(emails) - len(phones))
+        with db_factory() as db:
+            for n, (email, phone) in enumerate(zip(emails, phones)):
+                ts = created_at or T0 + timedelta(minutes=n)
+                user = User(
+                    email=email,
+                    phone=phone,
+                    password_hash="x",
+                    role="subscriber",
+                    created_at=ts,
+                    updated_at=ts,
+                )
+                db.add(user)
+                users.append(user)
+            db.commit()
+            for user in users:
+                db.refresh(user)
+                db.expunge(user)
+        return users
+
+    return add
+
+
+def _list(client, headers, **params):
+    resp = client.get("/api/v1/auth/users", headers=headers, params=params)
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def _pages(client, headers, **params) -> list[list[str]]:
+    pages, cursor = [], None
+    while True:
+        body = _list(client, headers, **params, **({"cursor": cursor} if cursor else {}))
+        pages.append([item["email"] for item in body["items"]])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return pages
+
+
+def test_cursor_pages_walk_every_user_newest_first(client, admin_headers, add_users):
+    emails = [f"user{n}@example.com" for n in range(5)]
+    add_users(*emails)
+
+    pages = _pages(client, admin_headers, limit=2)
+
+    assert pages == [emails[4:2:-1], emails[2:0:-1], emails[:1]]
+
+
+def test_created_at_ties_are_ordered_by_id_without_gaps(client, admin_headers, add_users):
+    users = add_users(*(f"tie{n}@example.com" for n in range(5)), created_at=T0)
+    by_id = [u.email for u in sorted(users, key=lambda u: u.id, reverse=True)]
+
+    pages = _pages(client, admin_headers, limit=2)
+
+    assert [email for page in pages for email in page] == by_id
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not-base64!",
+        base64.urlsafe_b64encode(b"[1, 2]").decode(),
+        base64.urlsafe_b64encode(json.dumps({"c": "yesterday", "i": "x"}).encode()).decode(),
+    ],
+)
+def test_tampered_cursor_is_rejected(client, admin_headers, cursor):
+    resp = client.get("/api/v1/auth/users", headers=admin_headers, params={"cursor": cursor})
+
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.parametrize(
+    ("q", "expected"),
+    [
+        ("100%", ["ext 100%"]),
+        ("a_b", ["a_b"]),
+        ("c\\d", ["c\\d"]),
+    ],
+)
+def test_search_treats_like_metacharacters_literally(client, admin_headers, add_users, q, expected):
+    phones = ["ext 100%", "ext 1000", "a_b", "axb", "c\\d", "c\\\\d", "cd"]
+    add_users(*(f"user{n}@example.com" for n in range(len(phones))), phones=phones)
+
+    body = _list(client, admin_headers, q=q)
+
+    assert [item["phone"] for item in body["items"]] == expected
+    assert body["total"] == 1
+
+
+def test_total_is_exact_up_to_the_limit(client, admin_headers, add_users, monkeypatch):
+    monkeypatch.setenv("USER_COUNT_EXACT_LIMIT", "3")
+    add_users(*(f"user{n}@example.com" for n in range(3)))
+
+    body = _list(client, admin_headers)
+
+    assert (body["total"], body["total_is_estimate"]) == (3, False)
+
+
+def test_total_is_an_estimate_past_the_limit(client, admin_headers, add_users, monkeypatch):
+    monkeypatch.setenv("USER_COUNT_EXACT_LIMIT", "3")
+    # EXPLAIN is PostgreSQL-only; stand in for the planner.
+    monkeypatch.setattr(auth_router, "_estimate_users", lambda db, role, like: 1200)
+    add_users(*(f"user{n}@example.com" for n in range(4)))
+
+    body = _list(client, admin_headers)
+
+    assert (body["total"], body["total_is_estimate"]) == (1200, True)
+
+
+def test_estimate_binds_the_search_instead_of_inlining_it():
+    class RecordingSession:
+        def execute(self, statement, params):
+            self.sql, self.params = str(statement), params
+            return self
+
+        def scalar_one(self):
+            return [{"Plan": {"Plan Rows": 42}}]
+
+    db = RecordingSession()
+    like = "%'; DROP TABLE auth.users; --%"
+
+    assert auth_router._estimate_users(db, "subscriber", like) == 42
+    assert like not in db.sql
+    assert db.sql.startswith("EXPLAIN (FORMAT JSON) SELECT id FROM auth.users")
+    assert db.params == {"role": "subscriber", "like": like}
@@ -1,4 +1,3 @@
-import json
 import logging
 import os
 import time
@@ -11,11 +10,20 @@ from uuid import uuid4
 import httpx
 from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse, Response
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from fastapi.responses import JSONResponse, RedirectResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram
 from sqlalchemy import func, select, text
 from sqlalchemy.orm import Session
 
+from shared_utils.logging import sample_access, setup_logging
+from shared_utils.deadline import (
+    DEADLINE_HEADER,
+    bind_deadline,
+    deadline_expired,
+    deadline_headers,
+    deadline_timeout,
+    reset_deadline,
+)
 from app.deps import get_db
 from app.models import (
     CreditLedgerAccount,
@@ -39,6 +47,7 @@ from app.schemas import (
     ProrationEstimateRequest,
     ProrationEstimateResponse,
 )
+from shared_utils.server import metric_path, metrics_payload
 
 SERVICE_NAME = os.getenv("SERVICE_NAME", "billing-service")
 SERVICE_VERSION = os.getenv("SERVICE_VERSION", "0.1.0")
@@ -50,7 +59,7 @@ MEDIA_SERVICE_URL = os.getenv("MEDIA_SERVICE_URL", "")
 NOTIFICATION_SERVICE_URL = os.getenv("NOTIFICATION_SERVICE_URL", "")
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "")
 
-logging.basicConfig(level=LOG_LEVEL, format="%(message)s")
+setup_logging(LOG_LEVEL)
 logger = logging.getLogger(SERVICE_NAME)
 
 app = FastAPI(title=SERVICE_NAME, version=SERVICE_VERSION)
@@ -85,18 +94,23 @@ def _get_correlation_id(request: Request) -> str:
 
 
 def _log_event(request: Request, status_code: int, duration: float) -> None:
-    event = {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "service": SERVICE_NAME,
-        "environment": ENVIRONMENT,
-        "method": request.method,
-        "path": request.url.path,
-        "status_code": status_code,
-        "duration_ms": round(duration * 1000, 2),
-        "correlation_id": getattr(request.state, "correlation_id", ""),
-        "client_ip": request.client.host if request.client else "",
-    }
-    logger.info(json.dumps(event))
+    duration_ms = round(duration * 1000, 2)
+    sample_rate = sample_access(status_code, duration_ms)
+    if sample_rate is None:
+        return
+    logger.info(
+        {
+            "service": SERVICE_NAME,
+            "environment": ENVIRONMENT,
+            "method": request.method,
+            "path": request.url.path,
+            "status_code": status_code,
+            "duration_ms": duration_ms,
+            "correlation_id": getattr(request.state, "correlation_id", ""),
+            "client_ip": request.client.host if request.client else "",
+            "sample_rate": sample_rate,
+        }
+    )
 
 
 @app.middleware("http")
@@ -104,22 +118,29 @@ async def metrics_and_logging(request: Request, call_next):
     start = time.time()
     correlation_id = _get_correlation_id(request)
     request.state.correlation_id = correlation_id
+    deadline_token = bind_deadline(request.headers.get(DEADLINE_HEADER))
     response = None
     try:
+        if deadline_expired():
+            # The caller (e.g. the gateway) has already given up; don't start the work.
+            response = JSONResponse(status_code=504, content={"detail": "Request deadline exceeded"})
+            return response
         response = await call_next(request)
         response.headers["X-Correlation-ID"] = correlation_id
         return response
     finally:
+        reset_deadline(deadline_token)
         duration = time.time() - start
         status_code = response.status_code if response else 500
+        path_label = metric_path(request)
         REQUEST_COUNT.labels(
             service=SERVICE_NAME,
             method=request.method,
-            path=request.url.path,
+            path=path_label,
             status_code=str(status_code),
         ).inc()
         REQUEST_LATENCY.labels(
-            service=SERVICE_NAME, method=request.method, path=request.url.path
+            service=SERVICE_NAME, method=request.method, path=path_label
         ).observe(duration)
         _log_event(request, status_code, duration)
 
@@ -156,7 +177,7 @@ async def live() -> dict:
 
 @app.get("/metrics")
 async def metrics() -> Response:
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    return Response(metrics_payload(), media_type=CONTENT_TYPE_LATEST)
 
 
 def _require_admin(x_user_role: Optional[str]) -> None:
@@ -505,7 +526,7 @@ async def _redirect_to_pdf(inv: Invoice) -> RedirectResponse:
     if not MEDIA_SERVICE_URL or not INTERNAL_API_KEY:
         raise HTTPException(status_code=503, detail="PDF service unavailable")
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
+        async with httpx.AsyncClient(timeout=deadline_timeout(5.0), headers=deadline_headers()) as client:
             r = await client.get(
                 f"{MEDIA_SERVICE_URL}/api/v1/media/internal/download/{inv.pdf_media_id}",
                 headers={"X-Internal-API-Key": INTERNAL_API_KEY},
@@ -0,0 +1,48 @@
+import time
+
+from shared_utils.deadline import (
+    DEADLINE_HEADER,
+    MIN_TIMEOUT_SECONDS,
+    bind_deadline,
+    deadline_headers,
+    deadline_timeout,
+    reset_deadline,
+)
+
+
+def _in(seconds: float) -> str:
+    return str(int((time.time() + seconds) * 1000))
+
+
+def test_expired_deadline_is_rejected(client):
+    resp = client.get("/health", headers={DEADLINE_HEADER: _in(-1)})
+    assert resp.status_code == 504
+
+
+def test_live_deadline_is_served(client):
+    assert client.get("/health", headers={DEADLINE_HEADER: _in(30)}).status_code == 200
+
+
+def test_timeouts_are_capped_to_remaining_budget():
+    token = bind_deadline(_in(2))
+    try:
+        assert deadline_timeout(15.0) <= 2.0
+        assert deadline_timeout(1.0) == 1.0
+        assert DEADLINE_HEADER in deadline_headers()
+    finally:
+        reset_deadline(token)
+
+    token = bind_deadline(_in(-5))
+    try:
+        assert deadline_timeout(15.0) == MIN_TIMEOUT_SECONDS
+    finally:
+        reset_deadline(token)
+
+
+def test_without_deadline_defaults_apply():
+    token = bind_deadline(None)
+    try:
+        assert deadline_timeout(5.0) == 5.0
+        assert deadline_headers() == {}
+    finally:
+        reset_deadline(token)
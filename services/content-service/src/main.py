@@ -9,11 +9,13 @@ from uuid import uuid4
 from redis import Redis
 from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
+from shared_utils.logging import sample_access, setup_logging
+from shared_utils.deadline import DEADLINE_HEADER, bind_deadline, deadline_expired, reset_deadline
 from app.deps import get_db
 from app.models import CaseStudy
 from app.schemas import (
@@ -25,6 +27,7 @@ from app.schemas import (
     CaseStudyManageListResponse,
     CaseStudyUpdateRequest,
 )
+from shared_utils.server import metric_path, metrics_payload
 
 SERVICE_NAME = os.getenv("SERVICE_NAME", "content-service")
 SERVICE_VERSION = os.getenv("SERVICE_VERSION", "0.1.0")
@@ -34,7 +37,7 @@ CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*")
 REDIS_URL = os.getenv("REDIS_URL", "")
 CACHE_TTL_SECONDS = int(os.getenv("CONTENT_CACHE_TTL_SECONDS", "600"))
 
-logging.basicConfig(level=LOG_LEVEL, format="%(message)s")
+setup_logging(LOG_LEVEL)
 logger = logging.getLogger(SERVICE_NAME)
 
 app = FastAPI(title=SERVICE_NAME, version=SERVICE_VERSION)
@@ -99,18 +102,23 @@ def _get_correlation_id(request: Request) -> str:
 
 
 def _log_event(request: Request, status_code: int, duration: float) -> None:
-    event = {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "service": SERVICE_NAME,
-        "environment": ENVIRONMENT,
-        "method": request.method,
-        "path": request.url.path,
-        "status_code": status_code,
-        "duration_ms": round(duration * 1000, 2),
-        "correlation_id": getattr(request.state, "correlation_id", ""),
-        "client_ip": request.client.host if request.client else "",
-    }
-    logger.info(json.dumps(event))
+    duration_ms = round(duration * 1000, 2)
+    sample_rate = sample_access(status_code, duration_ms)
+    if sample_rate is None:
+        return
+    logger.info(
+        {
+            "service": SERVICE_NAME,
+            "environment": ENVIRONMENT,
+            "method": request.method,
+            "path": request.url.path,
+            "status_code": status_code,
+            "duration_ms": duration_ms,
+            "correlation_id": getattr(request.state, "correlation_id", ""),
+            "client_ip": request.client.host if request.client else "",
+            "sample_rate": sample_rate,
+        }
+    )
 
 
 @app.middleware("http")
@@ -118,22 +126,29 @@ async def metrics_and_logging(request: Request, call_next):
     start = time.time()
     correlation_id = _get_correlation_id(request)
     request.state.correlation_id = correlation_id
+    deadline_token = bind_deadline(request.headers.get(DEADLINE_HEADER))
     response = None
     try:
+        if deadline_expired():
+            # The caller (e.g. the gateway) has already given up; don't start the work.
+            response = JSONResponse(status_code=504, content={"detail": "Request deadline exceeded"})
+            return response
         response = await call_next(request)
         response.headers["X-Correlation-ID"] = correlation_id
         return response
     finally:
+        reset_deadline(deadline_token)
         duration = time.time() - start
         status_code = response.status_code if response else 500
+        path_label = metric_path(request)
         REQUEST_COUNT.labels(
             service=SERVICE_NAME,
             method=request.method,
-            path=request.url.path,
+            path=path_label,
             status_code=str(status_code),
         ).inc()
         REQUEST_LATENCY.labels(
-            service=SERVICE_NAME, method=request.method, path=request.url.path
+            service=SERVICE_NAME, method=request.method, path=path_label
         ).observe(duration)
         _log_event(request, status_code, duration)
 
@@ -170,7 +185,7 @@ async def live() -> dict:
 
 @app.get("/metrics")
 async def metrics() -> Response:
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    return Response(metrics_payload(), media_type=CONTENT_TYPE_LATEST)
 
 
 @app.get("/api/v1/content/case-studies", response_model=CaseStudyListResponse)
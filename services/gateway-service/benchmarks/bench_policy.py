@@ -0,0 +1,70 @@
+"""
+Per-request cost of the gateway route-policy matcher.
+
+Run from services/gateway-service:
+
+    PYTHONPATH=src python benchmarks/bench_policy.py [--iterations N]
+
+Reports ns/lookup for the real policy table, and for the same table padded with
+synthetic services to show lookup cost does not grow with the number of rules.
+"""
+
+import argparse
+import json
+import timeit
+
+from app.policy import ROUTE_POLICIES, RoutePolicy, compile_policies
+
+ID = "3f1c2d9e-0000-4000-8000-000000000001"
+
+SAMPLE_REQUESTS = [
+    ("GET", "/api/v1/subscribers/me"),
+    ("GET", f"/api/v1/leads/{ID}"),
+    ("PATCH", f"/api/v1/leads/{ID}/assign"),
+    ("POST", f"/api/v1/subscriptions/{ID}/plan-change/apply"),
+    ("GET", "/api/v1/billing/me/invoices"),
+    ("GET", f"/api/v1/tickets/{ID}"),
+    ("POST", f"/api/v1/assignments/{ID}/accept"),
+    ("GET", f"/api/v1/media/{ID}/download"),
+    ("GET", "/api/v1/notifications/unknown"),
+]
+
+
+def _padded_policies(extra_services: int) -> list[RoutePolicy]:
+    policies = list(ROUTE_POLICIES)
+    for n in range(extra_services):
+        policies.append(RoutePolicy(f"/api/v1/svc{n}/**", frozenset({"admin"})))
+        policies.append(RoutePolicy(f"/api/v1/svc{n}/internal/**", internal=True))
+        policies.append(RoutePolicy(f"/api/v1/svc{n}/{{item_id}}/approve", frozenset({"admin"})))
+    return policies
+
+
+def _ns_per_lookup(policies, iterations: int) -> float:
+    matcher = compile_policies(policies)
+    match = matcher.match
+
+    def run() -> None:
+        for method, path in SAMPLE_REQUESTS:
+            match(method, path)
+
+    best = min(timeit.repeat(run, number=iterations, repeat=5))
+    return best / (iterations * len(SAMPLE_REQUESTS)) * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    for extra in (0, 100, 1000):
+        policies = _padded_policies(extra)
+        result = {
+            "benchmark": "policy_match",
+            "rules": len(policies),
+            "ns_per_lookup": round(_ns_per_lookup(policies, args.iterations), 1),
+        }
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+from prometheus_client import Counter, Histogram
+
+HOME_PATH = "/api/v1/home"
+HOME_CACHE_TTL_SECONDS = int(os.getenv("HOME_CACHE_TTL_SECONDS", "15"))
+HOME_CACHE_MAX_ENTRIES = int(os.getenv("HOME_CACHE_MAX_ENTRIES", "10000"))
+HOME_CACHE_MAX_BYTES = int(os.getenv("HOME_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Per-leg budget; one slow leg must not hold the whole screen for the full route timeout.
+HOME_LEG_TIMEOUT_SECONDS = float(os.getenv("HOME_LEG_TIMEOUT_SECONDS", "3"))
+
+AGGREGATE_LEG_LATENCY = Histogram(
+    "gateway_aggregate_leg_duration_seconds",
+    "Latency of each upstream leg of an aggregate view, by outcome (ok, empty, error)",
+    ["view", "leg", "outcome"],
+)
+AGGREGATE_REQUESTS = Counter(
+    "gateway_aggregate_requests_total",
+    "Aggregate view requests by result (hit, complete, partial, failed)",
+    ["view", "result"],
+)
+
+LEG_OK = "ok"
+LEG_EMPTY = "empty"  # 404: nothing to show yet (e.g. no subscription), not a failure
+LEG_ERROR = "error"
+
+
+@dataclass(frozen=True)
+class AggregateLeg:
+    name: str
+    service: str
+    path: str
+    params: Tuple[Tuple[str, str], ...] = ()
+    required: bool = False  # The view is useless without it: fail the whole request
+
+
+# Ticket statuses that still need work (ticket-service accepts a comma-separated `status`).
+OPEN_TICKET_STATUSES = "created,assigned,in_progress"
+
+SUBSCRIBER_HOME_LEGS: Tuple[AggregateLeg, ...] = (
+    AggregateLeg("profile", "subscribers", "/api/v1/subscribers/me", required=True),
+    AggregateLeg("subscription", "subscriptions", "/api/v1/subscriptions/me"),
+    AggregateLeg("invoices", "billing", "/api/v1/billing/me/invoices", (("limit", "5"),)),
+    AggregateLeg("credits", "billing", "/api/v1/billing/credits/me", (("limit", "5"),)),
+    AggregateLeg(
+        "tickets",
+        "tickets",
+        "/api/v1/tickets/me",
+        (("status", OPEN_TICKET_STATUSES), ("limit", "10")),
+    ),
+)
+# Writes through the gateway to these services can change the view; they evict the user's copy.
+SUBSCRIBER_HOME_SERVICES = frozenset(leg.service for leg in SUBSCRIBER_HOME_LEGS)
+
+
+def leg_outcome(status_code: int | None) -> str:
+    if status_code is not None and 200 <= status_code < 300:
+        return LEG_OK
+    if status_code == 404:
+        return LEG_EMPTY
+    return LEG_ERROR
+
+
+def leg_result(
+    outcome: str, data: Any = None, status_code: int | None = None, error: str | None = None
+) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"status": outcome, "data": data}
+    if outcome == LEG_ERROR:
+        result["error"] = {"status_code": status_code, "detail": error or "Upstream error"}
+    return result
+
+
+def assemble(
+    view: str, results: Dict[str, Dict[str, Any]], legs: Tuple[AggregateLeg, ...]
+) -> Tuple[Dict[str, Any], str]:
+    """Build the view body; returns (body, result) where result is complete, partial or failed."""
+    failed = [leg.name for leg in legs if results[leg.name]["status"] == LEG_ERROR]
+    if any(leg.required and leg.name in failed for leg in legs):
+        outcome = "failed"
+    else:
+        outcome = "partial" if failed else "complete"
+    AGGREGATE_REQUESTS.labels(view=view, result=outcome).inc()
+    return {
+        **{leg.name: results[leg.name] for leg in legs},
+        "partial": bool(failed),
+        "failed_legs": failed,
+    }, outcome
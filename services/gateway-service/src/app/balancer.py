@@ -0,0 +1,311 @@
+import asyncio
+import os
+import random
+import socket
+import time
+from typing import Awaitable, Callable, List, Sequence
+
+import httpx
+from prometheus_client import Counter, Gauge, Histogram
+
+UPSTREAM_LB_POLICY = os.getenv("UPSTREAM_LB_POLICY", "p2c").lower()
+UPSTREAM_DNS_REFRESH_SECONDS = float(os.getenv("UPSTREAM_DNS_REFRESH_SECONDS", "10"))
+# 0 disables passive ejection.
+UPSTREAM_EJECT_CONSECUTIVE_FAILURES = int(os.getenv("UPSTREAM_EJECT_CONSECUTIVE_FAILURES", "5"))
+UPSTREAM_EJECT_SECONDS = float(os.getenv("UPSTREAM_EJECT_SECONDS", "30"))
+UPSTREAM_MAX_EJECTED_PERCENT = int(os.getenv("UPSTREAM_MAX_EJECTED_PERCENT", "50"))
+
+POLICY_P2C = "p2c"
+POLICY_LEAST_OUTSTANDING = "least_outstanding"
+# `dns+http://lead-service-headless:8000`: every A/AAAA record of the name is an endpoint.
+DNS_PREFIX = "dns+"
+# Same statuses the circuit breaker counts as failures.
+EJECT_STATUSES = (500, 502, 503, 504)
+LATENCY_EWMA_ALPHA = 0.3
+
+OUTCOME_OK = "ok"
+OUTCOME_FAILURE = "failure"
+OUTCOME_ERROR = "error"
+
+ENDPOINT_REQUESTS = Counter(
+    "gateway_upstream_endpoint_requests_total",
+    "Upstream requests per endpoint by outcome (ok, failure = 5xx, error = transport error)",
+    ["upstream", "endpoint", "outcome"],
+)
+ENDPOINT_DURATION = Histogram(
+    "gateway_upstream_endpoint_duration_seconds",
+    "Time to response headers per upstream endpoint",
+    ["upstream", "endpoint"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+ENDPOINT_OUTSTANDING = Gauge(
+    "gateway_upstream_endpoint_outstanding",
+    "Requests in flight per upstream endpoint",
+    ["upstream", "endpoint"],
+    multiprocess_mode="livesum",
+)
+ENDPOINT_EJECTED = Gauge(
+    "gateway_upstream_endpoint_ejected",
+    "1 while an upstream endpoint is passively ejected",
+    ["upstream", "endpoint"],
+    multiprocess_mode="livemax",
+)
+ENDPOINT_EJECTIONS = Counter(
+    "gateway_upstream_endpoint_ejections_total",
+    "Passive ejections per upstream endpoint",
+    ["upstream", "endpoint"],
+)
+
+_ENDPOINT_METRICS = (ENDPOINT_DURATION, ENDPOINT_OUTSTANDING, ENDPOINT_EJECTED, ENDPOINT_EJECTIONS)
+
+Resolve = Callable[[str, int], Awaitable[List[str]]]
+
+
+def is_balanced(spec: str) -> bool:
+    """True when a service URL names more than one endpoint or a DNS name to re-resolve."""
+    return "," in spec or spec.strip().startswith(DNS_PREFIX)
+
+
+def _port(url: httpx.URL) -> int:
+    return url.port or (443 if url.scheme == "https" else 80)
+
+
+async def resolve_addresses(host: str, port: int) -> List[str]:
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return sorted({info[4][0] for info in infos})
+
+
+class Endpoint:
+    def __init__(self, url: httpx.URL, host_header: str, sni_hostname: str | None = None) -> None:
+        self.url = url
+        self.key = f"{url.host}:{_port(url)}"
+        self.host_header = host_header
+        self.sni_hostname = sni_hostname
+        self.outstanding = 0
+        self.latency_ewma = 0.0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        # Cleared once DNS drops the endpoint, so late completions do not recreate its series.
+        self.active = True
+
+    def load(self) -> tuple:
+        return (self.outstanding, self.latency_ewma)
+
+
+class Balancer:
+    """
+    Per-request load balancing over one upstream's endpoints.
+
+    Endpoints are a static comma-separated list, or the addresses of one `dns+` name
+    re-resolved every `dns_refresh_seconds` (the last good set is kept if resolution fails).
+    `p2c` compares two random endpoints, `least_outstanding` scans them all. Either way the
+    one with fewer requests in flight wins, and the latency EWMA breaks ties. After
+    `eject_after` consecutive failures an endpoint sits out for `eject_seconds`. No more than
+    `max_ejected_percent` of endpoints are ejected at once, and if every endpoint is out
+    the balancer uses all of them.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        spec: str,
+        *,
+        policy: str = UPSTREAM_LB_POLICY,
+        dns_refresh_seconds: float = UPSTREAM_DNS_REFRESH_SECONDS,
+        eject_after: int = UPSTREAM_EJECT_CONSECUTIVE_FAILURES,
+        eject_seconds: float = UPSTREAM_EJECT_SECONDS,
+        max_ejected_percent: int = UPSTREAM_MAX_EJECTED_PERCENT,
+        resolve: Resolve = resolve_addresses,
+    ) -> None:
+        if policy not in (POLICY_P2C, POLICY_LEAST_OUTSTANDING):
+            raise ValueError(f"Unknown load balancing policy: {policy}")
+        self.service = service
+        self.policy = policy
+        self.dns_refresh_seconds = dns_refresh_seconds
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.max_ejected_percent = max_ejected_percent
+        self._resolve = resolve
+        self._refresh_due = 0.0
+        self._refreshing: asyncio.Future | None = None
+        self.endpoints: List[Endpoint] = []
+
+        items = [item.strip() for item in spec.split(",") if item.strip()]
+        if not items:
+            raise ValueError(f"No endpoints configured for {service}")
+        dns = [item for item in items if item.startswith(DNS_PREFIX)]
+        if dns and len(items) > 1:
+            raise ValueError(f"{service}: a dns+ URL cannot be combined with other endpoints")
+        self.dns_url = httpx.URL(dns[0][len(DNS_PREFIX) :]) if dns else None
+        if self.dns_url is None:
+            urls = [httpx.URL(item) for item in items]
+            self.base_url = str(urls[0])
+            self._set([Endpoint(url, url.netloc.decode("ascii")) for url in urls])
+        else:
+            self.base_url = str(self.dns_url)
+
+    def _set(self, endpoints: Sequence[Endpoint]) -> None:
+        current = {endpoint.key: endpoint for endpoint in self.endpoints}
+        merged = [current.pop(endpoint.key, endpoint) for endpoint in endpoints]
+        for gone in current.values():
+            gone.active = False
+            for metric in _ENDPOINT_METRICS:
+                try:
+                    metric.remove(self.service, gone.key)
+                except KeyError:
+                    pass
+            for outcome in (OUTCOME_OK, OUTCOME_FAILURE, OUTCOME_ERROR):
+                try:
+                    ENDPOINT_REQUESTS.remove(self.service, gone.key, outcome)
+                except KeyError:
+                    pass
+        self.endpoints = merged
+
+    async def refresh(self) -> None:
+        url = self.dns_url
+        if url is None:
+            return
+        try:
+            addresses = await self._resolve(url.host, _port(url))
+        except OSError:
+            addresses = []
+        finally:
+            self._refresh_due = time.monotonic() + self.dns_refresh_seconds
+            self._refreshing = None
+        if addresses:
+            host_header = url.netloc.decode("ascii")
+            sni = url.host if url.scheme == "https" else None
+            self._set([Endpoint(url.copy_with(host=a), host_header, sni) for a in addresses])
+
+    async def ensure_endpoints(self) -> None:
+        if self.dns_url is None:
+            return
+        stale = time.monotonic() >= self._refresh_due
+        if self._refreshing is None and (stale or not self.endpoints):
+            self._refreshing = asyncio.ensure_future(self.refresh())
+        if not self.endpoints and self._refreshing is not None:
+            # Nothing to route to yet: wait for the first resolution.
+            await asyncio.shield(self._refreshing)
+
+    def pick(self) -> Endpoint:
+        endpoints = self.endpoints
+        if len(endpoints) == 1:
+            return endpoints[0]
+        now = time.monotonic()
+        candidates = [e for e in endpoints if e.ejected_until <= now] or endpoints
+        if len(candidates) == 1:
+            return candidates[0]
+        if self.policy == POLICY_P2C:
+            first, second = random.sample(candidates, 2)
+            return first if first.load() <= second.load() else second
+        # Start the scan at a random offset so ties do not all land on the first endpoint.
+        offset = random.randrange(len(candidates))
+        return min(candidates[offset:] + candidates[:offset], key=Endpoint.load)
+
+    def record(self, endpoint: Endpoint, outcome: str, duration: float | None) -> None:
+        if endpoint.active:
+            labels = {"upstream": self.service, "endpoint": endpoint.key}
+            ENDPOINT_REQUESTS.labels(outcome=outcome, **labels).inc()
+            if duration is not None:
+                ENDPOINT_DURATION.labels(**labels).observe(duration)
+        if duration is not None:
+            if endpoint.latency_ewma == 0.0:
+                endpoint.latency_ewma = duration
+            else:
+                endpoint.latency_ewma += LATENCY_EWMA_ALPHA * (duration - endpoint.latency_ewma)
+        if outcome == OUTCOME_OK:
+            endpoint.consecutive_failures = 0
+            return
+        endpoint.consecutive_failures += 1
+        if self.eject_after and endpoint.consecutive_failures >= self.eject_after:
+            self._eject(endpoint)
+
+    def _eject(self, endpoint: Endpoint) -> None:
+        now = time.monotonic()
+        if endpoint.ejected_until > now:
+            return
+        ejected = sum(1 for e in self.endpoints if e.ejected_until > now)
+        if (ejected + 1) * 100 > self.max_ejected_percent * len(self.endpoints):
+            return
+        endpoint.ejected_until = now + self.eject_seconds
+        endpoint.consecutive_failures = 0
+        if endpoint.active:
+            ENDPOINT_EJECTIONS.labels(upstream=self.service, endpoint=endpoint.key).inc()
+
+    def update_metrics(self) -> None:
+        now = time.monotonic()
+        for endpoint in self.endpoints:
+            labels = {"upstream": self.service, "endpoint": endpoint.key}
+            ENDPOINT_OUTSTANDING.labels(**labels).set(endpoint.outstanding)
+            ENDPOINT_EJECTED.labels(**labels).set(1 if endpoint.ejected_until > now else 0)
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Keeps the endpoint counted as busy until the response body is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release: Callable[[], None] | None = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class BalancedTransport(httpx.AsyncBaseTransport):
+    """Rewrites each request to the endpoint the balancer picks, over one shared pool."""
+
+    def __init__(self, balancer: Balancer, inner: httpx.AsyncBaseTransport) -> None:
+        self.balancer = balancer
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        balancer = self.balancer
+        await balancer.ensure_endpoints()
+        if not balancer.endpoints:
+            raise httpx.ConnectError(
+                f"No endpoints resolved for {balancer.service}", request=request
+            )
+        endpoint = balancer.pick()
+        target = endpoint.url
+        request.url = request.url.copy_with(
+            scheme=target.scheme, host=target.host, port=target.port
+        )
+        request.headers["host"] = endpoint.host_header
+        if endpoint.sni_hostname:
+            request.extensions = {**request.extensions, "sni_hostname": endpoint.sni_hostname}
+
+        def release() -> None:
+            endpoint.outstanding -= 1
+
+        endpoint.outstanding += 1
+        start = time.monotonic()
+        try:
+            response = await self.inner.handle_async_request(request)
+        except httpx.TransportError:
+            release()
+            balancer.record(endpoint, OUTCOME_ERROR, None)
+            raise
+        except BaseException:
+            release()
+            raise
+        failed = response.status_code in EJECT_STATUSES
+        outcome = OUTCOME_FAILURE if failed else OUTCOME_OK
+        balancer.record(endpoint, outcome, time.monotonic() - start)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
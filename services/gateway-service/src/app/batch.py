@@ -0,0 +1,186 @@
+import base64
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+from prometheus_client import Counter, Histogram
+
+BATCH_PATH = "/api/v1/batch"
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "10"))
+BATCH_MAX_BODY_BYTES = int(os.getenv("BATCH_MAX_BODY_BYTES", str(1024 * 1024)))
+# Each sub-response is held in memory and re-encoded into the envelope; larger ones get a 413
+# item and should be fetched directly (where they stream).
+BATCH_ITEM_MAX_BYTES = int(os.getenv("BATCH_ITEM_MAX_BYTES", str(256 * 1024)))
+# Encoded dots, slashes and backslashes could reach a different path once the URL is normalised.
+_ENCODED_SEPARATORS = ("%2e", "%2f", "%5c")
+
+# Outer-request headers every sub-request inherits (identity, locale, client hints).
+INHERITED_HEADERS = (
+    "authorization",
+    "cookie",
+    "accept-language",
+    "user-agent",
+    "x-forwarded-for",
+    "x-real-ip",
+)
+# Upstream response headers worth relaying per item; the rest describe the outer transfer.
+RELAYED_HEADERS = ("content-type", "etag", "cache-control", "location", "retry-after", "x-cache")
+# Media types relayed as text; any other body is relayed base64-encoded.
+_TEXT_SUFFIXES = ("json", "xml", "javascript", "x-www-form-urlencoded")
+
+BATCH_SIZE = Histogram(
+    "gateway_batch_size",
+    "Sub-requests per batch",
+    buckets=(1, 2, 3, 5, 8, 10, 15, 20, 50),
+)
+BATCH_ITEMS = Counter(
+    "gateway_batch_items_total",
+    "Batch sub-requests by status class (2xx, 3xx, 4xx, 5xx)",
+    ["status_class"],
+)
+
+
+class BatchError(ValueError):
+    """The batch envelope itself is unusable (not a per-item problem)."""
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    id: str
+    method: str
+    path: str
+    body: Any = None
+    has_body: bool = False
+    error: str | None = None  # Set when this item is rejected without being dispatched
+
+
+def parse_batch(raw: bytes, allowed_methods: Tuple[str, ...]) -> List[BatchItem]:
+    """
+    Parse `{"requests": [{"id", "method", "path", "body"}, ...]}`.
+
+    Envelope problems raise BatchError; a malformed item is returned with `error` set so the
+    rest of the batch still runs. The caller bounds `raw` to BATCH_MAX_BODY_BYTES while reading.
+    """
+    try:
+        payload = json.loads(raw.decode("utf-8") or "{}")
+    except (UnicodeDecodeError, ValueError):
+        raise BatchError("Batch body must be JSON")
+    requests = payload.get("requests") if isinstance(payload, dict) else None
+    if not isinstance(requests, list) or not requests:
+        raise BatchError("'requests' must be a non-empty list")
+    if len(requests) > BATCH_MAX_REQUESTS:
+        raise BatchError(f"At most {BATCH_MAX_REQUESTS} requests per batch")
+    return [_parse_item(index, entry, allowed_methods) for index, entry in enumerate(requests)]
+
+
+def _parse_item(index: int, entry: Any, allowed_methods: Tuple[str, ...]) -> BatchItem:
+    if not isinstance(entry, dict):
+        return BatchItem(str(index), "", "", error="Sub-request must be an object")
+    item_id = str(entry.get("id", index))
+    method = str(entry.get("method") or "GET").upper()
+    path = entry.get("path")
+    if method not in allowed_methods:
+        return BatchItem(item_id, method, "", error=f"Method {method} not allowed")
+    if not isinstance(path, str) or not path.startswith("/api/v1/"):
+        return BatchItem(item_id, method, "", error="'path' must start with /api/v1/")
+    if not _is_canonical(path):
+        return BatchItem(item_id, method, "", error="'path' must not contain dot segments or //")
+    if path.split("?", 1)[0].rstrip("/") == BATCH_PATH:
+        return BatchItem(item_id, method, path, error="Batches cannot be nested")
+    if "body" in entry and entry["body"] is not None:
+        return BatchItem(item_id, method, path, body=entry["body"], has_body=True)
+    return BatchItem(item_id, method, path)
+
+
+def _is_canonical(path: str) -> bool:
+    """
+    True when `path` is already normalised. Dot segments, empty segments, fragments and encoded
+    separators are rejected: the sub-request URL is normalised before dispatch, so
+    `/api/v1/../metrics` would otherwise escape the /api/v1/ prefix.
+    """
+    route = path.split("?", 1)[0]
+    if "#" in path or "\\" in route or "//" in route:
+        return False
+    lowered = route.lower()
+    if any(encoded in lowered for encoded in _ENCODED_SEPARATORS):
+        return False
+    if any(segment in (".", "..") for segment in route.split("/")):
+        return False
+    # Belt and braces: the URL httpx will actually request must keep the prefix.
+    return httpx.URL("http://gateway" + path).path.startswith("/api/v1/")
+
+
+class ItemTooLarge(Exception):
+    """A sub-response body passed BATCH_ITEM_MAX_BYTES; raised from the ASGI `send`."""
+
+
+class CappedApp:
+    """
+    ASGI wrapper that aborts a sub-response once its body passes `max_bytes`, so a batched
+    download stops reading from upstream instead of being buffered whole.
+    """
+
+    def __init__(self, app: Callable[..., Awaitable[None]], max_bytes: int) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send) -> None:
+        sent = 0
+
+        async def capped_send(message) -> None:
+            nonlocal sent
+            if message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+                if sent > self.max_bytes:
+                    raise ItemTooLarge()
+            await send(message)
+
+        await self.app(scope, receive, capped_send)
+
+
+def _is_text(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or media_type.endswith(_TEXT_SUFFIXES)
+
+
+def item_result(
+    item_id: str, status_code: int, headers: Dict[str, str], content: bytes
+) -> Dict[str, Any]:
+    BATCH_ITEMS.labels(status_class=f"{status_code // 100}xx").inc()
+    relayed = {k: headers[k] for k in RELAYED_HEADERS if k in headers}
+    result: Dict[str, Any] = {"id": item_id, "status": status_code, "headers": relayed}
+    content_type = relayed.get("content-type", "")
+    text = None
+    if content and _is_text(content_type):
+        try:
+            text = content.decode("utf-8")
+        except UnicodeDecodeError:
+            text = None
+    if not content:
+        body: Any = None
+    elif text is None:
+        # Binary (or mislabelled) bodies survive the JSON envelope only as base64.
+        body = base64.b64encode(content).decode("ascii")
+        result["encoding"] = "base64"
+    elif "json" in content_type:
+        try:
+            body = json.loads(text)
+        except ValueError:
+            body = text
+    else:
+        body = text
+    result["body"] = body
+    return result
+
+
+def item_error(item_id: str, status_code: int, detail: str) -> Dict[str, Any]:
+    BATCH_ITEMS.labels(status_class=f"{status_code // 100}xx").inc()
+    return {
+        "id": item_id,
+        "status": status_code,
+        "headers": {"content-type": "application/json"},
+        "body": {"detail": detail},
+    }
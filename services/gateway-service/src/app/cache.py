@@ -0,0 +1,143 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, List, Tuple, TypeVar
+
+from prometheus_client import Counter, Gauge, Histogram
+
+T = TypeVar("T")
+
+CACHE_HITS = Counter("gateway_cache_hits_total", "Cache hits", ["cache"])
+CACHE_MISSES = Counter("gateway_cache_misses_total", "Cache misses", ["cache"])
+CACHE_EVICTIONS = Counter(
+    "gateway_cache_evictions_total", "Cache evictions by reason", ["cache", "reason"]
+)
+CACHE_ENTRIES = Gauge(
+    "gateway_cache_entries", "Entries currently cached", ["cache"], multiprocess_mode="livesum"
+)
+CACHE_BYTES = Gauge(
+    "gateway_cache_bytes",
+    "Approximate bytes currently cached",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+SINGLEFLIGHT_CALLS = Counter(
+    "gateway_singleflight_calls_total",
+    "Single-flight calls by role (leader = did the work, follower = shared the result)",
+    ["flight", "role"],
+)
+SINGLEFLIGHT_FANOUT = Histogram(
+    "gateway_singleflight_fanout",
+    "Callers served by each executed call (1 = nothing was collapsed)",
+    ["flight"],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000),
+)
+
+
+class TTLCache(Generic[T]):
+    """LRU cache bounded by entry count and approximate byte size, with per-entry expiry."""
+
+    def __init__(self, name: str, *, max_entries: int, max_bytes: int) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[T, float, int]]" = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self) -> List[Hashable]:
+        return list(self._entries)
+
+    def get(self, key: Hashable) -> T | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            CACHE_MISSES.labels(cache=self.name).inc()
+            return None
+        value, expires_at, _ = entry
+        if expires_at <= time.time():
+            self._remove(key, "expired")
+            CACHE_MISSES.labels(cache=self.name).inc()
+            return None
+        self._entries.move_to_end(key)
+        CACHE_HITS.labels(cache=self.name).inc()
+        return value
+
+    def set(self, key: Hashable, value: T, *, expires_at: float, size: int) -> None:
+        if expires_at <= time.time() or size > self.max_bytes or self.max_entries <= 0:
+            return
+        if key in self._entries:
+            self._remove(key, None)
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest, "capacity")
+        self._update_gauges()
+
+    def delete(self, key: Hashable) -> None:
+        if key in self._entries:
+            self._remove(key, "purged")
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+        self._update_gauges()
+
+    def _remove(self, key: Hashable, reason: str | None) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+        if reason:
+            CACHE_EVICTIONS.labels(cache=self.name, reason=reason).inc()
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        CACHE_ENTRIES.labels(cache=self.name).set(len(self._entries))
+        CACHE_BYTES.labels(cache=self.name).set(self._bytes)
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one in-flight awaitable."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is not None:
+            SINGLEFLIGHT_CALLS.labels(flight=self.name, role="follower").inc()
+            self._waiters[key] += 1
+        else:
+            SINGLEFLIGHT_CALLS.labels(flight=self.name, role="leader").inc()
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._waiters[key] = 1
+            task.add_done_callback(lambda t: self._finish(key, t))
+        # The call runs in its own task and every caller (leader included) awaits it through a
+        # shield, so one cancelled caller (e.g. a disconnected client) cannot cancel it for the rest.
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            SINGLEFLIGHT_FANOUT.labels(flight=self.name).observe(self._waiters.pop(key, 1))
+        # Mark exceptions as retrieved when nobody else was waiting on them.
+        if not task.cancelled():
+            task.exception()
+
+
+def approx_size(value: Any) -> int:
+    """Rough byte footprint of JSON-like values, good enough for a memory cap."""
+    if isinstance(value, (bytes, str)):
+        return len(value) + 49
+    if isinstance(value, dict):
+        return 64 + sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 56 + sum(approx_size(v) for v in value)
+    return 28
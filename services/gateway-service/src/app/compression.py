@@ -0,0 +1,209 @@
+import os
+import time
+import zlib
+from typing import List
+
+from prometheus_client import Counter
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # Optional: without it the gateway negotiates gzip only.
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+# Brotli 4-5 is roughly gzip-6 CPU for a noticeably smaller payload; 11 is for static assets.
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_CONTENT_TYPES = tuple(
+    t.strip()
+    for t in os.getenv(
+        "COMPRESSION_CONTENT_TYPES",
+        "application/json,application/problem+json,application/yaml,application/x-yaml,"
+        "text/yaml,text/plain,text/html,text/csv,application/xml,text/xml",
+    ).split(",")
+    if t.strip()
+)
+
+COMPRESSION_CPU_SECONDS = Counter(
+    "gateway_compression_cpu_seconds_total",
+    "CPU time spent compressing response bodies",
+    ["encoding"],
+)
+COMPRESSION_BYTES = Counter(
+    "gateway_compression_bytes_total",
+    "Response bytes before (in) and after (out) compression",
+    ["encoding", "stage"],
+)
+COMPRESSION_SKIPPED = Counter(
+    "gateway_compression_skipped_total",
+    "Responses sent uncompressed to clients that accept compression, by reason",
+    ["reason"],
+)
+
+GZIP = "gzip"
+BROTLI = "br"
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """Pick br or gzip from an Accept-Encoding header (q-values honoured); None for identity."""
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            weights[coding.strip()] = q
+    wildcard = weights.get("*", 0.0)
+    candidates = ([BROTLI] if brotli is not None else []) + [GZIP]
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type in COMPRESSION_CONTENT_TYPES
+
+
+class _Compressor:
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == BROTLI:
+            self._impl = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._impl = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        started = time.thread_time()
+        if self.encoding == BROTLI:
+            out = self._impl.process(data)
+            if final:
+                out += self._impl.finish()
+        else:
+            out = self._impl.compress(data)
+            if final:
+                out += self._impl.flush()
+        COMPRESSION_CPU_SECONDS.labels(encoding=self.encoding).inc(time.thread_time() - started)
+        COMPRESSION_BYTES.labels(encoding=self.encoding, stage="in").inc(len(data))
+        COMPRESSION_BYTES.labels(encoding=self.encoding, stage="out").inc(len(out))
+        return out
+
+
+class CompressionMiddleware:
+    """
+    Negotiated gzip/brotli for allowlisted content types at or above `minimum_size`.
+
+    Bodies already carrying a Content-Encoding (compressed upstream) pass through untouched.
+    Streamed bodies are compressed incrementally; nothing is buffered beyond `minimum_size`.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_BYTES) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not COMPRESSION_ENABLED or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, send: Send, encoding: str, minimum_size: int) -> None:
+        self._send = send
+        self._encoding = encoding
+        self._minimum_size = minimum_size
+        self._start: Message | None = None
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self._mode: str | None = None  # "identity" or "compress" once decided
+        self._compressor: _Compressor | None = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            reason = self._skip_reason(Headers(raw=message["headers"]), message["status"])
+            if reason:
+                COMPRESSION_SKIPPED.labels(reason=reason).inc()
+                self._mode = "identity"
+                await self._send(message)
+            return
+        if message["type"] != "http.response.body" or self._mode == "identity":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._mode == "compress":
+            await self._send_compressed(body, more_body)
+            return
+
+        self._buffer.append(body)
+        self._buffered += len(body)
+        if self._buffered < self._minimum_size:
+            if more_body:
+                return
+            # Whole body is below the threshold: compression would not pay for itself.
+            COMPRESSION_SKIPPED.labels(reason="too_small").inc()
+            self._mode = "identity"
+            await self._send(self._start)
+            await self._send({"type": "http.response.body", "body": b"".join(self._buffer)})
+            return
+
+        self._mode = "compress"
+        self._compressor = _Compressor(self._encoding)
+        self._start = {**self._start, "headers": list(self._start["headers"])}
+        headers = MutableHeaders(raw=self._start["headers"])
+        headers["content-encoding"] = self._encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            # The bytes differ from the identity representation, so the validator is weak now.
+            headers["etag"] = "W/" + etag
+        del headers["content-length"]
+        buffered = b"".join(self._buffer)
+        self._buffer = []
+        if not more_body:
+            payload = self._compressor.compress(buffered, final=True)
+            headers["content-length"] = str(len(payload))
+            await self._send(self._start)
+            await self._send({"type": "http.response.body", "body": payload})
+            return
+        await self._send(self._start)
+        await self._send_compressed(buffered, more_body)
+
+    async def _send_compressed(self, body: bytes, more_body: bool) -> None:
+        payload = self._compressor.compress(body, final=not more_body)
+        if payload or not more_body:
+            await self._send(
+                {"type": "http.response.body", "body": payload, "more_body": more_body}
+            )
+
+    @staticmethod
+    def _skip_reason(headers: Headers, status: int) -> str | None:
+        if "content-encoding" in headers:
+            return "already_encoded"
+        if status < 200 or status in (204, 206, 304):
+            return "status"
+        if not is_compressible(headers.get("content-type", "")):
+            return "content_type"
+        if "no-transform" in headers.get("cache-control", "").lower():
+            return "no_transform"
+        return None
@@ -0,0 +1,212 @@
+import asyncio
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from prometheus_client import Counter
+
+from app.cache import TTLCache
+
+EDGE_CACHE_ENABLED = os.getenv("EDGE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+EDGE_CACHE_MAX_ENTRIES = int(os.getenv("EDGE_CACHE_MAX_ENTRIES", "2000"))
+EDGE_CACHE_MAX_BYTES = int(os.getenv("EDGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+EDGE_CACHE_MAX_OBJECT_BYTES = int(os.getenv("EDGE_CACHE_MAX_OBJECT_BYTES", str(1024 * 1024)))
+# Collapse identical concurrent public GETs into one upstream call (works with the cache off too).
+COALESCE_PUBLIC_GETS = os.getenv("COALESCE_PUBLIC_GETS", "true").lower() in ("1", "true", "yes")
+
+EDGE_CACHE_REQUESTS = Counter(
+    "gateway_edge_cache_requests_total",
+    "Edge cache lookups by rule and result (hit, stale, miss, not_modified, bypass)",
+    ["rule", "result"],
+)
+EDGE_CACHE_PURGES = Counter(
+    "gateway_edge_cache_purged_entries_total",
+    "Edge cache entries purged by reason",
+    ["reason"],
+)
+EDGE_CACHE_REVALIDATIONS = Counter(
+    "gateway_edge_cache_revalidations_total",
+    "Background stale-while-revalidate refreshes by result",
+    ["rule", "result"],
+)
+
+# Never stored: hop-by-hop, per-response or re-derived on every serve.
+_UNSTORED_HEADERS = {
+    "connection",
+    "content-length",
+    "transfer-encoding",
+    "content-encoding",
+    "set-cookie",
+    "date",
+    "etag",
+    "cache-control",
+    "age",
+    "x-correlation-id",
+}
+
+
+@dataclass(frozen=True)
+class EdgeCacheRule:
+    name: str
+    prefix: str
+    ttl_seconds: int
+    stale_seconds: int
+
+    def matches(self, path: str) -> bool:
+        path = path.rstrip("/")
+        return path == self.prefix or path.startswith(self.prefix + "/")
+
+
+def parse_ttl(spec: str) -> Tuple[int, int]:
+    """Parse '<fresh seconds>/<stale-while-revalidate seconds>', e.g. '60/300'."""
+    ttl, _, stale = spec.partition("/")
+    return int(ttl), int(stale or 0)
+
+
+def _rule(name: str, prefix: str, env: str, default: str) -> EdgeCacheRule:
+    ttl, stale = parse_ttl(os.getenv(env, default))
+    return EdgeCacheRule(name, prefix, ttl, stale)
+
+
+# Only paths `_is_public_request` lets through anonymously belong here.
+EDGE_CACHE_RULES: Tuple[EdgeCacheRule, ...] = (
+    _rule("plans", "/api/v1/plans", "EDGE_CACHE_PLANS", "60/300"),
+    _rule("case_studies", "/api/v1/content/case-studies", "EDGE_CACHE_CASE_STUDIES", "300/3600"),
+)
+
+
+def match_rule(path: str) -> EdgeCacheRule | None:
+    for rule in EDGE_CACHE_RULES:
+        if rule.matches(path):
+            return rule
+    return None
+
+
+def cache_key(path: str, query_string: str) -> str:
+    """Path without trailing slash plus the query sorted by key, so `?b=1&a=2` == `?a=2&b=1`."""
+    query = urlencode(sorted(parse_qsl(query_string, keep_blank_values=True)))
+    path = path.rstrip("/") or "/"
+    return f"{path}?{query}" if query else path
+
+
+def is_storable(status_code: int, headers: Dict[str, str], body: bytes) -> bool:
+    if status_code != 200 or len(body) > EDGE_CACHE_MAX_OBJECT_BYTES:
+        return False
+    if "set-cookie" in headers:
+        return False
+    cache_control = headers.get("cache-control", "").lower()
+    return "no-store" not in cache_control and "private" not in cache_control
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # Weak comparison (RFC 9110 13.1.2): W/"x" matches "x".
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in if_none_match.split(","))
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    status_code: int
+    headers: Tuple[Tuple[str, str], ...]
+    body: bytes
+    etag: str
+    stored_at: float
+    fresh_until: float
+    stale_until: float
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.fresh_until
+
+    def response_headers(self, rule: EdgeCacheRule, now: float, result: str) -> Dict[str, str]:
+        max_age = max(0, int(self.fresh_until - now))
+        headers = dict(self.headers)
+        headers["etag"] = self.etag
+        headers["cache-control"] = (
+            f"public, max-age={max_age}, stale-while-revalidate={rule.stale_seconds}"
+        )
+        headers["age"] = str(max(0, int(now - self.stored_at)))
+        headers["x-cache"] = result.upper()
+        return headers
+
+
+class EdgeCache:
+    """Per-process response cache for anonymous public GETs with stale-while-revalidate."""
+
+    def __init__(self, *, max_entries: int, max_bytes: int) -> None:
+        self._entries: TTLCache[CachedResponse] = TTLCache(
+            "edge", max_entries=max_entries, max_bytes=max_bytes
+        )
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> CachedResponse | None:
+        return self._entries.get(key)
+
+    def store(
+        self, key: str, rule: EdgeCacheRule, status_code: int, headers: Dict[str, str], body: bytes
+    ) -> CachedResponse | None:
+        if not is_storable(status_code, headers, body):
+            # A 404 or an uncacheable 200 supersedes the stored copy; a 5xx (or anything else)
+            # is an upstream failure, and the stale copy keeps being served until it expires.
+            if status_code in (200, 404):
+                self._entries.delete(key)
+            return None
+        now = time.time()
+        entry = CachedResponse(
+            status_code=status_code,
+            headers=tuple((k, v) for k, v in headers.items() if k.lower() not in _UNSTORED_HEADERS),
+            body=body,
+            etag=headers.get("etag") or make_etag(body),
+            stored_at=now,
+            fresh_until=now + rule.ttl_seconds,
+            stale_until=now + rule.ttl_seconds + rule.stale_seconds,
+        )
+        size = len(body) + sum(len(k) + len(v) for k, v in entry.headers) + 256
+        self._entries.set(key, entry, expires_at=entry.stale_until, size=size)
+        return entry
+
+    def revalidate(self, key: str, refresh: Callable[[], Awaitable[object]]) -> None:
+        """Refresh `key` in the background; at most one refresh per key is in flight."""
+        if key in self._refreshing:
+            return
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._refreshing[key] = task
+
+        def _done(t: asyncio.Task) -> None:
+            self._refreshing.pop(key, None)
+            # A failed refresh keeps serving the stale copy until it expires.
+            if not t.cancelled():
+                t.exception()
+
+        task.add_done_callback(_done)
+
+    def purge(self, prefix: str | None = None, *, reason: str = "manual") -> int:
+        """Drop every entry under `prefix` (all entries when None); returns the count."""
+        if prefix is None:
+            purged = len(self._entries)
+            self._entries.clear()
+        else:
+            prefix = prefix.rstrip("/")
+            doomed = [
+                key
+                for key in self._entries.keys()
+                if key == prefix or key.startswith(prefix + "/") or key.startswith(prefix + "?")
+            ]
+            for key in doomed:
+                self._entries.delete(key)
+            purged = len(doomed)
+        EDGE_CACHE_PURGES.labels(reason=reason).inc(purged)
+        return purged
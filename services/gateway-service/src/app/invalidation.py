@@ -0,0 +1,46 @@
+import asyncio
+import logging
+from typing import Callable
+
+from redis.asyncio import Redis as AsyncRedis
+
+# Must match auth-service `app/revocation.py`.
+USER_CHANGED_CHANNEL = "auth:user-changed"
+RESUBSCRIBE_SECONDS = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+async def listen_user_changes(
+    get_redis: Callable[[], AsyncRedis | None],
+    on_change: Callable[[str], None],
+    on_reset: Callable[[], None],
+) -> None:
+    """
+    Apply auth-service user-change events to local caches until cancelled.
+
+    Pub/sub is fire-and-forget: events sent while unsubscribed are lost, so every
+    (re)subscription starts with `on_reset()` and cache TTLs bound anything missed in between.
+    """
+    while True:
+        redis = get_redis()
+        if redis is None:
+            return
+        pubsub = redis.pubsub()
+        try:
+            await pubsub.subscribe(USER_CHANGED_CHANNEL)
+            on_reset()
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None and message.get("data"):
+                    on_change(str(message["data"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("user change subscription lost (%s); resubscribing", type(exc).__name__)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+        await asyncio.sleep(RESUBSCRIBE_SECONDS)
@@ -0,0 +1,78 @@
+import gzip
+import hashlib
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Tuple
+
+import yaml
+from prometheus_client import Counter
+
+from app.compression import BROTLI, GZIP, brotli
+
+OPENAPI_DOCUMENT_LOADS = Counter(
+    "gateway_openapi_document_loads_total",
+    "Consolidated OpenAPI (re)loads by source (file, generated)",
+    ["source"],
+)
+
+
+@dataclass(frozen=True)
+class OpenAPIDocument:
+    spec: Dict[str, Any]
+    body: bytes
+    etag: str
+    # Encoded bodies by content-coding; built once per load at maximum compression.
+    variants: Dict[str, bytes] = field(default_factory=dict)
+    source: Tuple[int, int] | None = None  # (mtime_ns, size) of the file it was read from
+
+    def etag_for(self, encoding: str | None) -> str:
+        # Each representation gets its own strong validator.
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+
+def _build(spec: Dict[str, Any], body: bytes, source: Tuple[int, int] | None) -> OpenAPIDocument:
+    variants = {GZIP: gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[BROTLI] = brotli.compress(body, quality=11)
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return OpenAPIDocument(spec=spec, body=body, etag=etag, variants=variants, source=source)
+
+
+class OpenAPIStore:
+    """
+    The consolidated OpenAPI document, serialised and compressed once. The file is re-read
+    only when its mtime or size changes; without a file, the gateway's own schema is used.
+    """
+
+    def __init__(self, path: str, generate: Callable[[], Dict[str, Any]]) -> None:
+        self.path = path
+        self._generate = generate
+        self._document: OpenAPIDocument | None = None
+
+    def get(self) -> OpenAPIDocument:
+        try:
+            stat = os.stat(self.path)
+            source: Tuple[int, int] | None = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            source = None
+        document = self._document
+        if document is not None and document.source == source:
+            return document
+        self._document = self._load(source)
+        return self._document
+
+    def _load(self, source: Tuple[int, int] | None) -> OpenAPIDocument:
+        if source is not None:
+            try:
+                with open(self.path, "rb") as f:
+                    body = f.read()
+                spec = yaml.safe_load(body) or {}
+                OPENAPI_DOCUMENT_LOADS.labels(source="file").inc()
+                return _build(spec, body, source)
+            except (OSError, yaml.YAMLError):
+                # Half-written or unreadable: keep serving what we had, retry on the next call.
+                if self._document is not None:
+                    return self._document
+        spec = self._generate()
+        OPENAPI_DOCUMENT_LOADS.labels(source="generated").inc()
+        return _build(spec, yaml.safe_dump(spec).encode("utf-8"), None)
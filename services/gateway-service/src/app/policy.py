@@ -0,0 +1,163 @@
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+ANY_METHOD = "*"
+
+ADMIN = frozenset({"admin"})
+SUBSCRIBER = frozenset({"subscriber"})
+TECHNICIAN = frozenset({"technician"})
+SUBSCRIBER_OR_ADMIN = frozenset({"subscriber", "admin"})
+TICKET_ROLES = frozenset({"subscriber", "technician", "admin"})
+LEAD_ROLES = frozenset({"admin", "cms_user", "technician"})
+CONTENT_ROLES = frozenset({"admin", "cms_user"})
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    """
+    Authorization rule for authenticated requests.
+
+    `template` segments are literals, `{name}` (exactly one segment) or a trailing `**`
+    (zero or more segments). `roles=None` allows any authenticated role; `internal=True`
+    is never reachable through the gateway. `hook` names an extra middleware check.
+    """
+
+    template: str
+    roles: Optional[FrozenSet[str]] = None
+    methods: Tuple[str, ...] = (ANY_METHOD,)
+    internal: bool = False
+    hook: Optional[str] = None
+
+    def allows(self, role: str) -> bool:
+        if self.internal:
+            return False
+        return self.roles is None or role in self.roles
+
+
+# Most specific template wins (literal > `{param}` > `**`); method-specific rules beat `*`.
+# Requests allowed by `_is_public_request` never reach this table.
+ROUTE_POLICIES: Tuple[RoutePolicy, ...] = (
+    RoutePolicy("/api/v1/subscribers/**", SUBSCRIBER_OR_ADMIN),
+    # Lead management (Phase 3): read all; write restrictions enforced in lead-service
+    RoutePolicy("/api/v1/leads/**", LEAD_ROLES),
+    # Admin must never be assigned leads
+    RoutePolicy(
+        "/api/v1/leads/{lead_id}/assign", LEAD_ROLES, methods=("PATCH",), hook="lead_assignee"
+    ),
+    RoutePolicy("/api/v1/content/**", CONTENT_ROLES),
+    RoutePolicy("/api/v1/coupons", ADMIN),
+    RoutePolicy("/api/v1/coupons/internal/**", internal=True),
+    RoutePolicy("/api/v1/coupons/referrals/program/**", ADMIN),
+    RoutePolicy("/api/v1/coupons/referrals/generate/**", SUBSCRIBER),
+    RoutePolicy("/api/v1/subscriptions"),
+    RoutePolicy("/api/v1/subscriptions/**", SUBSCRIBER_OR_ADMIN),
+    RoutePolicy("/api/v1/subscriptions/internal/**", internal=True),
+    RoutePolicy("/api/v1/subscriptions/{subscription_id}/plan-change/apply", ADMIN),
+    RoutePolicy("/api/v1/payments/internal/**", internal=True),
+    RoutePolicy("/api/v1/payments/admin/**", ADMIN),
+    RoutePolicy("/api/v1/payments/me/**", SUBSCRIBER),
+    RoutePolicy("/api/v1/payments/intents/**", SUBSCRIBER_OR_ADMIN),
+    RoutePolicy("/api/v1/billing/internal/**", internal=True),
+    RoutePolicy("/api/v1/billing/admin/**", ADMIN),
+    RoutePolicy("/api/v1/billing/me/**", SUBSCRIBER),
+    RoutePolicy("/api/v1/billing/credits/me/**", SUBSCRIBER),
+    # Plan writes (public GETs are allowed in `_is_public_request`)
+    RoutePolicy("/api/v1/plans/**", ADMIN),
+    # Ticket management (Phase 6)
+    RoutePolicy("/api/v1/tickets/**", TICKET_ROLES),
+    RoutePolicy("/api/v1/tickets", SUBSCRIBER_OR_ADMIN, methods=("POST",)),
+    RoutePolicy("/api/v1/tickets/internal/**", internal=True),
+    RoutePolicy("/api/v1/tickets/admin/**", ADMIN),
+    RoutePolicy("/api/v1/tickets/me/**", SUBSCRIBER),
+    # Assignment management (Phase 6)
+    RoutePolicy("/api/v1/assignments", ADMIN, methods=("POST",)),
+    RoutePolicy("/api/v1/assignments/internal/**", internal=True),
+    RoutePolicy("/api/v1/assignments/admin/**", ADMIN),
+    RoutePolicy("/api/v1/assignments/me/**", TECHNICIAN),
+    RoutePolicy("/api/v1/assignments/{assignment_id}/accept", TECHNICIAN),
+    RoutePolicy("/api/v1/assignments/{assignment_id}/reject", TECHNICIAN),
+    RoutePolicy("/api/v1/assignments/{assignment_id}/unassign", ADMIN),
+    # Gateway-composed views (backend-for-frontend)
+    RoutePolicy("/api/v1/home", SUBSCRIBER, methods=("GET",)),
+    # Media: ownership is enforced in media-service based on owner_type
+    RoutePolicy("/api/v1/media/internal/**", internal=True),
+)
+
+
+@dataclass
+class _Node:
+    literals: Dict[str, "_Node"] = field(default_factory=dict)
+    param: Optional["_Node"] = None
+    rules: Dict[str, RoutePolicy] = field(default_factory=dict)
+    catch_all: Dict[str, RoutePolicy] = field(default_factory=dict)
+
+
+def _split(path: str) -> List[str]:
+    return [s for s in path.strip("/").split("/") if s]
+
+
+def _pick(rules: Dict[str, RoutePolicy], method: str) -> Optional[RoutePolicy]:
+    if not rules:
+        return None
+    return rules.get(method) or rules.get(ANY_METHOD)
+
+
+class PolicyMatcher:
+    """Prefix trie over path segments, compiled once from the policy table."""
+
+    def __init__(self, policies: Iterable[RoutePolicy]) -> None:
+        self._root = _Node()
+        for policy in policies:
+            self._add(policy)
+
+    def _add(self, policy: RoutePolicy) -> None:
+        node = self._root
+        segments = _split(policy.template)
+        for i, segment in enumerate(segments):
+            if segment == "**":
+                if i != len(segments) - 1:
+                    raise ValueError(f"'**' must be the last segment: {policy.template}")
+                target = node.catch_all
+                break
+            if segment.startswith("{") and segment.endswith("}"):
+                node.param = node.param or _Node()
+                node = node.param
+            else:
+                node = node.literals.setdefault(segment, _Node())
+        else:
+            target = node.rules
+        for method in policy.methods:
+            if method in target:
+                raise ValueError(f"Duplicate policy for {method} {policy.template}")
+            target[method] = policy
+
+    def match(self, method: str, path: str) -> Optional[RoutePolicy]:
+        method = method.upper()
+        segments = _split(path)
+        if path.endswith("/") and segments:
+            # `/x/` is under `/x/**`, not the exact `/x` rule; the exact rule only applies
+            # when no catch-all covers it.
+            found = self._match(self._root, segments + [""], 0, method)
+            if found is not None:
+                return found
+        return self._match(self._root, segments, 0, method)
+
+    def _match(
+        self, node: _Node, segments: List[str], i: int, method: str
+    ) -> Optional[RoutePolicy]:
+        if i == len(segments):
+            return _pick(node.rules, method) or _pick(node.catch_all, method)
+        child = node.literals.get(segments[i])
+        if child is not None:
+            found = self._match(child, segments, i + 1, method)
+            if found is not None:
+                return found
+        if node.param is not None and segments[i]:
+            found = self._match(node.param, segments, i + 1, method)
+            if found is not None:
+                return found
+        return _pick(node.catch_all, method)
+
+
+def compile_policies(policies: Iterable[RoutePolicy] = ROUTE_POLICIES) -> PolicyMatcher:
+    return PolicyMatcher(policies)
@@ -0,0 +1,129 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Tuple
+
+from prometheus_client import Counter
+
+from app.cache import TTLCache
+
+RATE_LIMIT_REDIS_TIMEOUT_SECONDS = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT_SECONDS", "0.05"))
+RATE_LIMIT_FALLBACK_MAX_KEYS = int(os.getenv("RATE_LIMIT_FALLBACK_MAX_KEYS", "50000"))
+
+RATE_LIMIT_DECISIONS = Counter(
+    "gateway_rate_limit_decisions_total",
+    "Rate limit decisions by rule, backend and result",
+    ["rule", "backend", "result"],
+)
+
+# GCRA: one key per identifier holding the theoretical arrival time (ms), checked and
+# advanced atomically against the Redis clock. Allows `limit` requests per `window`
+# without the 2x burst a fixed window permits at bucket edges.
+_GCRA_LUA = """
+local interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+  tat = now
+end
+local new_tat = tat + interval
+if new_tat - now > window then
+  return {0, new_tat - now - window}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, 0}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    name: str
+    path_suffix: str
+    identifier_fields: Tuple[str, ...]
+    limit: int
+    window_seconds: int
+
+
+def parse_limit(spec: str) -> Tuple[int, int]:
+    """Parse '<requests>/<seconds>', e.g. '5/900'."""
+    limit, _, window = spec.partition("/")
+    return int(limit), int(window)
+
+
+def _rule(
+    name: str, path_suffix: str, fields: Tuple[str, ...], env: str, default: str
+) -> RateLimitRule:
+    limit, window = parse_limit(os.getenv(env, default))
+    return RateLimitRule(name, path_suffix, fields, limit, window)
+
+
+AUTH_RATE_LIMIT_RULES: Tuple[RateLimitRule, ...] = (
+    _rule("auth_register", "/register", ("email", "phone"), "RATE_LIMIT_AUTH_REGISTER", "5/3600"),
+    _rule(
+        "auth_otp_request", "/otp/request", ("identifier",), "RATE_LIMIT_AUTH_OTP_REQUEST", "3/900"
+    ),
+    _rule("auth_login", "/login", ("email",), "RATE_LIMIT_AUTH_LOGIN", "5/900"),
+)
+
+
+def match_auth_rule(path: str) -> RateLimitRule | None:
+    for rule in AUTH_RATE_LIMIT_RULES:
+        if path.endswith(rule.path_suffix):
+            return rule
+    return None
+
+
+_script = None
+_script_client = None
+_fallback_buckets: TTLCache[list] = TTLCache(
+    "rate_limit_fallback",
+    max_entries=RATE_LIMIT_FALLBACK_MAX_KEYS,
+    max_bytes=64 * RATE_LIMIT_FALLBACK_MAX_KEYS,
+)
+
+
+def _local_hit(key: str, rule: RateLimitRule) -> Tuple[bool, int]:
+    # In-process token bucket used while Redis is slow or unreachable (per-worker, best effort).
+    now = time.monotonic()
+    rate = rule.limit / rule.window_seconds
+    bucket = _fallback_buckets.get(key) or [float(rule.limit), now]
+    tokens = min(float(rule.limit), bucket[0] + (now - bucket[1]) * rate)
+    allowed = tokens >= 1.0
+    if allowed:
+        tokens -= 1.0
+    _fallback_buckets.set(key, [tokens, now], expires_at=time.time() + rule.window_seconds, size=64)
+    retry_after = 0 if allowed else int((1.0 - tokens) / rate) + 1
+    return allowed, retry_after
+
+
+async def hit(redis, rule: RateLimitRule, identifier: str) -> Tuple[bool, int]:
+    """Record one request; returns (allowed, retry_after_seconds)."""
+    global _script, _script_client
+    if redis is None:
+        # Redis not configured (local dev): do not block.
+        return True, 0
+    key = f"rl:{rule.name}:{identifier}"
+    try:
+        if _script is None or _script_client is not redis:
+            _script = redis.register_script(_GCRA_LUA)
+            _script_client = redis
+        interval_ms = int(rule.window_seconds * 1000 / rule.limit)
+        allowed, retry_ms = await asyncio.wait_for(
+            _script(keys=[key], args=[interval_ms, rule.window_seconds * 1000]),
+            RATE_LIMIT_REDIS_TIMEOUT_SECONDS,
+        )
+        allowed = bool(int(allowed))
+        RATE_LIMIT_DECISIONS.labels(
+            rule=rule.name, backend="redis", result="allowed" if allowed else "limited"
+        ).inc()
+        return allowed, (int(retry_ms) + 999) // 1000
+    except Exception:
+        pass
+    allowed, retry_after = _local_hit(key, rule)
+    RATE_LIMIT_DECISIONS.labels(
+        rule=rule.name, backend="local", result="allowed" if allowed else "limited"
+    ).inc()
+    return allowed, retry_after
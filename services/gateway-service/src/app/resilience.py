@@ -0,0 +1,244 @@
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+from prometheus_client import Counter, Gauge
+
+from app.upstream import UPSTREAM_TIMEOUT_SECONDS
+
+BREAKER_WINDOW_SECONDS = int(os.getenv("BREAKER_WINDOW_SECONDS", "30"))
+BREAKER_MIN_REQUESTS = int(os.getenv("BREAKER_MIN_REQUESTS", "20"))
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "5"))
+BREAKER_SLOW_CALL_RATE = float(os.getenv("BREAKER_SLOW_CALL_RATE", "0.8"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "15"))
+BREAKER_HALF_OPEN_CALLS = int(os.getenv("BREAKER_HALF_OPEN_CALLS", "3"))
+UPSTREAM_MAX_IN_FLIGHT = int(os.getenv("UPSTREAM_MAX_IN_FLIGHT", "200"))
+UPSTREAM_ROUTE_TIMEOUTS = os.getenv(
+    "UPSTREAM_ROUTE_TIMEOUTS",
+    "/api/v1/auth=10,/api/v1/plans=10,/api/v1/content=10,/api/v1/payments=25,/api/v1/billing=25",
+)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_STATE = Gauge(
+    "gateway_circuit_breaker_state",
+    "Circuit breaker state per upstream (0 = closed, 1 = half-open, 2 = open)",
+    ["upstream"],
+    # Each worker has its own breaker; report the most open one.
+    multiprocess_mode="livemax",
+)
+BREAKER_TRANSITIONS = Counter(
+    "gateway_circuit_breaker_transitions_total",
+    "Circuit breaker state changes per upstream",
+    ["upstream", "state"],
+)
+BREAKER_CALLS = Counter(
+    "gateway_circuit_breaker_calls_total",
+    "Upstream call outcomes seen by the breaker (success, failure, slow)",
+    ["upstream", "outcome"],
+)
+UPSTREAM_SHED = Counter(
+    "gateway_upstream_shed_total",
+    "Requests rejected with 503 before reaching an upstream",
+    ["upstream", "reason"],
+)
+
+SHED_BREAKER_OPEN = "breaker_open"
+SHED_BULKHEAD_FULL = "bulkhead_full"
+
+
+class CircuitBreaker:
+    """
+    Failure-rate and slow-call-rate breaker over a rolling window of one-second buckets.
+
+    Opens when at least `min_requests` calls in the window either failed or were slower than
+    `slow_call_seconds` at the configured rates. After `open_seconds` it lets
+    `half_open_calls` trial calls through: all succeeding closes it, any failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        window_seconds: int = BREAKER_WINDOW_SECONDS,
+        min_requests: int = BREAKER_MIN_REQUESTS,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS,
+        slow_call_rate: float = BREAKER_SLOW_CALL_RATE,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+        half_open_calls: int = BREAKER_HALF_OPEN_CALLS,
+    ) -> None:
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._trials_started = 0
+        self._trials_succeeded = 0
+        # [second, calls, failures, slow]
+        self._buckets: Deque[List[int]] = deque()
+        BREAKER_STATE.labels(upstream=name).set(_STATE_VALUES[CLOSED])
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                return False
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._trials_started >= self.half_open_calls:
+                return False
+            self._trials_started += 1
+        return True
+
+    def record(self, success: bool | None, duration: float) -> None:
+        """Report a call admitted by `allow()`; `success=None` releases it without a verdict."""
+        if success is None:
+            if self.state == HALF_OPEN:
+                self._trials_started = max(0, self._trials_started - 1)
+            return
+        slow = success and duration >= self.slow_call_seconds
+        outcome = "failure" if not success else "slow" if slow else "success"
+        BREAKER_CALLS.labels(upstream=self.name, outcome=outcome).inc()
+
+        if self.state == HALF_OPEN:
+            if not success:
+                self._transition(OPEN)
+                return
+            self._trials_succeeded += 1
+            if self._trials_succeeded >= self.half_open_calls:
+                self._transition(CLOSED)
+            return
+        if self.state == OPEN:
+            return
+
+        calls, failures, slow_calls = self._add(failed=not success, slow=slow)
+        if calls < self.min_requests:
+            return
+        if failures / calls >= self.failure_rate or slow_calls / calls >= self.slow_call_rate:
+            self._transition(OPEN)
+
+    def _add(self, *, failed: bool, slow: bool) -> Tuple[int, int, int]:
+        now = int(time.monotonic())
+        while self._buckets and self._buckets[0][0] <= now - self.window_seconds:
+            self._buckets.popleft()
+        if not self._buckets or self._buckets[-1][0] != now:
+            self._buckets.append([now, 0, 0, 0])
+        bucket = self._buckets[-1]
+        bucket[1] += 1
+        bucket[2] += int(failed)
+        bucket[3] += int(slow)
+        return (
+            sum(b[1] for b in self._buckets),
+            sum(b[2] for b in self._buckets),
+            sum(b[3] for b in self._buckets),
+        )
+
+    def _transition(self, state: str) -> None:
+        self.state = state
+        self._trials_started = 0
+        self._trials_succeeded = 0
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state == CLOSED:
+            self._buckets.clear()
+        BREAKER_STATE.labels(upstream=self.name).set(_STATE_VALUES[state])
+        BREAKER_TRANSITIONS.labels(upstream=self.name, state=state).inc()
+
+
+class Bulkhead:
+    """Non-blocking cap on concurrent calls to one upstream: full means shed, not queue."""
+
+    def __init__(self, name: str, max_in_flight: int) -> None:
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= self.max_in_flight:
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self) -> None:
+        self.in_flight = max(0, self.in_flight - 1)
+
+
+class UpstreamGuard:
+    """Breaker plus bulkhead for one upstream service."""
+
+    def __init__(self, name: str, max_in_flight: int) -> None:
+        self.name = name
+        self.breaker = CircuitBreaker(name)
+        self.bulkhead = Bulkhead(name, max_in_flight)
+
+    def admit(self) -> str | None:
+        """Take a slot for one call; returns the shed reason when the call must not proceed."""
+        if not self.bulkhead.try_acquire():
+            UPSTREAM_SHED.labels(upstream=self.name, reason=SHED_BULKHEAD_FULL).inc()
+            return SHED_BULKHEAD_FULL
+        if not self.breaker.allow():
+            self.bulkhead.release()
+            UPSTREAM_SHED.labels(upstream=self.name, reason=SHED_BREAKER_OPEN).inc()
+            return SHED_BREAKER_OPEN
+        return None
+
+    def record(self, success: bool | None, duration: float) -> None:
+        """Report the call's outcome (time to response headers for streamed calls)."""
+        self.breaker.record(success, duration)
+
+    def release(self) -> None:
+        """Free the bulkhead slot once the response body is done."""
+        self.bulkhead.release()
+
+    def retry_after_seconds(self) -> int:
+        return max(1, int(self.breaker.open_seconds))
+
+
+def max_in_flight_for(service: str) -> int:
+    # e.g. UPSTREAM_MAX_IN_FLIGHT_MEDIA=50
+    return int(os.getenv(f"UPSTREAM_MAX_IN_FLIGHT_{service.upper()}", str(UPSTREAM_MAX_IN_FLIGHT)))
+
+
+_guards: Dict[str, UpstreamGuard] = {}
+
+
+def get_guard(service: str) -> UpstreamGuard:
+    guard = _guards.get(service)
+    if guard is None:
+        guard = _guards[service] = UpstreamGuard(service, max_in_flight_for(service))
+    return guard
+
+
+def is_failure_status(status_code: int) -> bool:
+    # 4xx means the upstream is healthy and answered; only gateway-class 5xx count against it.
+    return status_code in (500, 502, 503, 504)
+
+
+def parse_route_timeouts(spec: str) -> Tuple[Tuple[str, float], ...]:
+    """Parse '<path prefix>=<seconds>,...' into (prefix, seconds), longest prefix first."""
+    routes = []
+    for item in spec.split(","):
+        prefix, _, seconds = item.strip().partition("=")
+        if prefix and seconds:
+            routes.append((prefix.rstrip("/"), float(seconds)))
+    return tuple(sorted(routes, key=lambda r: len(r[0]), reverse=True))
+
+
+ROUTE_TIMEOUTS = parse_route_timeouts(UPSTREAM_ROUTE_TIMEOUTS)
+
+
+def route_timeout(path: str) -> float:
+    for prefix, seconds in ROUTE_TIMEOUTS:
+        if path == prefix or path.startswith(prefix + "/"):
+            return seconds
+    return UPSTREAM_TIMEOUT_SECONDS
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import random
+import time
+from typing import Awaitable, Callable, List
+
+import httpx
+from prometheus_client import Counter
+
+UPSTREAM_RETRY_ATTEMPTS = int(os.getenv("UPSTREAM_RETRY_ATTEMPTS", "2"))
+UPSTREAM_RETRY_BASE_SECONDS = float(os.getenv("UPSTREAM_RETRY_BASE_SECONDS", "0.05"))
+UPSTREAM_RETRY_MAX_BACKOFF_SECONDS = float(os.getenv("UPSTREAM_RETRY_MAX_BACKOFF_SECONDS", "1"))
+# 0 disables hedging: otherwise a second identical GET is sent if the first is this slow.
+UPSTREAM_HEDGE_AFTER_SECONDS = float(os.getenv("UPSTREAM_HEDGE_AFTER_SECONDS", "0"))
+
+# Absolute deadline as Unix epoch milliseconds; every service caps its own calls to it.
+DEADLINE_HEADER = "x-request-deadline"
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+RETRYABLE_STATUS = (502, 503)
+# Errors where the request most likely never reached the application. Read timeouts are not
+# retried: the upstream is slow, and repeating the call only adds to its load.
+RETRYABLE_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.ReadError,
+    httpx.WriteError,
+    httpx.RemoteProtocolError,
+)
+
+UPSTREAM_ATTEMPTS = Counter(
+    "gateway_upstream_attempts_total",
+    "Upstream attempts for idempotent requests by kind (first, retry, hedge)",
+    ["upstream", "kind"],
+)
+
+Send = Callable[[], Awaitable[httpx.Response]]
+
+
+def parse_deadline(value: str | None) -> float | None:
+    """`x-request-deadline` (epoch ms) -> epoch seconds; None when absent or malformed."""
+    if not value:
+        return None
+    try:
+        return int(value) / 1000.0
+    except ValueError:
+        return None
+
+
+def format_deadline(deadline: float) -> str:
+    return str(int(deadline * 1000))
+
+
+def backoff(attempt: int) -> float:
+    # Full jitter keeps retries from many gateway workers from arriving in lockstep.
+    cap = min(UPSTREAM_RETRY_MAX_BACKOFF_SECONDS, UPSTREAM_RETRY_BASE_SECONDS * (2**attempt))
+    return random.uniform(0, cap)
+
+
+async def send_idempotent(send: Send, *, service: str, deadline: float) -> httpx.Response:
+    """
+    Send an idempotent request with bounded, jittered retries on transient failures
+    (connection errors, 502/503), never past `deadline`. Each call to `send` must build a
+    fresh request. The last error or response is returned once retries are exhausted.
+    """
+    attempt = 0
+    while True:
+        UPSTREAM_ATTEMPTS.labels(upstream=service, kind="first" if attempt == 0 else "retry").inc()
+        try:
+            response = await (
+                _hedged(send, service) if UPSTREAM_HEDGE_AFTER_SECONDS > 0 else send()
+            )
+        except RETRYABLE_ERRORS:
+            if not _may_retry(attempt, deadline):
+                raise
+        else:
+            if response.status_code not in RETRYABLE_STATUS or not _may_retry(attempt, deadline):
+                return response
+            await response.aclose()
+        await asyncio.sleep(backoff(attempt))
+        attempt += 1
+
+
+def _may_retry(attempt: int, deadline: float) -> bool:
+    if attempt >= UPSTREAM_RETRY_ATTEMPTS:
+        return False
+    # Leave room for the backoff and a useful attempt.
+    return deadline - time.time() > UPSTREAM_RETRY_MAX_BACKOFF_SECONDS
+
+
+async def _hedged(send: Send, service: str) -> httpx.Response:
+    tasks: List[asyncio.Task] = [asyncio.ensure_future(send())]
+    winner: asyncio.Task | None = None
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=UPSTREAM_HEDGE_AFTER_SECONDS)
+        if not done:
+            UPSTREAM_ATTEMPTS.labels(upstream=service, kind="hedge").inc()
+            tasks.append(asyncio.ensure_future(send()))
+        pending = set(tasks)
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    winner = task
+                    return task.result()
+                error = task.exception()
+        assert error is not None
+        raise error
+    finally:
+        for task in tasks:
+            if task is not winner:
+                task.add_done_callback(_discard)
+                task.cancel()
+
+
+def _discard(task: asyncio.Task) -> None:
+    # Close a losing attempt's response (or swallow its error) once it settles.
+    if task.cancelled() or task.exception() is not None:
+        return
+    asyncio.ensure_future(task.result().aclose())
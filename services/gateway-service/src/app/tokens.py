@@ -0,0 +1,130 @@
+import os
+from typing import Any, Dict, Tuple
+
+from jose import JWTError, jwt
+from prometheus_client import Counter
+from shared_utils.jwks import ASYMMETRIC_ALGORITHMS, JWKS_PATH, JWKSKeySet
+
+JWT_SECRET = os.getenv("JWT_SECRET", "")
+# Verify HS256 tokens with JWT_SECRET. Only for HS256 deployments and the move to RS256;
+# removed with auth-service's flag of the same name on 2026-12-01.
+JWT_ACCEPT_LEGACY_HS256 = os.getenv("JWT_ACCEPT_LEGACY_HS256", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+LOCAL_JWT_VERIFY = os.getenv("LOCAL_JWT_VERIFY", "true").lower() in ("1", "true", "yes")
+JWKS_MAX_AGE_SECONDS = float(os.getenv("JWKS_MAX_AGE_SECONDS", "300"))
+
+# Must match auth-service `app/revocation.py`.
+REVOKED_JTI_PREFIX = "auth:revoked:jti:"
+REVOKED_USER_PREFIX = "auth:revoked:user:"
+CLAIMS_VERSION_PREFIX = "auth:claims-version:"
+
+TOKEN_VERIFIED = "verified"
+TOKEN_INVALID = "invalid"
+TOKEN_FALLBACK = "fallback"
+
+# Tokens minted before auth-service embedded these claims must go through /validate.
+_REQUIRED_CLAIMS = (
+    "sub",
+    "role",
+    "email",
+    "jti",
+    "iat",
+    "exp",
+    "can_assign_leads",
+    "can_manage_unassigned_leads",
+)
+
+TOKEN_VERIFICATIONS = Counter(
+    "gateway_token_verifications_total",
+    "Access token verifications by path taken",
+    ["mode", "result"],
+)
+
+
+def _auth_client():
+    from app.upstream import get_client
+
+    return get_client("auth")
+
+
+# auth-service's public keys for RS256 tokens, fetched lazily through the pooled auth client.
+_jwks = JWKSKeySet(JWKS_PATH, client=_auth_client, max_age_seconds=JWKS_MAX_AGE_SECONDS)
+
+
+def _verification_key(token: str) -> Tuple[Any, str] | None:
+    """(key, algorithm) for the token's header, or None when no local key can judge it."""
+    header = jwt.get_unverified_header(token)
+    algorithm = header.get("alg")
+    if algorithm in ASYMMETRIC_ALGORITHMS:
+        # Unknown kid: a key rotated in since the last fetch; /validate answers meanwhile.
+        key = _jwks.get(header.get("kid"))
+        return (key, algorithm) if key is not None else None
+    if algorithm == "HS256" and JWT_SECRET and JWT_ACCEPT_LEGACY_HS256:
+        return JWT_SECRET, algorithm
+    return None
+
+
+def verify_local(token: str) -> Tuple[str, Dict[str, Any] | None]:
+    """
+    Verify signature and expiry with the key material auth-service signs with: its JWKS for
+    RS256 tokens, `JWT_SECRET` for HS256 ones while JWT_ACCEPT_LEGACY_HS256 is set.
+    Returns (TOKEN_VERIFIED, claims), (TOKEN_INVALID, None) or (TOKEN_FALLBACK, None)
+    when the token cannot be judged locally.
+    """
+    if not LOCAL_JWT_VERIFY:
+        return TOKEN_FALLBACK, None
+    try:
+        verification = _verification_key(token)
+        if verification is None:
+            return TOKEN_FALLBACK, None
+        key, algorithm = verification
+        payload = jwt.decode(token, key, algorithms=[algorithm])
+    except JWTError:
+        TOKEN_VERIFICATIONS.labels(mode="local", result="invalid").inc()
+        return TOKEN_INVALID, None
+    if any(name not in payload for name in _REQUIRED_CLAIMS):
+        return TOKEN_FALLBACK, None
+    return TOKEN_VERIFIED, {
+        "user_id": payload["sub"],
+        "role": payload["role"],
+        "email": payload["email"],
+        "subscriber_id": payload.get("subscriber_id"),
+        "can_assign_leads": bool(payload["can_assign_leads"]),
+        "can_manage_unassigned_leads": bool(payload["can_manage_unassigned_leads"]),
+        "jti": payload["jti"],
+        "iat": payload["iat"],
+        # Claims version the token was minted at; tokens from before versioning count as 0.
+        "cv": payload.get("cv", 0),
+        "_exp_ts": float(payload["exp"]),
+    }
+
+
+async def is_revoked(redis, claims: Dict[str, Any]) -> bool | None:
+    """
+    Check the Redis revocation keys and the user's claims version. None means the token cannot
+    be judged locally: Redis is unavailable, or the user's role, capabilities or status changed
+    after the token was minted (auth-service /validate then answers from the database).
+    """
+    if redis is None:
+        return None
+    try:
+        jti_revoked, user_revoked_at, claims_version = await redis.mget(
+            f"{REVOKED_JTI_PREFIX}{claims['jti']}",
+            f"{REVOKED_USER_PREFIX}{claims['user_id']}",
+            f"{CLAIMS_VERSION_PREFIX}{claims['user_id']}",
+        )
+    except Exception:
+        return None
+    if jti_revoked:
+        return True
+    try:
+        if user_revoked_at is not None and int(claims["iat"]) <= int(user_revoked_at):
+            return True
+        if int(claims.get("cv") or 0) < int(claims_version or 0):
+            return None
+    except (TypeError, ValueError):
+        return None
+    return False
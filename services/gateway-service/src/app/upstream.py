@@ -0,0 +1,105 @@
+import os
+from typing import Dict
+
+import httpx
+from prometheus_client import Gauge
+
+from app.balancer import BalancedTransport, Balancer, is_balanced
+
+UPSTREAM_TIMEOUT_SECONDS = float(os.getenv("UPSTREAM_TIMEOUT_SECONDS", "30"))
+UPSTREAM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT_SECONDS", "5"))
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+UPSTREAM_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY_SECONDS", "30"))
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "false").lower() in ("1", "true", "yes")
+
+UPSTREAM_POOL_CONNECTIONS = Gauge(
+    "gateway_upstream_pool_connections",
+    "Pooled upstream connections by state",
+    ["upstream", "state"],
+    multiprocess_mode="livesum",
+)
+UPSTREAM_POOL_MAX_CONNECTIONS = Gauge(
+    "gateway_upstream_pool_max_connections",
+    "Configured upstream pool size",
+    ["upstream"],
+    multiprocess_mode="livesum",
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "gateway_upstream_requests_in_flight",
+    "Upstream requests currently in flight",
+    ["upstream"],
+    multiprocess_mode="livesum",
+)
+
+# One long-lived pooled client per upstream service, created at startup.
+_clients: Dict[str, httpx.AsyncClient] = {}
+# Services configured with several endpoints (or a dns+ name) balance per request.
+_balancers: Dict[str, Balancer] = {}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=UPSTREAM_MAX_CONNECTIONS,
+        max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def _new_client(
+    base_url: str, transport: httpx.AsyncBaseTransport | None = None
+) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=base_url,
+        timeout=httpx.Timeout(UPSTREAM_TIMEOUT_SECONDS, connect=UPSTREAM_CONNECT_TIMEOUT_SECONDS),
+        limits=_limits(),
+        http2=UPSTREAM_HTTP2,
+        transport=transport,
+    )
+
+
+def _new_balanced_client(service: str, spec: str) -> httpx.AsyncClient:
+    balancer = _balancers[service] = Balancer(service, spec)
+    # One pool shared by all endpoints, so UPSTREAM_MAX_CONNECTIONS stays per service.
+    inner = httpx.AsyncHTTPTransport(limits=_limits(), http2=UPSTREAM_HTTP2)
+    return _new_client(balancer.base_url, BalancedTransport(balancer, inner))
+
+
+def start_clients(service_urls: Dict[str, str]) -> None:
+    for service, base_url in service_urls.items():
+        if not base_url or service in _clients:
+            continue
+        if is_balanced(base_url):
+            _clients[service] = _new_balanced_client(service, base_url)
+        else:
+            _clients[service] = _new_client(base_url)
+        UPSTREAM_POOL_MAX_CONNECTIONS.labels(upstream=service).set(UPSTREAM_MAX_CONNECTIONS)
+
+
+async def close_clients() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    _balancers.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def get_client(service: str) -> httpx.AsyncClient | None:
+    return _clients.get(service)
+
+
+def update_pool_metrics() -> None:
+    """Refresh pool and endpoint gauges (called on scrape)."""
+    for service, client in _clients.items():
+        transport = getattr(client, "_transport", None)
+        if isinstance(transport, BalancedTransport):
+            transport = transport.inner
+        pool = getattr(transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for c in connections if c.is_idle())
+        UPSTREAM_POOL_CONNECTIONS.labels(upstream=service, state="active").set(
+            len(connections) - idle
+        )
+        UPSTREAM_POOL_CONNECTIONS.labels(upstream=service, state="idle").set(idle)
+    for balancer in _balancers.values():
+        balancer.update_metrics()
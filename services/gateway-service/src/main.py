@@ -1,19 +1,94 @@
+import asyncio
+import hashlib
+import hmac
 import json
 import logging
 import os
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Dict, Iterable
+from typing import AsyncIterator, Dict, Iterable, Optional
 from uuid import uuid4
 
 import httpx
-import yaml
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.openapi.utils import get_openapi
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
-from redis import Redis
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram
+from redis.asyncio import Redis as AsyncRedis
+
+from shared_utils.logging import sample_access, setup_logging
+from shared_utils.server import metric_path, metrics_payload
+from app.upstream import (
+    UPSTREAM_CONNECT_TIMEOUT_SECONDS,
+    UPSTREAM_IN_FLIGHT,
+    close_clients,
+    get_client,
+    start_clients,
+    update_pool_metrics,
+)
+from app.aggregate import (
+    AGGREGATE_LEG_LATENCY,
+    AGGREGATE_REQUESTS,
+    HOME_CACHE_MAX_BYTES,
+    HOME_CACHE_MAX_ENTRIES,
+    HOME_CACHE_TTL_SECONDS,
+    HOME_LEG_TIMEOUT_SECONDS,
+    HOME_PATH,
+    LEG_ERROR,
+    LEG_OK,
+    SUBSCRIBER_HOME_LEGS,
+    SUBSCRIBER_HOME_SERVICES,
+    AggregateLeg,
+    assemble,
+    leg_outcome,
+    leg_result,
+)
+from app.batch import (
+    BATCH_ITEM_MAX_BYTES,
+    BATCH_MAX_BODY_BYTES,
+    BATCH_MAX_CONCURRENCY,
+    BATCH_PATH,
+    BATCH_SIZE,
+    INHERITED_HEADERS,
+    BatchError,
+    BatchItem,
+    CappedApp,
+    ItemTooLarge,
+    item_error,
+    item_result,
+    parse_batch,
+)
+from app.compression import CompressionMiddleware, negotiate
+from app.cache import SingleFlight, TTLCache, approx_size
+from app.edge_cache import (
+    COALESCE_PUBLIC_GETS,
+    EDGE_CACHE_ENABLED,
+    EDGE_CACHE_MAX_BYTES,
+    EDGE_CACHE_MAX_ENTRIES,
+    EDGE_CACHE_REQUESTS,
+    EDGE_CACHE_REVALIDATIONS,
+    CachedResponse,
+    EdgeCache,
+    EdgeCacheRule,
+    cache_key,
+    etag_matches,
+    match_rule as match_edge_rule,
+)
+from app.invalidation import listen_user_changes
+from app.openapi_doc import OpenAPIStore
+from app.policy import compile_policies
+from app.resilience import get_guard, is_failure_status, route_timeout
+from app.retry import (
+    DEADLINE_HEADER,
+    IDEMPOTENT_METHODS,
+    format_deadline,
+    parse_deadline,
+    send_idempotent,
+)
+from app.rate_limit import hit as rate_limit_hit, match_auth_rule
+from app.tokens import TOKEN_INVALID, TOKEN_VERIFICATIONS, TOKEN_VERIFIED, is_revoked, verify_local
 
 SERVICE_NAME = os.getenv("SERVICE_NAME", "gateway-service")
 SERVICE_VERSION = os.getenv("SERVICE_VERSION", "0.1.0")
@@ -22,10 +97,18 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*")
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://auth-service:8000")
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+REDIS_TIMEOUT_SECONDS = float(os.getenv("REDIS_TIMEOUT_SECONDS", "0.25"))
 CONSOLIDATED_OPENAPI_PATH = os.getenv("CONSOLIDATED_OPENAPI_PATH", "/app/openapi.yaml")
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+TOKEN_CACHE_MAX_BYTES = int(os.getenv("TOKEN_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+TOKEN_CACHE_MAX_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_MAX_TTL_SECONDS", "300"))
+PROXY_STREAMING = os.getenv("PROXY_STREAMING", "true").lower() in ("1", "true", "yes")
+PROXY_MAX_BODY_BYTES = int(os.getenv("PROXY_MAX_BODY_BYTES", str(50 * 1024 * 1024)))
+ROLE_CACHE_TTL_SECONDS = int(os.getenv("ROLE_CACHE_TTL_SECONDS", "60"))
+ROLE_CACHE_MAX_ENTRIES = int(os.getenv("ROLE_CACHE_MAX_ENTRIES", "10000"))
 
 SERVICE_URLS: Dict[str, str] = {
-    "auth": os.getenv("AUTH_SERVICE_URL", "http://auth-service:8000"),
+    "auth": AUTH_SERVICE_URL,
     "leads": os.getenv("LEAD_SERVICE_URL", "http://lead-service:8000"),
     "content": os.getenv("CONTENT_SERVICE_URL", "http://content-service:8000"),
     "subscribers": os.getenv("SUBSCRIBER_SERVICE_URL", "http://subscriber-service:8000"),
@@ -43,11 +126,37 @@ SERVICE_URLS: Dict[str, str] = {
 }
 
 ALLOWED_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS")
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
 
-logging.basicConfig(level=LOG_LEVEL, format="%(message)s")
+setup_logging(LOG_LEVEL)
 logger = logging.getLogger(SERVICE_NAME)
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    start_clients(SERVICE_URLS)
+    # Runs in every worker: load, serialise and compress the OpenAPI document before the
+    # first request needs it.
+    _openapi_store.get()
+    user_changes = (
+        asyncio.create_task(
+            listen_user_changes(_get_async_redis, _forget_user, _role_cache.clear)
+        )
+        if REDIS_URL
+        else None
+    )
+    try:
+        yield
+    finally:
+        if user_changes is not None:
+            user_changes.cancel()
+        await close_clients()
+        if _async_redis is not None:
+            await _async_redis.aclose()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title=SERVICE_NAME,
     version=SERVICE_VERSION,
     docs_url="/docs",
@@ -63,21 +172,35 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
 
 REQUEST_COUNT = Counter(
     "http_requests_total",
     "Total HTTP requests",
-    ["service", "method", "path", "status_code"],
+    ["service", "method", "path", "upstream", "status_code"],
 )
 REQUEST_LATENCY = Histogram(
     "http_request_duration_seconds",
     "HTTP request latency in seconds",
-    ["service", "method", "path"],
+    ["service", "method", "path", "upstream"],
 )
 
-_consolidated_openapi_cache: Dict[str, object] | None = None
-_redis: Redis | None = None
-_token_cache: dict[str, dict[str, object]] = {}
+_async_redis: AsyncRedis | None = None
+_token_cache: TTLCache[dict[str, object]] = TTLCache(
+    "token", max_entries=TOKEN_CACHE_MAX_ENTRIES, max_bytes=TOKEN_CACHE_MAX_BYTES
+)
+_token_flight = SingleFlight("token_validate")
+_route_policies = compile_policies()
+_edge_cache = EdgeCache(max_entries=EDGE_CACHE_MAX_ENTRIES, max_bytes=EDGE_CACHE_MAX_BYTES)
+_public_get_flight = SingleFlight("public_get")
+_home_cache: TTLCache[dict[str, object]] = TTLCache(
+    "subscriber_home", max_entries=HOME_CACHE_MAX_ENTRIES, max_bytes=HOME_CACHE_MAX_BYTES
+)
+_home_flight = SingleFlight("subscriber_home")
+_role_cache: TTLCache[str] = TTLCache(
+    "user_role", max_entries=ROLE_CACHE_MAX_ENTRIES, max_bytes=ROLE_CACHE_MAX_ENTRIES * 256
+)
+_role_flight = SingleFlight("user_role")
 
 INTERNAL_API_KEY = os.getenv("INTERNAL_API_KEY", "")
 
@@ -112,57 +235,46 @@ def _is_public_request(request: Request) -> bool:
     if request.url.path.startswith("/api/v1/payments/webhooks/"):
         return True
 
+    # Batch envelope: every sub-request is authenticated and authorized on its own.
+    if request.method.upper() == "POST" and path_norm == BATCH_PATH:
+        return True
+
     return _is_public_path(request.url.path)
 
 
-def _get_redis() -> Redis | None:
-    global _redis
-    if _redis is not None:
-        return _redis
+def _get_async_redis() -> AsyncRedis | None:
+    global _async_redis
+    if _async_redis is not None:
+        return _async_redis
     if not REDIS_URL:
         return None
-    _redis = Redis.from_url(REDIS_URL, decode_responses=True)
-    return _redis
-
-
-def _rate_limit_key(window_seconds: int) -> str:
-    # Fixed window bucket
-    return str(int(time.time()) // window_seconds)
-
-
-def _rate_limit(*, key: str, limit: int, window_seconds: int) -> bool:
-    r = _get_redis()
-    if not r:
-        # If Redis isn't configured, do not block (local dev).
-        return True
-    bucket = _rate_limit_key(window_seconds)
-    full_key = f"rl:{key}:{bucket}"
-    current = r.incr(full_key)
-    if current == 1:
-        r.expire(full_key, window_seconds)
-    return current <= limit
-
+    _async_redis = AsyncRedis.from_url(
+        REDIS_URL,
+        decode_responses=True,
+        socket_timeout=REDIS_TIMEOUT_SECONDS,
+        socket_connect_timeout=REDIS_TIMEOUT_SECONDS,
+    )
+    return _async_redis
 
-async def _validate_token_via_auth(token: str, correlation_id: str) -> dict[str, object] | None:
-    cached = _token_cache.get(token)
-    if cached:
-        exp_ts = cached.get("_exp_ts")
-        if isinstance(exp_ts, (int, float)) and exp_ts > time.time():
-            return cached
 
-    if not AUTH_SERVICE_URL:
+async def _fetch_token_claims(token: str, correlation_id: str) -> dict[str, object] | None:
+    client = get_client("auth")
+    if client is None:
         return None
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.post(
-                f"{AUTH_SERVICE_URL}/api/v1/auth/validate",
-                json={"token": token},
-                headers={"x-correlation-id": correlation_id},
-            )
+        resp = await client.post(
+            "/api/v1/auth/validate",
+            json={"token": token},
+            headers={"x-correlation-id": correlation_id},
+            timeout=10.0,
+        )
     except Exception:
         return None
 
+    TOKEN_VERIFICATIONS.labels(
+        mode="remote", result="valid" if resp.status_code == 200 else "invalid"
+    ).inc()
     if resp.status_code != 200:
         return None
 
@@ -179,19 +291,67 @@ async def _validate_token_via_auth(token: str, correlation_id: str) -> dict[str,
         pass
 
     data["_exp_ts"] = exp_ts
-    _token_cache[token] = data
     return data
 
 
+async def _validate_token_via_auth(token: str, correlation_id: str) -> dict[str, object] | None:
+    # Keyed by digest so the cache never holds raw bearer tokens.
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    cached = _token_cache.get(key)
+    if cached is not None:
+        return cached
+
+    data = await _token_flight.do(key, lambda: _fetch_token_claims(token, correlation_id))
+    if data:
+        exp_ts = float(data["_exp_ts"])
+        if TOKEN_CACHE_MAX_TTL_SECONDS > 0:
+            exp_ts = min(exp_ts, time.time() + TOKEN_CACHE_MAX_TTL_SECONDS)
+        _token_cache.set(key, data, expires_at=exp_ts, size=len(key) + approx_size(data))
+    return data
+
+
+async def _authenticate(token: str, correlation_id: str) -> dict[str, object] | None:
+    # Verify locally (signature + exp + Redis revocation); auth-service /validate is the fallback.
+    status, claims = verify_local(token)
+    if status == TOKEN_INVALID:
+        return None
+    if status == TOKEN_VERIFIED and claims is not None:
+        revoked = await is_revoked(_get_async_redis(), claims)
+        if revoked is not None:
+            TOKEN_VERIFICATIONS.labels(mode="local", result="revoked" if revoked else "valid").inc()
+            return None if revoked else claims
+    return await _validate_token_via_auth(token, correlation_id)
+
+
+def _forget_user(user_id: str) -> None:
+    """Drop cached per-user lookups after auth-service reports a role/capability/status change."""
+    _role_cache.delete(user_id.lower())
+
+
 async def _lookup_user_role_internal(*, user_id: str, correlation_id: str) -> str | None:
-    if not AUTH_SERVICE_URL or not INTERNAL_API_KEY:
+    key = user_id.lower()
+    cached = _role_cache.get(key)
+    if cached is not None:
+        return cached
+    role = await _role_flight.do(key, lambda: _fetch_user_role(key, correlation_id))
+    # Misses (unknown user, auth-service down) are not cached.
+    if role and ROLE_CACHE_TTL_SECONDS > 0:
+        _role_cache.set(
+            key, role, expires_at=time.time() + ROLE_CACHE_TTL_SECONDS, size=len(key) + len(role) + 64
+        )
+    return role
+
+
+async def _fetch_user_role(user_id: str, correlation_id: str) -> str | None:
+    client = get_client("auth")
+    if client is None or not INTERNAL_API_KEY:
         return None
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(
-                f"{AUTH_SERVICE_URL}/api/v1/auth/internal/users/{user_id}",
-                headers={"x-correlation-id": correlation_id, "X-Internal-API-Key": INTERNAL_API_KEY},
-            )
+        resp = await client.get(
+            f"/api/v1/auth/internal/users/{user_id}",
+            headers={"x-correlation-id": correlation_id, "X-Internal-API-Key": INTERNAL_API_KEY},
+            timeout=10.0,
+        )
     except Exception:
         return None
     if resp.status_code != 200:
@@ -203,6 +363,31 @@ async def _lookup_user_role_internal(*, user_id: str, correlation_id: str) -> st
         return None
 
 
+async def _check_lead_assignee(request: Request, correlation_id: str) -> JSONResponse | None:
+    # Assignment validation: admin must never be assigned leads
+    body = await request.body()
+    try:
+        payload = json.loads(body.decode("utf-8") or "{}")
+    except Exception:
+        payload = {}
+    assigned_to = payload.get("assigned_to") if isinstance(payload, dict) else None
+    if assigned_to:
+        assignee_role = await _lookup_user_role_internal(
+            user_id=str(assigned_to), correlation_id=correlation_id
+        )
+        if assignee_role == "admin":
+            return JSONResponse(
+                status_code=400,
+                content={"detail": "Admin cannot be assigned to leads"},
+            )
+    return None
+
+
+def _metric_upstream(request: Request) -> str:
+    service = request.scope.get("path_params", {}).get("service")
+    return service if service in SERVICE_URLS else "none"
+
+
 def _get_correlation_id(request: Request) -> str:
     return (
         request.headers.get("x-correlation-id")
@@ -212,18 +397,23 @@ def _get_correlation_id(request: Request) -> str:
 
 
 def _log_event(request: Request, status_code: int, duration: float) -> None:
-    event = {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "service": SERVICE_NAME,
-        "environment": ENVIRONMENT,
-        "method": request.method,
-        "path": request.url.path,
-        "status_code": status_code,
-        "duration_ms": round(duration * 1000, 2),
-        "correlation_id": getattr(request.state, "correlation_id", ""),
-        "client_ip": request.client.host if request.client else "",
-    }
-    logger.info(json.dumps(event))
+    duration_ms = round(duration * 1000, 2)
+    sample_rate = sample_access(status_code, duration_ms)
+    if sample_rate is None:
+        return
+    logger.info(
+        {
+            "service": SERVICE_NAME,
+            "environment": ENVIRONMENT,
+            "method": request.method,
+            "path": request.url.path,
+            "status_code": status_code,
+            "duration_ms": duration_ms,
+            "correlation_id": getattr(request.state, "correlation_id", ""),
+            "client_ip": request.client.host if request.client else "",
+            "sample_rate": sample_rate,
+        }
+    )
 
 
 @app.middleware("http")
@@ -234,26 +424,31 @@ async def metrics_and_logging(request: Request, call_next):
     response = None
     try:
         # Rate limiting for auth endpoints (Phase 2 hardening)
-        if request.url.path.startswith("/api/v1/auth/") and request.method.upper() == "POST":
+        rate_rule = (
+            match_auth_rule(request.url.path)
+            if request.url.path.startswith("/api/v1/auth/") and request.method.upper() == "POST"
+            else None
+        )
+        if rate_rule is not None:
             body = await request.body()
             try:
                 payload = json.loads(body.decode("utf-8") or "{}")
             except Exception:
                 payload = {}
+            if not isinstance(payload, dict):
+                payload = {}
 
             ip = request.client.host if request.client else "unknown"
-            if request.url.path.endswith("/register"):
-                identifier = payload.get("email") or payload.get("phone") or ip
-                if not _rate_limit(key=f"auth_register:{identifier}", limit=5, window_seconds=3600):
-                    return JSONResponse(status_code=429, content={"detail": "Too many requests"})
-            elif request.url.path.endswith("/otp/request"):
-                identifier = payload.get("identifier") or ip
-                if not _rate_limit(key=f"auth_otp_request:{identifier}", limit=3, window_seconds=900):
-                    return JSONResponse(status_code=429, content={"detail": "Too many requests"})
-            elif request.url.path.endswith("/login"):
-                identifier = payload.get("email") or ip
-                if not _rate_limit(key=f"auth_login:{identifier}", limit=5, window_seconds=900):
-                    return JSONResponse(status_code=429, content={"detail": "Too many requests"})
+            identifier = next(
+                (payload[f] for f in rate_rule.identifier_fields if payload.get(f)), None
+            ) or ip
+            allowed, retry_after = await rate_limit_hit(_get_async_redis(), rate_rule, str(identifier))
+            if not allowed:
+                return JSONResponse(
+                    status_code=429,
+                    content={"detail": "Too many requests"},
+                    headers={"Retry-After": str(max(retry_after, 1))},
+                )
 
         # AuthN/Z for protected endpoints
         if request.url.path.startswith("/api/v1/") and not _is_public_request(request):
@@ -262,7 +457,7 @@ async def metrics_and_logging(request: Request, call_next):
                 return JSONResponse(status_code=401, content={"detail": "Missing bearer token"})
             token = auth.split(" ", 1)[1].strip()
 
-            claims = await _validate_token_via_auth(token, correlation_id)
+            claims = await _authenticate(token, correlation_id)
             if not claims:
                 return JSONResponse(status_code=401, content={"detail": "Invalid token"})
 
@@ -275,165 +470,14 @@ async def metrics_and_logging(request: Request, call_next):
             )
 
             role = str(request.state.user_role or "")
-            if request.url.path.startswith("/api/v1/subscribers/") and role not in {"subscriber", "admin"}:
-                return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-
-            # Lead management (Phase 3): admin + cms_user + technician (read all; write restrictions enforced in lead-service)
-            if request.url.path.startswith("/api/v1/leads") and not (
-                request.method.upper() == "POST" and request.url.path.rstrip("/") == "/api/v1/leads"
-            ):
-                if role not in {"admin", "cms_user", "technician"}:
+            policy = _route_policies.match(request.method, request.url.path)
+            if policy is not None:
+                if not policy.allows(role):
                     return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-
-                # Assignment validation: admin must never be assigned leads
-                if request.method.upper() == "PATCH" and request.url.path.endswith("/assign"):
-                    body = await request.body()
-                    try:
-                        payload = json.loads(body.decode("utf-8") or "{}")
-                    except Exception:
-                        payload = {}
-                    assigned_to = payload.get("assigned_to")
-                    if assigned_to:
-                        assignee_role = await _lookup_user_role_internal(
-                            user_id=str(assigned_to), correlation_id=correlation_id
-                        )
-                        if assignee_role == "admin":
-                            return JSONResponse(
-                                status_code=400,
-                                content={"detail": "Admin cannot be assigned to leads"},
-                            )
-
-            # Content management (Phase 3): only admin + cms_user
-            if request.url.path.startswith("/api/v1/content/") and role not in {"admin", "cms_user"}:
-                return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-
-            # Coupon/discount/referral management
-            if request.url.path.startswith("/api/v1/coupons/"):
-                # Never expose internal coupon endpoints through the gateway
-                if request.url.path.startswith("/api/v1/coupons/internal/"):
-                    return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-
-                # Admin-only endpoints
-                if request.url.path in {"/api/v1/coupons", "/api/v1/coupons/"}:
-                    if role != "admin":
-                        return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                if request.url.path.startswith("/api/v1/coupons/referrals/program"):
-                    if role != "admin":
-                        return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-
-                # Subscriber referral code generation
-                if request.url.path.startswith("/api/v1/coupons/referrals/generate"):
-                    if role != "subscriber":
-                        return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-
-            # Subscription management
-            if request.url.path.startswith("/api/v1/subscriptions/"):
-                # Never expose internal subscription endpoints through the gateway
-                if request.url.path.startswith("/api/v1/subscriptions/internal/"):
-                    return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Plan change apply: admin only
-                if request.url.path.endswith("/plan-change/apply"):
-                    if role != "admin":
-                        return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Plan change request, cancellation: subscriber (own) or admin
-                elif request.url.path.endswith("/plan-change") or request.url.path.endswith("/cancel"):
-                    if role not in {"subscriber", "admin"}:
-                        return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Events history: subscriber (own) or admin
-                elif request.url.path.endswith("/events"):
-                    if role not in {"subscriber", "admin"}:
-                        return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Other subscription endpoints: subscriber or admin
-                elif role not in {"subscriber", "admin"}:
-                    return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-
-            # Payment management
-            if request.url.path.startswith("/api/v1/payments/"):
-                # Never expose internal payment endpoints through the gateway
-                if request.url.path.startswith("/api/v1/payments/internal/"):
-                    return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Admin-only
-                if request.url.path.startswith("/api/v1/payments/admin/") and role != "admin":
-                    return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Subscriber-only
-                if request.url.path.startswith("/api/v1/payments/me/") and role != "subscriber":
-                    return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Payment intent gateway create/retry (Wave 3): subscriber/admin only
-                if request.url.path.startswith("/api/v1/payments/intents/") and role not in {"subscriber", "admin"}:
-                    return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-
-            # Billing management
-            if request.url.path.startswith("/api/v1/billing/"):
-                # Never expose internal billing endpoints through the gateway
-                if request.url.path.startswith("/api/v1/billing/internal/"):
-                    return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Admin-only
-                if request.url.path.startswith("/api/v1/billing/admin/") and role != "admin":
-                    return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Subscriber-only
-                if request.url.path.startswith("/api/v1/billing/me/") and role != "subscriber":
-                    return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Subscriber credits endpoint (Wave 3)
-                if request.url.path.startswith("/api/v1/billing/credits/me") and role != "subscriber":
-                    return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-
-            # Plan management (public read is allowed in _is_public_request)
-            if request.url.path.startswith("/api/v1/plans") and request.method.upper() != "GET":
-                if role != "admin":
-                    return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-
-            # Ticket management (Phase 6)
-            if request.url.path.startswith("/api/v1/tickets"):
-                # Never expose internal ticket endpoints through the gateway
-                if request.url.path.startswith("/api/v1/tickets/internal/"):
-                    return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Public: POST /api/v1/tickets (subscriber creates ticket)
-                if request.method.upper() == "POST" and request.url.path.rstrip("/") == "/api/v1/tickets":
-                    if role not in {"subscriber", "admin"}:
-                        return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Admin-only: /api/v1/tickets/admin
-                elif request.url.path.startswith("/api/v1/tickets/admin"):
-                    if role != "admin":
-                        return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Subscriber, technician, admin: GET /api/v1/tickets/{id}, PATCH /api/v1/tickets/{id}
-                # Subscriber: GET /api/v1/tickets/me
-                elif request.url.path.startswith("/api/v1/tickets/me"):
-                    if role != "subscriber":
-                        return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Other ticket endpoints: subscriber, technician, admin (enforced in ticket-service)
-                elif role not in {"subscriber", "technician", "admin"}:
-                    return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-
-            # Assignment management (Phase 6)
-            if request.url.path.startswith("/api/v1/assignments"):
-                # Never expose internal assignment endpoints through the gateway
-                if request.url.path.startswith("/api/v1/assignments/internal/"):
-                    return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Admin-only: POST /api/v1/assignments, GET /api/v1/assignments/admin
-                if request.url.path.startswith("/api/v1/assignments/admin") or (
-                    request.method.upper() == "POST" and request.url.path.rstrip("/") == "/api/v1/assignments"
-                ):
-                    if role != "admin":
-                        return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Technician-only: GET /api/v1/assignments/me, POST /api/v1/assignments/{id}/accept, POST /api/v1/assignments/{id}/reject
-                elif request.url.path.startswith("/api/v1/assignments/me") or request.url.path.endswith(
-                    ("/accept", "/reject")
-                ):
-                    if role != "technician":
-                        return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Admin: unassign
-                elif request.url.path.endswith("/unassign"):
-                    if role != "admin":
-                        return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-
-            # Media management (Phase 6: ticket photos)
-            if request.url.path.startswith("/api/v1/media"):
-                # Never expose internal media endpoints through the gateway
-                if request.url.path.startswith("/api/v1/media/internal/"):
-                    return JSONResponse(status_code=403, content={"detail": "Forbidden"})
-                # Ticket photos: subscriber (own tickets), technician (assigned tickets), admin (any)
-                # Other media: admin only (for now)
-                # Authorization is enforced in media-service based on owner_type
+                if policy.hook == "lead_assignee":
+                    rejection = await _check_lead_assignee(request, correlation_id)
+                    if rejection is not None:
+                        return rejection
 
         response = await call_next(request)
         response.headers["X-Correlation-ID"] = correlation_id
@@ -441,14 +485,17 @@ async def metrics_and_logging(request: Request, call_next):
     finally:
         duration = time.time() - start
         status_code = response.status_code if response else 500
+        path_label = metric_path(request)
+        upstream_label = _metric_upstream(request)
         REQUEST_COUNT.labels(
             service=SERVICE_NAME,
             method=request.method,
-            path=request.url.path,
+            path=path_label,
+            upstream=upstream_label,
             status_code=str(status_code),
         ).inc()
         REQUEST_LATENCY.labels(
-            service=SERVICE_NAME, method=request.method, path=request.url.path
+            service=SERVICE_NAME, method=request.method, path=path_label, upstream=upstream_label
         ).observe(duration)
         _log_event(request, status_code, duration)
 
@@ -458,23 +505,11 @@ def _filter_headers(headers: Iterable[tuple[str, str]]) -> Dict[str, str]:
     return {k: v for k, v in headers if k.lower() not in excluded}
 
 
-@app.api_route("/api/v1/{service}", methods=list(ALLOWED_METHODS))
-async def proxy_root(service: str, request: Request) -> Response:
-    """
-    Handle service root paths like /api/v1/leads without triggering
-    framework redirects that can drop the port in Location headers behind Nginx.
-    """
-    base_url = SERVICE_URLS.get(service, "")
-    if not base_url:
-        return JSONResponse(
-            status_code=404,
-            content={"error": "Unknown service", "service": service},
-        )
-
-    url = f"{base_url}/api/v1/{service}"
+def _upstream_headers(request: Request) -> Dict[str, str]:
     headers = dict(request.headers)
     headers.pop("host", None)
     headers["x-correlation-id"] = request.state.correlation_id
+    headers[DEADLINE_HEADER] = format_deadline(_request_deadline(request))
     if getattr(request.state, "user_id", None):
         headers["x-user-id"] = str(request.state.user_id)
     if getattr(request.state, "user_role", None):
@@ -487,67 +522,601 @@ async def proxy_root(service: str, request: Request) -> Response:
         headers["x-can-manage-unassigned-leads"] = (
             "true" if request.state.can_manage_unassigned_leads else "false"
         )
-    body = await request.body()
+    return headers
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        upstream = await client.request(
-            method=request.method,
-            url=url,
+
+class _UpstreamStreamingResponse(StreamingResponse):
+    """Relays an upstream stream and closes it however the send ends (done, disconnect, abort)."""
+
+    def __init__(self, content, *, on_close, **kwargs) -> None:
+        super().__init__(content, **kwargs)
+        self._on_close = on_close
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self._on_close()
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+def _body_too_large(max_bytes: Optional[int] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=413,
+        content={
+            "detail": "Request body too large",
+            "max_bytes": max_bytes or PROXY_MAX_BODY_BYTES,
+        },
+    )
+
+
+def _declared_length(request: Request) -> int:
+    try:
+        return int(request.headers.get("content-length") or 0)
+    except ValueError:
+        return 0
+
+
+async def _limited_body(
+    request: Request, max_bytes: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    # Enforce the limit (PROXY_MAX_BODY_BYTES by default) while piping; clients may omit or lie
+    # about Content-Length.
+    max_bytes = max_bytes or PROXY_MAX_BODY_BYTES
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise _BodyTooLarge()
+        yield chunk
+
+
+def _has_body(request: Request) -> bool:
+    return bool(request.headers.get("content-length") or request.headers.get("transfer-encoding"))
+
+
+def _is_anonymous(request: Request) -> bool:
+    return "authorization" not in request.headers and "cookie" not in request.headers
+
+
+def _shed(service: str, reason: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Upstream unavailable", "service": service, "reason": reason},
+        headers={"Retry-After": str(get_guard(service).retry_after_seconds())},
+    )
+
+
+def _upstream_error(service: str, exc: Exception) -> JSONResponse:
+    if isinstance(exc, httpx.TimeoutException):
+        return JSONResponse(status_code=504, content={"error": "Upstream timeout", "service": service})
+    return JSONResponse(status_code=502, content={"error": "Upstream unreachable", "service": service})
+
+
+def _request_deadline(request: Request) -> float:
+    """Absolute deadline for this request: the route timeout, or sooner if the client asked."""
+    deadline = getattr(request.state, "deadline", None)
+    if deadline is None:
+        deadline = time.time() + route_timeout(request.url.path)
+        client_deadline = parse_deadline(request.headers.get(DEADLINE_HEADER))
+        if client_deadline is not None:
+            deadline = min(deadline, client_deadline)
+        request.state.deadline = deadline
+    return deadline
+
+
+def _deadline_exceeded(service: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=504, content={"error": "Request deadline exceeded", "service": service}
+    )
+
+
+def _upstream_timeout(request: Request) -> httpx.Timeout:
+    remaining = max(0.001, _request_deadline(request) - time.time())
+    return httpx.Timeout(remaining, connect=min(remaining, UPSTREAM_CONNECT_TIMEOUT_SECONDS))
+
+
+def _is_retryable(request: Request) -> bool:
+    return request.method.upper() in IDEMPOTENT_METHODS and not _has_body(request)
+
+
+# (status_code, headers, body): immutable, so one upstream result can be fanned out to many callers.
+_Snapshot = tuple[int, tuple[tuple[str, str], ...], bytes]
+
+
+def _snapshot(response: Response) -> _Snapshot:
+    headers = tuple((k, v) for k, v in response.headers.items() if k.lower() != "content-length")
+    return response.status_code, headers, bytes(response.body)
+
+
+async def _fill_edge_cache(
+    client, service: str, upstream_path: str, request: Request, rule: EdgeCacheRule, key: str
+) -> tuple[CachedResponse | None, Response]:
+    async def _fetch() -> tuple[CachedResponse | None, _Snapshot]:
+        return await _fetch_public(client, service, upstream_path, request, rule, key)
+
+    if COALESCE_PUBLIC_GETS:
+        # Identical concurrent misses (cold cache, right after a purge) share one upstream call.
+        entry, (status_code, headers, body) = await _public_get_flight.do(key, _fetch)
+    else:
+        entry, (status_code, headers, body) = await _fetch()
+    return entry, Response(content=body, status_code=status_code, headers=dict(headers))
+
+
+async def _fetch_public(
+    client, service: str, upstream_path: str, request: Request, rule: EdgeCacheRule, key: str
+) -> tuple[CachedResponse | None, _Snapshot]:
+    if _request_deadline(request) <= time.time():
+        return None, _snapshot(_deadline_exceeded(service))
+    guard = get_guard(service)
+    shed_reason = guard.admit()
+    if shed_reason:
+        return None, _snapshot(_shed(service, shed_reason))
+    # Fetch with a minimal header set: the stored body must not depend on who asked first.
+    headers = {
+        "x-correlation-id": request.state.correlation_id,
+        "accept": "application/json",
+        "accept-encoding": "identity",
+        DEADLINE_HEADER: format_deadline(_request_deadline(request)),
+    }
+
+    async def _send() -> httpx.Response:
+        return await client.get(
+            upstream_path,
             params=request.query_params,
-            content=body,
             headers=headers,
+            timeout=_upstream_timeout(request),
         )
 
+    start = time.monotonic()
+    try:
+        with UPSTREAM_IN_FLIGHT.labels(upstream=service).track_inprogress():
+            upstream = await send_idempotent(
+                _send, service=service, deadline=_request_deadline(request)
+            )
+    except httpx.TransportError as exc:
+        guard.record(False, time.monotonic() - start)
+        return None, _snapshot(_upstream_error(service, exc))
+    except BaseException:
+        guard.record(None, 0.0)
+        raise
+    finally:
+        guard.release()
+    guard.record(not is_failure_status(upstream.status_code), time.monotonic() - start)
+    entry = None
+    if EDGE_CACHE_ENABLED:
+        upstream_headers = {k.lower(): v for k, v in upstream.headers.items()}
+        entry = _edge_cache.store(
+            key, rule, upstream.status_code, upstream_headers, upstream.content
+        )
+    headers = _filter_headers(
+        (k, v) for k, v in upstream.headers.items() if k.lower() != "content-encoding"
+    )
+    return entry, (upstream.status_code, tuple(headers.items()), upstream.content)
+
+
+async def _serve_from_edge_cache(
+    client, service: str, upstream_path: str, request: Request, rule: EdgeCacheRule
+) -> Response:
+    key = cache_key(request.url.path, request.url.query)
+    entry = _edge_cache.get(key) if EDGE_CACHE_ENABLED else None
+    now = time.time()
+    if entry is not None and entry.is_fresh(now):
+        result = "hit"
+    elif entry is not None:
+        result = "stale"
+
+        async def _refresh() -> None:
+            refreshed, _ = await _fill_edge_cache(client, service, upstream_path, request, rule, key)
+            EDGE_CACHE_REVALIDATIONS.labels(
+                rule=rule.name, result="ok" if refreshed is not None else "error"
+            ).inc()
+
+        _edge_cache.revalidate(key, _refresh)
+    else:
+        result = "miss"
+        entry, passthrough = await _fill_edge_cache(
+            client, service, upstream_path, request, rule, key
+        )
+        if entry is None:
+            EDGE_CACHE_REQUESTS.labels(rule=rule.name, result="bypass").inc()
+            return passthrough
+        now = time.time()
+
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        EDGE_CACHE_REQUESTS.labels(rule=rule.name, result="not_modified").inc()
+        headers = entry.response_headers(rule, now, result)
+        headers.pop("content-type", None)
+        return Response(status_code=304, headers=headers)
+    EDGE_CACHE_REQUESTS.labels(rule=rule.name, result=result).inc()
     return Response(
-        content=upstream.content,
-        status_code=upstream.status_code,
-        headers=_filter_headers(upstream.headers.items()),
-        media_type=upstream.headers.get("content-type"),
+        content=entry.body,
+        status_code=entry.status_code,
+        headers=entry.response_headers(rule, now, result),
     )
 
 
-@app.api_route("/api/v1/{service}/{path:path}", methods=list(ALLOWED_METHODS))
-async def proxy(service: str, path: str, request: Request) -> Response:
-    base_url = SERVICE_URLS.get(service, "")
-    if not base_url:
+async def _forward(service: str, upstream_path: str, request: Request) -> Response:
+    if not SERVICE_URLS.get(service, ""):
         return JSONResponse(
             status_code=404,
             content={"error": "Unknown service", "service": service},
         )
+    client = get_client(service)
+    if client is None:
+        return JSONResponse(
+            status_code=503,
+            content={"error": "Upstream unavailable", "service": service},
+        )
 
-    url = f"{base_url}/api/v1/{service}/{path}"
-    headers = dict(request.headers)
-    headers.pop("host", None)
-    headers["x-correlation-id"] = request.state.correlation_id
-    if getattr(request.state, "user_id", None):
-        headers["x-user-id"] = str(request.state.user_id)
-    if getattr(request.state, "user_role", None):
-        headers["x-user-role"] = str(request.state.user_role)
-    if getattr(request.state, "user_email", None):
-        headers["x-user-email"] = str(request.state.user_email)
-    if getattr(request.state, "can_assign_leads", None) is not None:
-        headers["x-can-assign-leads"] = "true" if request.state.can_assign_leads else "false"
-    if getattr(request.state, "can_manage_unassigned_leads", None) is not None:
-        headers["x-can-manage-unassigned-leads"] = (
-            "true" if request.state.can_manage_unassigned_leads else "false"
+    method = request.method.upper()
+    edge_rule = match_edge_rule(request.url.path)
+    if edge_rule is not None and method == "GET":
+        if _is_anonymous(request):
+            return await _serve_from_edge_cache(client, service, upstream_path, request, edge_rule)
+        EDGE_CACHE_REQUESTS.labels(rule=edge_rule.name, result="bypass").inc()
+
+    response = await _proxy(client, service, upstream_path, request)
+    if method not in SAFE_METHODS and response.status_code < 400:
+        if edge_rule is not None:
+            # Purge hook: a successful write through the gateway invalidates that catalog.
+            _edge_cache.purge(edge_rule.prefix, reason="write")
+        changed_user = _changed_user_id(service, upstream_path)
+        if changed_user:
+            # Other replicas hear about it from auth-service over Redis; this one need not wait.
+            _forget_user(changed_user)
+        user_id = getattr(request.state, "user_id", None)
+        if user_id and service in SUBSCRIBER_HOME_SERVICES:
+            # The caller just changed something their home view shows.
+            _home_cache.delete(str(user_id))
+    return response
+
+
+def _changed_user_id(service: str, upstream_path: str) -> str | None:
+    # Admin user updates: /api/v1/auth/users/{user_id}/capabilities, .../status
+    segments = upstream_path.strip("/").split("/")
+    if service == "auth" and len(segments) >= 6 and segments[3] == "users":
+        return segments[4]
+    return None
+
+
+async def _proxy(client, service: str, upstream_path: str, request: Request) -> Response:
+    if _declared_length(request) > PROXY_MAX_BODY_BYTES:
+        return _body_too_large()
+
+    if _request_deadline(request) <= time.time():
+        return _deadline_exceeded(service)
+
+    # Bulkhead + breaker: shed fast instead of piling onto a slow or failing upstream.
+    guard = get_guard(service)
+    shed_reason = guard.admit()
+    if shed_reason:
+        return _shed(service, shed_reason)
+
+    headers = _upstream_headers(request)
+    retryable = _is_retryable(request)
+    start = time.monotonic()
+
+    if not PROXY_STREAMING:
+        try:
+            body = await request.body()
+            if len(body) > PROXY_MAX_BODY_BYTES:
+                guard.record(None, 0.0)
+                return _body_too_large()
+
+            async def _send_buffered() -> httpx.Response:
+                return await client.request(
+                    method=request.method,
+                    url=upstream_path,
+                    params=request.query_params,
+                    content=body,
+                    headers=headers,
+                    timeout=_upstream_timeout(request),
+                )
+
+            with UPSTREAM_IN_FLIGHT.labels(upstream=service).track_inprogress():
+                if retryable:
+                    upstream = await send_idempotent(
+                        _send_buffered, service=service, deadline=_request_deadline(request)
+                    )
+                else:
+                    upstream = await _send_buffered()
+        except httpx.TransportError as exc:
+            guard.record(False, time.monotonic() - start)
+            return _upstream_error(service, exc)
+        except BaseException:
+            guard.record(None, 0.0)
+            raise
+        finally:
+            guard.release()
+        guard.record(not is_failure_status(upstream.status_code), time.monotonic() - start)
+        return Response(
+            content=upstream.content,
+            status_code=upstream.status_code,
+            headers=_filter_headers(upstream.headers.items()),
+            media_type=upstream.headers.get("content-type"),
         )
-    body = await request.body()
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        upstream = await client.request(
+    async def _send() -> httpx.Response:
+        upstream_request = client.build_request(
             method=request.method,
-            url=url,
+            url=upstream_path,
             params=request.query_params,
-            content=body,
+            content=_limited_body(request) if _has_body(request) else None,
             headers=headers,
+            timeout=_upstream_timeout(request),
         )
+        return await client.send(upstream_request, stream=True)
 
-    return Response(
-        content=upstream.content,
+    in_flight = UPSTREAM_IN_FLIGHT.labels(upstream=service)
+    in_flight.inc()
+    try:
+        if retryable:
+            upstream = await send_idempotent(
+                _send, service=service, deadline=_request_deadline(request)
+            )
+        else:
+            upstream = await _send()
+    except _BodyTooLarge:
+        in_flight.dec()
+        guard.record(None, 0.0)
+        guard.release()
+        return _body_too_large()
+    except httpx.TransportError as exc:
+        in_flight.dec()
+        guard.record(False, time.monotonic() - start)
+        guard.release()
+        return _upstream_error(service, exc)
+    except BaseException:
+        in_flight.dec()
+        guard.record(None, 0.0)
+        guard.release()
+        raise
+    # Streamed calls are judged on time to response headers.
+    guard.record(not is_failure_status(upstream.status_code), time.monotonic() - start)
+
+    async def _close_upstream() -> None:
+        try:
+            await upstream.aclose()
+        finally:
+            in_flight.dec()
+            guard.release()
+
+    # Raw passthrough: bytes (and Content-Encoding) are relayed exactly as sent upstream.
+    return _UpstreamStreamingResponse(
+        upstream.aiter_raw(),
         status_code=upstream.status_code,
         headers=_filter_headers(upstream.headers.items()),
         media_type=upstream.headers.get("content-type"),
+        on_close=_close_upstream,
+    )
+
+
+async def _fetch_leg(view: str, leg: AggregateLeg, request: Request) -> dict[str, object]:
+    """One upstream leg of an aggregate view; never raises, failures become an error result."""
+    start = time.monotonic()
+    status_code: int | None = None
+    result: dict[str, object] | None = None
+    client = get_client(leg.service)
+    guard = get_guard(leg.service)
+    shed_reason = guard.admit() if client is not None else "unavailable"
+    if shed_reason:
+        result = leg_result(LEG_ERROR, status_code=503, error=f"Upstream unavailable ({shed_reason})")
+    else:
+        deadline = min(_request_deadline(request), time.time() + HOME_LEG_TIMEOUT_SECONDS)
+        headers = _upstream_headers(request)
+        headers[DEADLINE_HEADER] = format_deadline(deadline)
+
+        async def _send() -> httpx.Response:
+            remaining = max(0.001, deadline - time.time())
+            return await client.get(
+                leg.path,
+                params=leg.params,
+                headers=headers,
+                timeout=httpx.Timeout(
+                    remaining, connect=min(remaining, UPSTREAM_CONNECT_TIMEOUT_SECONDS)
+                ),
+            )
+
+        try:
+            with UPSTREAM_IN_FLIGHT.labels(upstream=leg.service).track_inprogress():
+                upstream = await send_idempotent(_send, service=leg.service, deadline=deadline)
+        except httpx.TransportError as exc:
+            guard.record(False, time.monotonic() - start)
+            timed_out = isinstance(exc, httpx.TimeoutException)
+            result = leg_result(
+                LEG_ERROR,
+                status_code=504 if timed_out else 502,
+                error="Upstream timeout" if timed_out else "Upstream unreachable",
+            )
+        except BaseException:
+            guard.record(None, 0.0)
+            raise
+        else:
+            guard.record(not is_failure_status(upstream.status_code), time.monotonic() - start)
+            status_code = upstream.status_code
+        finally:
+            guard.release()
+
+    if result is None:
+        outcome = leg_outcome(status_code)
+        if outcome != LEG_OK:
+            result = leg_result(outcome, status_code=status_code)
+        else:
+            try:
+                result = leg_result(LEG_OK, data=upstream.json())
+            except ValueError:
+                result = leg_result(
+                    LEG_ERROR, status_code=status_code, error="Malformed upstream response"
+                )
+    AGGREGATE_LEG_LATENCY.labels(view=view, leg=leg.name, outcome=result["status"]).observe(
+        time.monotonic() - start
+    )
+    return result
+
+
+async def _build_subscriber_home(request: Request, user_id: str) -> tuple[dict[str, object], str]:
+    results = await asyncio.gather(
+        *(_fetch_leg("subscriber_home", leg, request) for leg in SUBSCRIBER_HOME_LEGS)
+    )
+    body, outcome = assemble(
+        "subscriber_home",
+        {leg.name: result for leg, result in zip(SUBSCRIBER_HOME_LEGS, results)},
+        SUBSCRIBER_HOME_LEGS,
+    )
+    # Only complete views are cached: a partial one would pin a transient failure for the TTL.
+    if outcome == "complete" and HOME_CACHE_TTL_SECONDS > 0:
+        _home_cache.set(
+            user_id,
+            body,
+            expires_at=time.time() + HOME_CACHE_TTL_SECONDS,
+            size=len(user_id) + approx_size(body),
+        )
+    return body, outcome
+
+
+@app.get(HOME_PATH)
+async def subscriber_home(request: Request) -> Response:
+    """
+    Subscriber home screen in one call: profile, subscription, recent invoices, credits and
+    tickets, fetched concurrently. A failed optional leg is reported in place (`partial: true`);
+    only a failed profile fails the request.
+    """
+    user_id = str(request.state.user_id)
+    cached = _home_cache.get(user_id)
+    if cached is not None:
+        AGGREGATE_REQUESTS.labels(view="subscriber_home", result="hit").inc()
+        return JSONResponse(
+            content=cached,
+            headers={"Cache-Control": f"private, max-age={HOME_CACHE_TTL_SECONDS}", "X-Cache": "HIT"},
+        )
+
+    body, outcome = await _home_flight.do(
+        user_id, lambda: _build_subscriber_home(request, user_id)
+    )
+    if outcome == "failed":
+        return JSONResponse(status_code=502, content=body, headers={"Cache-Control": "no-store"})
+    cache_control = (
+        f"private, max-age={HOME_CACHE_TTL_SECONDS}" if outcome == "complete" else "no-store"
+    )
+    return JSONResponse(content=body, headers={"Cache-Control": cache_control, "X-Cache": "MISS"})
+
+
+async def _dispatch_batch_item(
+    transport: httpx.ASGITransport,
+    semaphore: asyncio.Semaphore,
+    item: BatchItem,
+    headers: Dict[str, str],
+) -> Dict[str, object]:
+    if item.error:
+        return item_error(item.id, 400, item.error)
+    sub_request = httpx.Request(
+        item.method,
+        "http://gateway" + item.path,
+        headers=headers,
+        **({"json": item.body} if item.has_body else {}),
+    )
+    async with semaphore:
+        try:
+            response = await transport.handle_async_request(sub_request)
+            content = await response.aread()
+        except ItemTooLarge:
+            return item_error(
+                item.id,
+                413,
+                f"Response exceeds {BATCH_ITEM_MAX_BYTES} bytes; request it outside the batch",
+            )
+        except Exception as exc:
+            logger.warning(
+                {
+                    "event": "batch_item_failed",
+                    "service": SERVICE_NAME,
+                    "path": item.path,
+                    "error": type(exc).__name__,
+                    "correlation_id": headers.get("x-correlation-id", ""),
+                }
+            )
+            return item_error(item.id, 500, "Sub-request failed")
+    return item_result(item.id, response.status_code, dict(response.headers), content)
+
+
+@app.post(BATCH_PATH)
+async def batch(request: Request) -> Response:
+    """
+    Run several /api/v1 calls in one round trip: `{"requests": [{"id", "method", "path", "body"}]}`.
+
+    Sub-requests are dispatched concurrently back through this app, so each one gets the same
+    authentication, route policy, rate limits, edge cache and breakers as a direct call.
+    Results come back in request order with a per-item status.
+    """
+    # Public route: bound the read before parsing, or an anonymous caller could make the gateway
+    # buffer an arbitrarily large body.
+    if _declared_length(request) > BATCH_MAX_BODY_BYTES:
+        return _body_too_large(BATCH_MAX_BODY_BYTES)
+    try:
+        raw = b"".join([chunk async for chunk in _limited_body(request, BATCH_MAX_BODY_BYTES)])
+    except _BodyTooLarge:
+        return _body_too_large(BATCH_MAX_BODY_BYTES)
+    try:
+        items = parse_batch(raw, ALLOWED_METHODS)
+    except BatchError as exc:
+        return JSONResponse(status_code=400, content={"detail": str(exc)})
+    BATCH_SIZE.observe(len(items))
+
+    inherited = {k: request.headers[k] for k in INHERITED_HEADERS if k in request.headers}
+    inherited[DEADLINE_HEADER] = format_deadline(_request_deadline(request))
+    # The outer response is compressed once; items stay identity-encoded inside it.
+    inherited["accept-encoding"] = "identity"
+    correlation_id = request.state.correlation_id
+    # Keep the caller's address so per-IP rate limits still apply to each item.
+    client = (request.client.host, request.client.port) if request.client else ("127.0.0.1", 0)
+    transport = httpx.ASGITransport(app=CappedApp(app, BATCH_ITEM_MAX_BYTES), client=client)
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+    results = await asyncio.gather(
+        *(
+            _dispatch_batch_item(
+                transport,
+                semaphore,
+                item,
+                {**inherited, "x-correlation-id": f"{correlation_id}-{index}"},
+            )
+            for index, item in enumerate(items)
+        )
     )
+    return JSONResponse(content={"responses": list(results)})
+
+
+@app.api_route("/api/v1/{service}", methods=list(ALLOWED_METHODS))
+async def proxy_root(service: str, request: Request) -> Response:
+    """
+    Handle service root paths like /api/v1/leads without triggering
+    framework redirects that can drop the port in Location headers behind Nginx.
+    """
+    return await _forward(service, f"/api/v1/{service}", request)
+
+
+@app.api_route("/api/v1/{service}/{path:path}", methods=list(ALLOWED_METHODS))
+async def proxy(service: str, path: str, request: Request) -> Response:
+    return await _forward(service, f"/api/v1/{service}/{path}", request)
+
+
+@app.post("/internal/edge-cache/purge")
+async def purge_edge_cache(request: Request) -> Response:
+    """Purge hook for publishers: `{"prefix": "/api/v1/plans"}`, or an empty body for everything."""
+    provided = request.headers.get("x-internal-api-key", "")
+    if not INTERNAL_API_KEY or not hmac.compare_digest(provided, INTERNAL_API_KEY):
+        return JSONResponse(status_code=403, content={"detail": "Forbidden"})
+    body = await request.body()
+    try:
+        payload = json.loads(body.decode("utf-8") or "{}")
+    except Exception:
+        payload = {}
+    prefix = payload.get("prefix") if isinstance(payload, dict) else None
+    purged = _edge_cache.purge(str(prefix) if prefix else None, reason="api")
+    return JSONResponse(content={"purged": purged})
 
 
 @app.get("/health")
@@ -582,37 +1151,43 @@ async def live() -> Dict[str, str]:
 
 @app.get("/metrics")
 async def metrics() -> Response:
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    update_pool_metrics()
+    return Response(metrics_payload(), media_type=CONTENT_TYPE_LATEST)
 
 
 @app.get("/openapi.yaml")
-async def consolidated_openapi_yaml() -> Response:
-    try:
-        with open(CONSOLIDATED_OPENAPI_PATH, "rb") as f:
-            content = f.read()
-        return Response(content=content, media_type="application/yaml")
-    except FileNotFoundError:
-        content = yaml.safe_dump(app.openapi())
-        return Response(content=content, media_type="application/yaml")
+async def consolidated_openapi_yaml(request: Request) -> Response:
+    document = _openapi_store.get()
+    encoding = negotiate(request.headers.get("accept-encoding", ""))
+    if encoding not in document.variants:
+        encoding = None
+    headers = {
+        "ETag": document.etag_for(encoding),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and any(
+        etag_matches(if_none_match, document.etag_for(e)) for e in (None, *document.variants)
+    ):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(content=document.body, media_type="application/yaml", headers=headers)
+    # Pre-compressed: the compression middleware passes encoded bodies through untouched.
+    headers["Content-Encoding"] = encoding
+    return Response(
+        content=document.variants[encoding], media_type="application/yaml", headers=headers
+    )
 
 
 def custom_openapi():
-    global _consolidated_openapi_cache
-    if _consolidated_openapi_cache is not None:
-        return _consolidated_openapi_cache
-    try:
-        with open(CONSOLIDATED_OPENAPI_PATH, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-        _consolidated_openapi_cache = data
-        return data
-    except FileNotFoundError:
-        return get_openapi(
-            title=app.title,
-            version=app.version,
-            routes=app.routes,
-        )
+    return _openapi_store.get().spec
 
 
+_openapi_store = OpenAPIStore(
+    CONSOLIDATED_OPENAPI_PATH,
+    lambda: get_openapi(title=app.title, version=app.version, routes=app.routes),
+)
 app.openapi = custom_openapi
 
 
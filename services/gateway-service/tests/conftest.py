@@ -0,0 +1,114 @@
+import os
+import time
+import uuid
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from jose import jwt
+
+# Keep imports safe on fresh machines/CI (no Redis or upstream services required).
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("INTERNAL_API_KEY", "dev-internal")
+os.environ.setdefault("REDIS_URL", "")
+os.environ.setdefault("CONSOLIDATED_OPENAPI_PATH", "/nonexistent/openapi.yaml")
+
+import main as gateway_main  # type: ignore
+from app import tokens, upstream  # type: ignore
+from main import SERVICE_URLS, _edge_cache, app  # type: ignore
+
+JWT_TEST_SECRET = "test-secret"
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(autouse=True)
+def _empty_edge_cache():
+    # Public GETs are edge-cached; keep responses from leaking between tests.
+    _edge_cache.purge()
+    yield
+    _edge_cache.purge()
+
+
+class _UnreadStream(httpx.AsyncByteStream):
+    # httpx eagerly reads bytes content; real transports hand back an unread stream.
+    def __init__(self, body: bytes):
+        self._body = body
+
+    async def __aiter__(self):
+        yield self._body
+
+
+@pytest.fixture
+def mock_upstream(client, monkeypatch):
+    """Swap the pooled client for a service with one backed by an in-process handler."""
+
+    def install(service: str, handler):
+        async def transport_handler(request: httpx.Request) -> httpx.Response:
+            await request.aread()
+            resp = handler(request)
+            if not isinstance(resp, httpx.Response):
+                resp = await resp
+            # Relay the raw (still encoded) bytes, as a real transport would.
+            raw = b"".join([chunk async for chunk in resp.stream])
+            return httpx.Response(resp.status_code, headers=resp.headers, stream=_UnreadStream(raw))
+
+        mock = httpx.AsyncClient(
+            base_url=SERVICE_URLS[service], transport=httpx.MockTransport(transport_handler)
+        )
+        monkeypatch.setitem(upstream._clients, service, mock)
+        return mock
+
+    return install
+
+
+class FakeRedis:
+    """The revocation reads the gateway makes; unset keys read as None."""
+
+    def __init__(self):
+        self.values = {}
+
+    async def mget(self, *keys):
+        return [self.values.get(k) for k in keys]
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(gateway_main, "_get_async_redis", lambda: redis)
+    return redis
+
+
+@pytest.fixture
+def jwt_secret(monkeypatch):
+    monkeypatch.setattr(tokens, "JWT_SECRET", JWT_TEST_SECRET)
+    monkeypatch.setattr(tokens, "JWT_ACCEPT_LEGACY_HS256", True)
+    return JWT_TEST_SECRET
+
+
+@pytest.fixture
+def make_token(jwt_secret, fake_redis):
+    """Mint HS256 access tokens the gateway verifies locally. A claim passed as `...` is left out."""
+
+    def make(role: str = "subscriber", **claims) -> str:
+        now = int(time.time())
+        payload = {
+            "sub": str(uuid.uuid4()),
+            "role": role,
+            "email": f"{role}@example.com",
+            "can_assign_leads": False,
+            "can_manage_unassigned_leads": False,
+            "jti": uuid.uuid4().hex,
+            "iat": now,
+            "exp": now + 300,
+        }
+        payload.update(claims)
+        payload = {k: v for k, v in payload.items() if v is not ...}
+        return jwt.encode(payload, jwt_secret, algorithm="HS256")
+
+    return make
@@ -0,0 +1,56 @@
+import json
+import logging
+import queue
+
+from prometheus_client import REGISTRY
+from shared_utils import logging as access_log
+
+
+def _access_events(caplog):
+    return [r.msg for r in caplog.records if isinstance(r.msg, dict) and "status_code" in r.msg]
+
+
+def test_errors_and_slow_requests_survive_sampling(monkeypatch):
+    monkeypatch.setattr(access_log, "ACCESS_LOG_SAMPLE_RATE", 0.0)
+    assert access_log.sample_access(200, 5.0) is None
+    assert access_log.sample_access(404, 5.0) == 1.0
+    assert access_log.sample_access(503, 5.0) == 1.0
+    assert access_log.sample_access(200, access_log.ACCESS_LOG_SLOW_MS) == 1.0
+
+
+def test_sampled_requests_carry_their_rate(monkeypatch):
+    monkeypatch.setattr(access_log, "ACCESS_LOG_SAMPLE_RATE", 0.25)
+    monkeypatch.setattr(access_log.random, "random", lambda: 0.1)
+    assert access_log.sample_access(200, 5.0) == 0.25
+    monkeypatch.setattr(access_log.random, "random", lambda: 0.9)
+    assert access_log.sample_access(200, 5.0) is None
+
+
+def test_middleware_logs_structured_events(client, caplog, monkeypatch):
+    monkeypatch.setattr(access_log, "ACCESS_LOG_SAMPLE_RATE", 0.0)
+    with caplog.at_level(logging.INFO):
+        client.get("/health")
+        client.get("/no-such-route")
+    events = _access_events(caplog)
+    # The 200 was sampled out; the 404 is always kept.
+    assert [(e["path"], e["status_code"]) for e in events] == [("/no-such-route", 404)]
+    assert events[0]["sample_rate"] == 1.0
+
+
+def test_formatter_serializes_dicts_and_leaves_text_alone():
+    formatter = access_log.JsonFormatter("%(message)s")
+    record = logging.LogRecord("svc", logging.INFO, __file__, 1, {"path": "/x"}, None, None)
+    line = json.loads(formatter.format(record))
+    assert line["path"] == "/x"
+    assert "timestamp" in line
+    text = logging.LogRecord("svc", logging.INFO, __file__, 1, "sent %s", ("ok",), None)
+    assert formatter.format(text) == "sent ok"
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = access_log._QueueHandler(queue.Queue(1))
+    before = REGISTRY.get_sample_value("log_records_dropped_total") or 0.0
+    for _ in range(3):
+        handler.emit(logging.LogRecord("svc", logging.INFO, __file__, 1, {"n": 1}, None, None))
+    assert handler.queue.qsize() == 1
+    assert REGISTRY.get_sample_value("log_records_dropped_total") - before == 2
@@ -0,0 +1,153 @@
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+import pytest
+from app import upstream  # type: ignore
+from app.balancer import (  # type: ignore
+    POLICY_LEAST_OUTSTANDING,
+    BalancedTransport,
+    Balancer,
+    is_balanced,
+)
+
+STATIC = "http://lead-1:8000,http://lead-2:8000,http://lead-3:8000"
+
+
+def _client(balancer: Balancer, handler) -> httpx.AsyncClient:
+    transport = BalancedTransport(balancer, httpx.MockTransport(handler))
+    return httpx.AsyncClient(base_url=balancer.base_url, transport=transport)
+
+
+def _echo_host(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"host": request.headers["host"], "url": str(request.url)})
+
+
+def test_service_url_lists_and_dns_names_are_balanced():
+    assert not is_balanced("http://lead-service:8000")
+    assert is_balanced(STATIC)
+    assert is_balanced("dns+http://lead-service-headless:8000")
+    with pytest.raises(ValueError):
+        Balancer("leads", "dns+http://a:8000,http://b:8000")
+
+
+@pytest.mark.parametrize("policy", ["p2c", POLICY_LEAST_OUTSTANDING])
+def test_requests_are_spread_over_every_endpoint(policy):
+    balancer = Balancer("leads", STATIC, policy=policy)
+
+    async def run():
+        async with _client(balancer, _echo_host) as client:
+            return [(await client.get("/api/v1/leads")).json() for _ in range(60)]
+
+    bodies = asyncio.run(run())
+    hosts = Counter(body["host"] for body in bodies)
+    assert set(hosts) == {"lead-1:8000", "lead-2:8000", "lead-3:8000"}
+    assert all(body["url"].startswith(f"http://{body['host']}/api/v1/leads") for body in bodies)
+
+
+def test_least_outstanding_avoids_the_busy_endpoint():
+    balancer = Balancer("leads", STATIC, policy=POLICY_LEAST_OUTSTANDING)
+    busy = balancer.endpoints[0]
+    busy.outstanding = 5
+    assert all(balancer.pick() is not busy for _ in range(50))
+
+
+def test_streamed_response_holds_its_endpoint_until_closed():
+    balancer = Balancer("media", "http://media-1:8000,http://media-2:8000")
+
+    async def run():
+        async with _client(balancer, lambda request: httpx.Response(200, content=b"x" * 10)) as c:
+            async with c.stream("GET", "/api/v1/media/1/download") as response:
+                during = sum(e.outstanding for e in balancer.endpoints)
+                await response.aread()
+            return during, sum(e.outstanding for e in balancer.endpoints)
+
+    assert asyncio.run(run()) == (1, 0)
+
+
+def test_failing_endpoint_is_ejected_and_returns_after_cooldown():
+    balancer = Balancer("leads", STATIC, eject_after=3, eject_seconds=30)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = 503 if request.headers["host"] == "lead-1:8000" else 200
+        return httpx.Response(status, json={"host": request.headers["host"]})
+
+    async def run():
+        async with _client(balancer, handler) as client:
+            return [(await client.get("/api/v1/leads")).status_code for _ in range(60)]
+
+    statuses = asyncio.run(run())
+    assert statuses.count(503) == 3
+    bad = balancer.endpoints[0]
+    assert bad.ejected_until > time.monotonic()
+
+    bad.ejected_until = time.monotonic() - 1
+    assert any(balancer.pick() is bad for _ in range(100))
+
+
+def test_ejection_never_takes_out_more_than_the_cap():
+    balancer = Balancer("leads", STATIC, eject_after=1, max_ejected_percent=50)
+    for endpoint in balancer.endpoints:
+        balancer.record(endpoint, "error", None)
+    now = time.monotonic()
+    assert sum(1 for e in balancer.endpoints if e.ejected_until > now) == 1
+
+
+def test_dns_endpoints_are_re_resolved_and_kept_on_failure():
+    answers = [["10.0.0.1", "10.0.0.2"], OSError("temporary failure"), ["10.0.0.2", "10.0.0.3"]]
+
+    async def resolve(host, port):
+        assert (host, port) == ("lead-service-headless", 8000)
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    balancer = Balancer(
+        "leads", "dns+http://lead-service-headless:8000", dns_refresh_seconds=0, resolve=resolve
+    )
+
+    async def run():
+        seen = []
+        async with _client(balancer, _echo_host) as client:
+            for _ in range(3):
+                body = (await client.get("/api/v1/leads")).json()
+                assert body["host"] == "lead-service-headless:8000"
+                await asyncio.sleep(0)
+                seen.append(sorted(e.key for e in balancer.endpoints))
+        return seen
+
+    assert asyncio.run(run()) == [
+        ["10.0.0.1:8000", "10.0.0.2:8000"],
+        ["10.0.0.1:8000", "10.0.0.2:8000"],
+        ["10.0.0.2:8000", "10.0.0.3:8000"],
+    ]
+
+
+def test_unresolvable_name_fails_like_a_connection_error():
+    async def resolve(host, port):
+        raise OSError("no such host")
+
+    balancer = Balancer("leads", "dns+http://nowhere:8000", resolve=resolve)
+
+    async def run():
+        async with _client(balancer, _echo_host) as client:
+            await client.get("/api/v1/leads")
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(run())
+
+
+def test_configured_endpoint_list_gets_a_balanced_client_and_metrics(client, monkeypatch):
+    monkeypatch.setattr(upstream, "_clients", {})
+    monkeypatch.setattr(upstream, "_balancers", {})
+    upstream.start_clients({"leads": STATIC, "plans": "http://plan-service:8000"})
+    assert set(upstream._balancers) == {"leads"}
+    assert isinstance(upstream.get_client("leads")._transport, BalancedTransport)
+    assert not isinstance(upstream.get_client("plans")._transport, BalancedTransport)
+
+    upstream.update_pool_metrics()
+    text = client.get("/metrics").text
+    assert 'gateway_upstream_endpoint_outstanding{endpoint="lead-2:8000",upstream="leads"}' in text
+    asyncio.run(upstream.close_clients())
@@ -0,0 +1,234 @@
+import asyncio
+import base64
+import time
+
+import httpx
+import main as gateway_main  # type: ignore
+import pytest
+from app import batch, resilience  # type: ignore
+
+
+@pytest.fixture
+def upstreams(jwt_secret, fake_redis, mock_upstream):
+    seen = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        await asyncio.sleep(0.2)
+        if request.url.path.endswith("/missing"):
+            return httpx.Response(404, json={"detail": "Not found"})
+        body = request.content.decode() or None
+        return httpx.Response(
+            200,
+            json={
+                "path": request.url.path,
+                "role": request.headers.get("x-user-role"),
+                "body": body,
+            },
+        )
+
+    for service in ("subscribers", "subscriptions", "billing", "plans"):
+        mock_upstream(service, handler)
+    return seen
+
+
+def _batch(client, requests, token=None):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    return client.post("/api/v1/batch", json={"requests": requests}, headers=headers)
+
+
+def test_sub_requests_run_concurrently_and_keep_order(client, upstreams, make_token):
+    token = make_token("subscriber")
+    started = time.monotonic()
+    resp = _batch(
+        client,
+        [
+            {"id": "profile", "method": "GET", "path": "/api/v1/subscribers/me"},
+            {"id": "subs", "method": "GET", "path": "/api/v1/subscriptions/me"},
+            {"id": "invoices", "method": "GET", "path": "/api/v1/billing/me/invoices"},
+        ],
+        token,
+    )
+    elapsed = time.monotonic() - started
+
+    assert resp.status_code == 200
+    items = resp.json()["responses"]
+    assert [i["id"] for i in items] == ["profile", "subs", "invoices"]
+    assert [i["status"] for i in items] == [200, 200, 200]
+    assert items[2]["body"]["path"] == "/api/v1/billing/me/invoices"
+    assert all(i["body"]["role"] == "subscriber" for i in items)
+    # Three 200ms upstream calls dispatched together, not one after another.
+    assert elapsed < 0.5
+    assert len({r.headers["x-correlation-id"] for r in upstreams}) == 3
+
+
+def test_each_item_is_authorized_on_its_own(client, upstreams, make_token):
+    resp = _batch(
+        client,
+        [
+            {"method": "GET", "path": "/api/v1/subscribers/me"},
+            {"method": "GET", "path": "/api/v1/billing/admin/invoices"},
+        ],
+        make_token("subscriber"),
+    )
+    statuses = [i["status"] for i in resp.json()["responses"]]
+    assert statuses == [200, 403]
+    assert [r.url.path for r in upstreams] == ["/api/v1/subscribers/me"]
+
+
+def test_anonymous_batch_only_reaches_public_routes(client, upstreams):
+    resp = _batch(
+        client,
+        [
+            {"method": "GET", "path": "/api/v1/plans"},
+            {"method": "GET", "path": "/api/v1/subscribers/me"},
+        ],
+    )
+    assert resp.status_code == 200
+    assert [i["status"] for i in resp.json()["responses"]] == [200, 401]
+
+
+def test_bodies_and_upstream_errors_are_per_item(client, upstreams, make_token):
+    resp = _batch(
+        client,
+        [
+            {"id": "a", "method": "PUT", "path": "/api/v1/subscribers/me", "body": {"name": "A"}},
+            {"id": "b", "method": "GET", "path": "/api/v1/subscribers/missing"},
+            {"id": "c", "method": "TRACE", "path": "/api/v1/subscribers/me"},
+            {"id": "d", "method": "GET", "path": "/health"},
+            {"id": "e", "method": "POST", "path": "/api/v1/batch"},
+        ],
+        make_token("subscriber"),
+    )
+    items = {i["id"]: i for i in resp.json()["responses"]}
+    assert items["a"]["status"] == 200
+    assert items["a"]["body"]["body"] == '{"name": "A"}'
+    assert items["b"]["status"] == 404
+    assert items["b"]["body"] == {"detail": "Not found"}
+    assert [items[k]["status"] for k in "cde"] == [400, 400, 400]
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"requests": []},
+        {"requests": "nope"},
+        {"requests": [{"path": "/api/v1/plans"}] * (batch.BATCH_MAX_REQUESTS + 1)},
+    ],
+)
+def test_malformed_envelope_is_rejected(client, payload):
+    resp = client.post("/api/v1/batch", json=payload)
+    assert resp.status_code == 400
+
+
+def test_batch_metrics_are_exported(client, upstreams):
+    client.post("/api/v1/batch", json={"requests": [{"path": "/api/v1/plans"}]})
+    body = client.get("/metrics").text
+    assert 'path="/api/v1/batch"' in body
+    assert "gateway_batch_items_total" in body
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/api/v1/../metrics",
+        "/api/v1/plans/../../../metrics",
+        "/api/v1/./plans",
+        "/api/v1/%2e%2e/metrics",
+        "/api/v1/plans%2F..%2F..%2Fmetrics",
+        "/api/v1//plans",
+        "/api/v1/plans\\..\\..\\metrics",
+    ],
+)
+def test_paths_that_normalise_out_of_the_prefix_are_rejected(client, upstreams, path):
+    resp = _batch(client, [{"id": "a", "method": "GET", "path": path}])
+    assert resp.status_code == 200
+    [item] = resp.json()["responses"]
+    assert item["status"] == 400
+    assert upstreams == []
+
+
+def test_declared_oversize_body_is_rejected_before_reading(client, monkeypatch):
+    monkeypatch.setattr(gateway_main, "BATCH_MAX_BODY_BYTES", 64)
+    resp = client.post(
+        "/api/v1/batch",
+        content=b"{}",
+        headers={"Content-Type": "application/json", "Content-Length": "65"},
+    )
+    assert resp.status_code == 413
+    assert resp.json()["max_bytes"] == 64
+
+
+def test_streamed_oversize_body_is_cut_off(client, monkeypatch):
+    monkeypatch.setattr(gateway_main, "BATCH_MAX_BODY_BYTES", 64)
+
+    def chunks():
+        for _ in range(10):
+            yield b" " * 32
+
+    resp = client.post(
+        "/api/v1/batch", content=chunks(), headers={"Content-Type": "application/json"}
+    )
+    assert resp.status_code == 413
+
+
+@pytest.fixture
+def media(jwt_secret, fake_redis, mock_upstream):
+    pdf = b"%PDF-1.7\n\xe2\xe3\xcf\xd3\n" + bytes(range(256))
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/large"):
+            return httpx.Response(200, content=b"x" * 4096, headers={"content-type": "text/plain"})
+        return httpx.Response(200, content=pdf, headers={"content-type": "application/pdf"})
+
+    mock_upstream("media", handler)
+    return pdf
+
+
+def test_binary_items_are_relayed_as_base64(client, media, make_token):
+    resp = _batch(
+        client, [{"id": "pdf", "path": "/api/v1/media/invoice.pdf"}], make_token("subscriber")
+    )
+
+    [item] = resp.json()["responses"]
+    assert item["status"] == 200
+    assert item["encoding"] == "base64"
+    assert base64.b64decode(item["body"]) == media
+
+
+def test_oversize_item_gets_413_and_the_rest_still_run(client, media, make_token, monkeypatch):
+    monkeypatch.setattr(gateway_main, "BATCH_ITEM_MAX_BYTES", 1024)
+    resp = _batch(
+        client,
+        [
+            {"id": "big", "path": "/api/v1/media/large"},
+            {"id": "pdf", "path": "/api/v1/media/invoice.pdf"},
+        ],
+        make_token("subscriber"),
+    )
+
+    items = {i["id"]: i for i in resp.json()["responses"]}
+    assert items["big"]["status"] == 413
+    assert "1024 bytes" in items["big"]["body"]["detail"]
+    assert items["pdf"]["status"] == 200
+    assert resilience.get_guard("media").bulkhead.in_flight == 0
+
+
+def test_capped_app_stops_the_body_at_the_limit():
+    produced = []
+
+    async def downloader(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        for n in range(100):
+            produced.append(n)
+            await send({"type": "http.response.body", "body": b"x" * 100, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def run():
+        transport = httpx.ASGITransport(app=batch.CappedApp(downloader, 250))
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as c:
+            await c.get("/")
+
+    with pytest.raises(batch.ItemTooLarge):
+        asyncio.run(run())
+    assert len(produced) == 3
@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+import main as gateway_main  # type: ignore
+import pytest
+from app.cache import SingleFlight, TTLCache  # type: ignore
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache("t_lru", max_entries=2, max_bytes=1_000)
+    far = time.time() + 60
+    cache.set("a", 1, expires_at=far, size=1)
+    cache.set("b", 2, expires_at=far, size=1)
+    assert cache.get("a") == 1
+    cache.set("c", 3, expires_at=far, size=1)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_respects_byte_cap():
+    cache = TTLCache("t_bytes", max_entries=100, max_bytes=10)
+    far = time.time() + 60
+    cache.set("a", "x", expires_at=far, size=6)
+    cache.set("b", "y", expires_at=far, size=6)
+    assert len(cache) == 1
+    assert cache.get("b") == "y"
+    cache.set("huge", "z", expires_at=far, size=11)
+    assert cache.get("huge") is None
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache("t_exp", max_entries=10, max_bytes=1_000)
+    cache.set("a", 1, expires_at=time.time() + 0.05, size=1)
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_single_flight_collapses_concurrent_calls():
+    flight = SingleFlight("t_flight")
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(10)))
+
+    assert asyncio.run(run()) == ["done"] * 10
+    assert calls == 1
+    assert flight.in_flight() == 0
+
+
+def test_single_flight_shares_exceptions():
+    flight = SingleFlight("t_flight_err")
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            *(flight.do("k", work) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_single_flight_survives_cancelled_leader():
+    flight = SingleFlight("t_flight_cancel")
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == "done"
+
+
+def test_concurrent_validation_of_same_token_calls_auth_once(monkeypatch):
+    calls = 0
+
+    async def fake_fetch(token, correlation_id):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"user_id": "u1", "role": "admin", "_exp_ts": time.time() + 600}
+
+    monkeypatch.setattr(gateway_main, "_fetch_token_claims", fake_fetch)
+    monkeypatch.setattr(
+        gateway_main,
+        "_token_cache",
+        TTLCache("token_test", max_entries=10, max_bytes=10_000),
+    )
+
+    async def run():
+        return await asyncio.gather(
+            *(gateway_main._validate_token_via_auth("tok", "cid") for _ in range(20))
+        )
+
+    results = asyncio.run(run())
+    assert all(r and r["user_id"] == "u1" for r in results)
+    assert calls == 1
+    assert asyncio.run(gateway_main._validate_token_via_auth("tok", "cid"))["user_id"] == "u1"
+    assert calls == 1
+
+
+@pytest.mark.parametrize("cap,expected_max", [(5, 5), (0, 600)])
+def test_token_cache_ttl_is_capped(monkeypatch, cap, expected_max):
+    async def fake_fetch(token, correlation_id):
+        return {"user_id": "u1", "_exp_ts": time.time() + 600}
+
+    cache = TTLCache("token_ttl_test", max_entries=10, max_bytes=10_000)
+    monkeypatch.setattr(gateway_main, "_fetch_token_claims", fake_fetch)
+    monkeypatch.setattr(gateway_main, "_token_cache", cache)
+    monkeypatch.setattr(gateway_main, "TOKEN_CACHE_MAX_TTL_SECONDS", cap)
+    asyncio.run(gateway_main._validate_token_via_auth("tok", "cid"))
+    ((_, expires_at, _),) = cache._entries.values()
+    assert expires_at - time.time() <= expected_max + 1
@@ -0,0 +1,83 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import main as gateway_main  # type: ignore
+import pytest
+from prometheus_client import REGISTRY
+
+
+def _fanout_count() -> float:
+    return (
+        REGISTRY.get_sample_value("gateway_singleflight_fanout_count", {"flight": "public_get"})
+        or 0.0
+    )
+
+
+def _fanout_sum() -> float:
+    return (
+        REGISTRY.get_sample_value("gateway_singleflight_fanout_sum", {"flight": "public_get"})
+        or 0.0
+    )
+
+
+@pytest.fixture
+def slow_catalog(mock_upstream):
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        await asyncio.sleep(0.3)
+        return httpx.Response(200, json={"items": ["basic", "premium"]})
+
+    mock_upstream("plans", handler)
+    return calls
+
+
+def _burst(client, path: str, n: int = 8):
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        return list(pool.map(lambda _: client.get(path), range(n)))
+
+
+@pytest.mark.parametrize("cache_enabled", [True, False])
+def test_identical_concurrent_public_gets_share_one_upstream_call(
+    client, slow_catalog, monkeypatch, cache_enabled
+):
+    monkeypatch.setattr(gateway_main, "EDGE_CACHE_ENABLED", cache_enabled)
+    count_before, sum_before = _fanout_count(), _fanout_sum()
+
+    responses = _burst(client, "/api/v1/plans?category=ro")
+
+    assert [r.status_code for r in responses] == [200] * 8
+    assert all(r.json() == {"items": ["basic", "premium"]} for r in responses)
+    assert len(slow_catalog) == 1
+    # One executed call served all eight callers.
+    assert _fanout_count() - count_before == 1
+    assert _fanout_sum() - sum_before == 8
+
+
+def test_each_waiter_gets_its_own_correlation_id(client, slow_catalog, monkeypatch):
+    monkeypatch.setattr(gateway_main, "EDGE_CACHE_ENABLED", False)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(
+            pool.map(
+                lambda i: client.get("/api/v1/plans", headers={"x-correlation-id": f"c{i}"}),
+                range(4),
+            )
+        )
+    assert len(slow_catalog) == 1
+    assert sorted(r.headers["x-correlation-id"] for r in responses) == ["c0", "c1", "c2", "c3"]
+
+
+def test_different_queries_are_not_collapsed(client, slow_catalog, monkeypatch):
+    monkeypatch.setattr(gateway_main, "EDGE_CACHE_ENABLED", False)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda q: client.get(f"/api/v1/plans?page={q}"), range(2)))
+    assert len(slow_catalog) == 2
+
+
+def test_coalescing_can_be_disabled(client, slow_catalog, monkeypatch):
+    monkeypatch.setattr(gateway_main, "EDGE_CACHE_ENABLED", False)
+    monkeypatch.setattr(gateway_main, "COALESCE_PUBLIC_GETS", False)
+    _burst(client, "/api/v1/plans", n=3)
+    assert len(slow_catalog) == 3
@@ -0,0 +1,118 @@
+import gzip
+import json
+
+import brotli
+import httpx
+import pytest
+from app.compression import negotiate  # type: ignore
+
+LARGE = {"items": [{"id": i, "name": f"lead-{i}", "status": "new"} for i in range(200)]}
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip, deflate, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0.1, gzip;q=0.9", "gzip"),
+        ("br;q=0, gzip;q=0", None),
+        ("identity", None),
+        ("*", "br"),
+        ("", None),
+    ],
+)
+def test_negotiation(header, expected):
+    assert negotiate(header) == expected
+
+
+def _json_upstream(payload, headers=None):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=payload, headers=headers or {})
+
+    return handler
+
+
+def _raw_get(client, path, encoding):
+    # httpx decodes transparently; stream to inspect the bytes actually sent.
+    with client.stream("GET", path, headers={"accept-encoding": encoding}) as resp:
+        return resp, b"".join(resp.iter_raw())
+
+
+def test_large_json_is_gzipped(client, mock_upstream):
+    mock_upstream("auth", _json_upstream(LARGE))
+    resp, raw = _raw_get(client, "/api/v1/auth/sessions", "gzip")
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in resp.headers["vary"].lower()
+    # Proxied bodies are streamed, so they are compressed on the fly without a Content-Length.
+    assert "content-length" not in resp.headers
+    assert json.loads(gzip.decompress(raw)) == LARGE
+    assert len(raw) < len(json.dumps(LARGE))
+
+
+def test_brotli_preferred_when_accepted(client, mock_upstream):
+    mock_upstream("auth", _json_upstream(LARGE))
+    resp, raw = _raw_get(client, "/api/v1/auth/sessions", "gzip, br")
+    assert resp.headers["content-encoding"] == "br"
+    assert json.loads(brotli.decompress(raw)) == LARGE
+
+
+def test_small_bodies_are_not_compressed(client, mock_upstream):
+    mock_upstream("auth", _json_upstream({"ok": True}))
+    resp, raw = _raw_get(client, "/api/v1/auth/sessions", "gzip")
+    assert "content-encoding" not in resp.headers
+    assert json.loads(raw) == {"ok": True}
+
+
+def test_disallowed_content_types_are_not_compressed(client, mock_upstream):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, content=b"\x89PNG" + b"0" * 4096, headers={"content-type": "image/png"}
+        )
+
+    mock_upstream("auth", handler)
+    resp, raw = _raw_get(client, "/api/v1/auth/sessions", "gzip")
+    assert "content-encoding" not in resp.headers
+    assert len(raw) == 4100
+
+
+def test_already_compressed_upstream_passes_through(client, mock_upstream):
+    body = gzip.compress(json.dumps(LARGE).encode())
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            content=body,
+            headers={"content-type": "application/json", "content-encoding": "gzip"},
+        )
+
+    mock_upstream("auth", handler)
+    resp, raw = _raw_get(client, "/api/v1/auth/sessions", "gzip, br")
+    assert resp.headers["content-encoding"] == "gzip"
+    assert raw == body
+
+
+def test_identity_clients_get_plain_bodies(client, mock_upstream):
+    mock_upstream("auth", _json_upstream(LARGE))
+    resp, raw = _raw_get(client, "/api/v1/auth/sessions", "identity")
+    assert "content-encoding" not in resp.headers
+    assert json.loads(raw) == LARGE
+
+
+def test_cached_etag_is_weakened_and_still_revalidates(client, mock_upstream):
+    mock_upstream("plans", _json_upstream(LARGE))
+    resp, raw = _raw_get(client, "/api/v1/plans", "gzip")
+    etag = resp.headers["etag"]
+    assert etag.startswith('W/"')
+    # Cached bodies go out in one piece, so the compressed length is known.
+    assert resp.headers["content-length"] == str(len(raw))
+
+    again = client.get("/api/v1/plans", headers={"if-none-match": etag, "accept-encoding": "gzip"})
+    assert again.status_code == 304
+
+
+def test_compression_cpu_time_is_exported(client, mock_upstream):
+    mock_upstream("auth", _json_upstream(LARGE))
+    _raw_get(client, "/api/v1/auth/sessions", "gzip")
+    text = client.get("/metrics").text
+    assert 'gateway_compression_cpu_seconds_total{encoding="gzip"}' in text
+    assert 'gateway_compression_bytes_total{encoding="gzip",stage="out"}' in text
@@ -0,0 +1,188 @@
+import time
+
+import httpx
+import main as gateway_main  # type: ignore
+import pytest
+from app import edge_cache  # type: ignore
+from app.edge_cache import EdgeCacheRule, cache_key, etag_matches  # type: ignore
+
+
+class _Catalog:
+    def __init__(self, status_code: int = 200, headers: dict | None = None):
+        self.calls = []
+        self.version = 1
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append(request)
+        return httpx.Response(
+            self.status_code, json={"version": self.version}, headers=self.headers
+        )
+
+
+def test_cache_key_normalises_query_and_trailing_slash():
+    assert cache_key("/api/v1/plans/", "b=2&a=1") == cache_key("/api/v1/plans", "a=1&b=2")
+    assert cache_key("/api/v1/plans", "a=1") != cache_key("/api/v1/plans", "a=2")
+
+
+def test_etag_matching_is_weak():
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"x"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_repeated_public_get_is_served_from_cache(client, mock_upstream):
+    catalog = _Catalog()
+    mock_upstream("plans", catalog)
+
+    first = client.get("/api/v1/plans?category=ro&page=1")
+    second = client.get("/api/v1/plans?page=1&category=ro")
+
+    assert first.json() == second.json() == {"version": 1}
+    assert len(catalog.calls) == 1
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert first.headers["etag"] == second.headers["etag"]
+    assert "max-age=" in second.headers["cache-control"]
+    # Client credentials and cookies are never sent upstream on a cache fill.
+    assert "authorization" not in catalog.calls[0].headers
+
+
+def test_if_none_match_returns_304(client, mock_upstream):
+    mock_upstream("content", _Catalog())
+    etag = client.get("/api/v1/content/case-studies/solar").headers["etag"]
+
+    resp = client.get("/api/v1/content/case-studies/solar", headers={"if-none-match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["etag"] == etag
+
+
+def test_authenticated_and_uncacheable_requests_bypass(client, mock_upstream):
+    catalog = _Catalog(headers={"cache-control": "no-store"})
+    mock_upstream("plans", catalog)
+    client.get("/api/v1/plans")
+    client.get("/api/v1/plans")
+    assert len(catalog.calls) == 2
+
+    catalog.headers = {}
+    client.get("/api/v1/plans", headers={"authorization": "Bearer abc"})
+    client.get("/api/v1/plans", headers={"authorization": "Bearer abc"})
+    assert len(catalog.calls) == 4
+
+
+def test_error_responses_are_not_cached(client, mock_upstream):
+    catalog = _Catalog(status_code=404)
+    mock_upstream("plans", catalog)
+    assert client.get("/api/v1/plans/missing").status_code == 404
+    assert client.get("/api/v1/plans/missing").status_code == 404
+    assert len(catalog.calls) == 2
+
+
+def test_stale_entry_is_served_while_revalidating(client, mock_upstream, monkeypatch):
+    monkeypatch.setattr(
+        edge_cache,
+        "EDGE_CACHE_RULES",
+        (EdgeCacheRule("plans", "/api/v1/plans", ttl_seconds=0, stale_seconds=60),),
+    )
+    catalog = _Catalog()
+    mock_upstream("plans", catalog)
+    client.get("/api/v1/plans")
+    catalog.version = 2
+
+    stale = client.get("/api/v1/plans")
+    assert stale.headers["x-cache"] == "STALE"
+    assert stale.json() == {"version": 1}
+
+    deadline = time.time() + 2
+    while len(catalog.calls) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(catalog.calls) == 2
+    assert client.get("/api/v1/plans").json() == {"version": 2}
+
+
+@pytest.mark.parametrize("method", ["POST", "PATCH"])
+def test_successful_write_purges_catalog(client, mock_upstream, monkeypatch, method):
+    monkeypatch.setattr(
+        gateway_main,
+        "_authenticate",
+        _fake_authenticate,
+    )
+    catalog = _Catalog()
+    mock_upstream("plans", catalog)
+    client.get("/api/v1/plans")
+    assert len(gateway_main._edge_cache) == 1
+
+    path = "/api/v1/plans" if method == "POST" else "/api/v1/plans/p1"
+    client.request(method, path, json={}, headers={"authorization": "Bearer admin"})
+    assert len(gateway_main._edge_cache) == 0
+
+
+async def _fake_authenticate(token: str, correlation_id: str):
+    return {"user_id": "u1", "role": "admin", "email": "a@example.com"}
+
+
+def test_purge_endpoint_requires_internal_key(client, mock_upstream):
+    mock_upstream("plans", _Catalog())
+    mock_upstream("content", _Catalog())
+    client.get("/api/v1/plans")
+    client.get("/api/v1/content/case-studies")
+
+    assert client.post("/internal/edge-cache/purge", json={}).status_code == 403
+
+    resp = client.post(
+        "/internal/edge-cache/purge",
+        json={"prefix": "/api/v1/plans"},
+        headers={"X-Internal-API-Key": "dev-internal"},
+    )
+    assert resp.json() == {"purged": 1}
+    assert len(gateway_main._edge_cache) == 1
+
+
+def test_failed_revalidation_keeps_the_stale_copy(client, mock_upstream, monkeypatch):
+    monkeypatch.setattr(
+        edge_cache,
+        "EDGE_CACHE_RULES",
+        (EdgeCacheRule("plans", "/api/v1/plans", ttl_seconds=0, stale_seconds=60),),
+    )
+    catalog = _Catalog()
+    mock_upstream("plans", catalog)
+    client.get("/api/v1/plans")
+    catalog.status_code = 500
+
+    assert client.get("/api/v1/plans").headers["x-cache"] == "STALE"
+    deadline = time.time() + 2
+    while (
+        len(catalog.calls) < 2 or gateway_main._edge_cache._refreshing
+    ) and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(catalog.calls) >= 2
+
+    resp = client.get("/api/v1/plans")
+    assert resp.status_code == 200
+    assert resp.headers["x-cache"] == "STALE"
+    assert resp.json() == {"version": 1}
+
+
+def test_404_on_revalidation_evicts_the_stale_copy(client, mock_upstream, monkeypatch):
+    monkeypatch.setattr(
+        edge_cache,
+        "EDGE_CACHE_RULES",
+        (EdgeCacheRule("plans", "/api/v1/plans", ttl_seconds=0, stale_seconds=60),),
+    )
+    catalog = _Catalog()
+    mock_upstream("plans", catalog)
+    client.get("/api/v1/plans/solar")
+    catalog.status_code = 404
+
+    client.get("/api/v1/plans/solar")
+    deadline = time.time() + 2
+    while (
+        len(catalog.calls) < 2 or gateway_main._edge_cache._refreshing
+    ) and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert client.get("/api/v1/plans/solar").status_code == 404
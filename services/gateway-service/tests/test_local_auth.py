@@ -0,0 +1,223 @@
+import asyncio
+import functools
+import time
+import uuid
+
+import httpx
+import main as gateway_main  # type: ignore
+import pytest
+from app import tokens  # type: ignore
+from jose import jwt
+
+
+@pytest.fixture
+def admin_token(make_token):
+    return functools.partial(
+        make_token,
+        "admin",
+        subscriber_id=None,
+        can_assign_leads=True,
+        can_manage_unassigned_leads=True,
+    )
+
+
+@pytest.fixture
+def local_auth(jwt_secret, fake_redis, mock_upstream):
+    remote_calls = []
+
+    def auth_handler(request: httpx.Request) -> httpx.Response:
+        remote_calls.append(request.url.path)
+        return httpx.Response(
+            200,
+            json={
+                "valid": True,
+                "user_id": str(uuid.uuid4()),
+                "email": "remote@example.com",
+                "role": "admin",
+                "can_assign_leads": False,
+                "can_manage_unassigned_leads": False,
+                "expires_at": "2999-01-01T00:00:00Z",
+            },
+        )
+
+    mock_upstream("auth", auth_handler)
+    forwarded = []
+
+    def billing_handler(request: httpx.Request) -> httpx.Response:
+        forwarded.append(dict(request.headers))
+        return httpx.Response(200, json={"items": []})
+
+    mock_upstream("billing", billing_handler)
+    return fake_redis, remote_calls, forwarded
+
+
+def _get(client, token):
+    return client.get(
+        "/api/v1/billing/admin/invoices", headers={"Authorization": f"Bearer {token}"}
+    )
+
+
+def test_valid_token_is_verified_without_auth_round_trip(client, local_auth, admin_token):
+    _, remote_calls, forwarded = local_auth
+    user_id = str(uuid.uuid4())
+    resp = _get(client, admin_token(sub=user_id))
+    assert resp.status_code == 200
+    assert remote_calls == []
+    assert forwarded[-1]["x-user-id"] == user_id
+    assert forwarded[-1]["x-can-assign-leads"] == "true"
+
+
+def test_bad_signature_is_rejected_locally(client, local_auth):
+    _, remote_calls, _ = local_auth
+    token = jwt.encode({"sub": "x", "exp": int(time.time()) + 60}, "other", algorithm="HS256")
+    assert _get(client, token).status_code == 401
+    assert remote_calls == []
+
+
+def test_hs256_needs_the_legacy_flag_to_be_verified_locally(
+    client, local_auth, admin_token, monkeypatch
+):
+    _, remote_calls, _ = local_auth
+    monkeypatch.setattr(tokens, "JWT_ACCEPT_LEGACY_HS256", False)
+    assert _get(client, admin_token()).status_code == 200
+    assert remote_calls == ["/api/v1/auth/validate"]
+
+
+def test_expired_token_is_rejected_locally(client, local_auth, admin_token):
+    _, remote_calls, _ = local_auth
+    assert _get(client, admin_token(exp=int(time.time()) - 10)).status_code == 401
+    assert remote_calls == []
+
+
+def test_revoked_jti_is_rejected(client, local_auth, admin_token):
+    redis, _, _ = local_auth
+    jti = uuid.uuid4().hex
+    redis.values[f"{tokens.REVOKED_JTI_PREFIX}{jti}"] = "1"
+    assert _get(client, admin_token(jti=jti)).status_code == 401
+
+
+def test_deactivated_user_tokens_issued_before_revocation_are_rejected(
+    client, local_auth, admin_token
+):
+    redis, _, _ = local_auth
+    user_id = str(uuid.uuid4())
+    now = int(time.time())
+    redis.values[f"{tokens.REVOKED_USER_PREFIX}{user_id}"] = str(now)
+    assert _get(client, admin_token(sub=user_id, iat=now - 5)).status_code == 401
+    assert _get(client, admin_token(sub=user_id, iat=now + 5)).status_code == 200
+
+
+def test_legacy_token_without_claims_falls_back_to_auth_service(client, local_auth, admin_token):
+    _, remote_calls, _ = local_auth
+    resp = _get(client, admin_token(can_assign_leads=..., can_manage_unassigned_leads=...))
+    assert resp.status_code == 200
+    assert remote_calls == ["/api/v1/auth/validate"]
+
+
+def test_unknown_revocation_state_falls_back_to_auth_service(
+    client, local_auth, admin_token, monkeypatch
+):
+    _, remote_calls, _ = local_auth
+    monkeypatch.setattr(gateway_main, "_get_async_redis", lambda: None)
+    assert _get(client, admin_token()).status_code == 200
+    assert remote_calls == ["/api/v1/auth/validate"]
+
+
+def test_token_minted_before_a_claims_change_is_revalidated(client, local_auth, admin_token):
+    redis, remote_calls, forwarded = local_auth
+    user_id = str(uuid.uuid4())
+    redis.values[f"{tokens.CLAIMS_VERSION_PREFIX}{user_id}"] = "2"
+
+    assert _get(client, admin_token(sub=user_id, cv=2)).status_code == 200
+    assert remote_calls == []
+
+    # Capabilities changed after this token was minted: auth-service answers from the database.
+    assert _get(client, admin_token(sub=user_id, cv=1)).status_code == 200
+    assert remote_calls == ["/api/v1/auth/validate"]
+    assert forwarded[-1]["x-can-assign-leads"] == "false"
+
+
+def test_unversioned_token_is_current_until_the_first_claims_change(
+    client, local_auth, admin_token
+):
+    redis, remote_calls, _ = local_auth
+    user_id = str(uuid.uuid4())
+    assert _get(client, admin_token(sub=user_id)).status_code == 200
+    assert remote_calls == []
+    redis.values[f"{tokens.CLAIMS_VERSION_PREFIX}{user_id}"] = "1"
+    assert _get(client, admin_token(sub=user_id)).status_code == 200
+    assert remote_calls == ["/api/v1/auth/validate"]
+
+
+def _rsa_key_pair(kid: str):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from jose import jwk
+
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public = jwk.construct(pem, "RS256").public_key().to_dict()
+    return pem, {**public, "kid": kid, "use": "sig", "alg": "RS256"}
+
+
+@pytest.fixture
+def jwks(monkeypatch):
+    pem, public = _rsa_key_pair("2026-01")
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(dict(request.headers))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"keys": [public]}, headers={"ETag": '"v1"'})
+
+    keys = tokens.JWKSKeySet(
+        tokens.JWKS_PATH,
+        client=lambda: httpx.AsyncClient(
+            base_url="http://auth-service:8000", transport=httpx.MockTransport(handler)
+        ),
+    )
+    monkeypatch.setattr(tokens, "_jwks", keys)
+    return keys, pem, requests
+
+
+def _rs256_token(pem: str, kid: str, token: str) -> str:
+    claims = jwt.get_unverified_claims(token)
+    return jwt.encode(claims, pem, algorithm="RS256", headers={"kid": kid})
+
+
+def test_rs256_token_is_verified_with_the_published_keys(
+    client, local_auth, admin_token, jwks, monkeypatch
+):
+    _, remote_calls, forwarded = local_auth
+    keys, pem, requests = jwks
+    monkeypatch.setattr(tokens, "JWT_SECRET", "")
+    assert asyncio.run(keys.refresh())
+    user_id = str(uuid.uuid4())
+
+    resp = _get(client, _rs256_token(pem, "2026-01", admin_token(sub=user_id)))
+    assert resp.status_code == 200
+    assert remote_calls == []
+    assert forwarded[-1]["x-user-id"] == user_id
+
+    # Revalidation is conditional and keeps the keys it already has.
+    assert asyncio.run(keys.refresh())
+    assert requests[-1]["if-none-match"] == '"v1"'
+    assert keys.get("2026-01") is not None
+
+
+def test_rs256_token_from_an_unknown_key_falls_back_to_auth_service(
+    client, local_auth, admin_token, jwks
+):
+    _, remote_calls, _ = local_auth
+    keys, _, _ = jwks
+    assert asyncio.run(keys.refresh())
+    other_pem, _ = _rsa_key_pair("2026-02")
+
+    resp = _get(client, _rs256_token(other_pem, "2026-02", admin_token()))
+    assert resp.status_code == 200
+    assert remote_calls == ["/api/v1/auth/validate"]
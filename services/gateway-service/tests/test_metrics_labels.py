@@ -0,0 +1,55 @@
+import httpx
+from prometheus_client import REGISTRY
+
+
+def _count(**labels) -> float:
+    return REGISTRY.get_sample_value("http_requests_total", labels) or 0.0
+
+
+def test_proxied_requests_are_labelled_by_template_and_upstream(client, mock_upstream):
+    mock_upstream("plans", lambda request: httpx.Response(200, json={}))
+    labels = {
+        "service": "gateway-service",
+        "method": "GET",
+        "path": "/api/v1/{service}/{path:path}",
+        "upstream": "plans",
+        "status_code": "200",
+    }
+    before = _count(**labels)
+    client.get("/api/v1/plans/11111111-1111-1111-1111-111111111111")
+    client.get("/api/v1/plans/22222222-2222-2222-2222-222222222222")
+    assert _count(**labels) == before + 2
+
+    text = client.get("/metrics").text
+    assert "11111111-1111-1111-1111-111111111111" not in text
+
+
+def test_unrouted_requests_share_the_unmatched_bucket(client):
+    labels = {
+        "service": "gateway-service",
+        "method": "GET",
+        "path": "unmatched",
+        "upstream": "none",
+        "status_code": "404",
+    }
+    before = _count(**labels)
+    client.get("/no/such/route/a")
+    client.get("/no/such/route/b")
+    assert _count(**labels) == before + 2
+
+
+def test_path_labels_are_capped(client, monkeypatch):
+    from shared_utils import server
+
+    monkeypatch.setattr(server, "METRICS_MAX_PATH_LABELS", 0)
+    monkeypatch.setattr(server, "_metric_path_labels", set())
+    labels = {
+        "service": "gateway-service",
+        "method": "GET",
+        "path": "overflow",
+        "upstream": "none",
+        "status_code": "200",
+    }
+    before = _count(**labels)
+    client.get("/health")
+    assert _count(**labels) == before + 1
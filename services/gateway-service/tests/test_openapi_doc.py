@@ -0,0 +1,79 @@
+import gzip
+import os
+
+import main as gateway_main  # type: ignore
+import pytest
+import yaml
+from app.openapi_doc import OpenAPIStore  # type: ignore
+
+
+def _write(path, title: str) -> None:
+    path.write_text(yaml.safe_dump({"openapi": "3.0.0", "info": {"title": title}, "paths": {}}))
+
+
+@pytest.fixture
+def spec_file(tmp_path, monkeypatch):
+    path = tmp_path / "openapi.yaml"
+    _write(path, "v1")
+    store = OpenAPIStore(str(path), lambda: {"generated": True})
+    monkeypatch.setattr(gateway_main, "_openapi_store", store)
+    return path
+
+
+def test_file_is_read_once_until_it_changes(spec_file, monkeypatch):
+    store = gateway_main._openapi_store
+    first = store.get()
+    assert first.spec["info"]["title"] == "v1"
+    assert store.get() is first
+
+    _write(spec_file, "version two")
+    assert store.get().spec["info"]["title"] == "version two"
+    assert store.get().etag != first.etag
+
+
+def test_missing_file_falls_back_to_generated_schema_once(tmp_path):
+    calls = []
+    store = OpenAPIStore(str(tmp_path / "missing.yaml"), lambda: calls.append(1) or {"info": {}})
+    assert store.get() is store.get()
+    assert calls == [1]
+
+
+def test_unreadable_update_keeps_serving_the_last_good_document(spec_file):
+    store = gateway_main._openapi_store
+    good = store.get()
+    spec_file.write_text("paths: [unterminated")
+    assert store.get() is good
+
+
+def test_serves_precompressed_variant_with_etag(client, spec_file):
+    resp = client.get("/openapi.yaml", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["vary"] == "Accept-Encoding"
+    assert resp.headers["etag"].endswith('-gzip"')
+    assert yaml.safe_load(resp.content)["info"]["title"] == "v1"
+    document = gateway_main._openapi_store.get()
+    assert gzip.decompress(document.variants["gzip"]) == document.body
+
+
+def test_identity_clients_get_the_file_bytes(client, spec_file):
+    resp = client.get("/openapi.yaml", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in resp.headers
+    assert resp.content == spec_file.read_bytes()
+
+
+def test_revalidation_returns_304_for_any_variant_etag(client, spec_file):
+    etag = client.get("/openapi.yaml", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    resp = client.get(
+        "/openapi.yaml", headers={"Accept-Encoding": "identity", "If-None-Match": etag}
+    )
+    assert resp.status_code == 304
+    assert resp.content == b""
+
+    _write(spec_file, "changed")
+    os.utime(spec_file, ns=(1, 1))
+    assert client.get("/openapi.yaml", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_openapi_json_uses_the_same_document(client, spec_file):
+    assert client.get("/openapi.json").json()["info"]["title"] == "v1"
@@ -0,0 +1,89 @@
+import asyncio
+
+import main as gateway_main  # type: ignore
+import pytest
+from app import rate_limit  # type: ignore
+from app.rate_limit import RateLimitRule, match_auth_rule, parse_limit  # type: ignore
+
+
+class ScriptedRedis:
+    """Stands in for redis.asyncio.Redis; the Lua script result is scripted per test."""
+
+    def __init__(self, result=None, error: Exception | None = None):
+        self.result = result or [1, 0]
+        self.error = error
+        self.calls = []
+
+    def register_script(self, _source):
+        async def run(keys, args):
+            self.calls.append((keys, args))
+            if self.error:
+                raise self.error
+            return self.result
+
+        return run
+
+
+@pytest.fixture(autouse=True)
+def _reset_limiter_state(monkeypatch):
+    monkeypatch.setattr(rate_limit, "_script", None)
+    monkeypatch.setattr(rate_limit, "_script_client", None)
+    rate_limit._fallback_buckets.clear()
+
+
+def test_parse_limit():
+    assert parse_limit("5/900") == (5, 900)
+
+
+@pytest.mark.parametrize(
+    "path,expected",
+    [
+        ("/api/v1/auth/register", "auth_register"),
+        ("/api/v1/auth/otp/request", "auth_otp_request"),
+        ("/api/v1/auth/login", "auth_login"),
+        ("/api/v1/auth/refresh", None),
+    ],
+)
+def test_match_auth_rule(path, expected):
+    rule = match_auth_rule(path)
+    assert (rule.name if rule else None) == expected
+
+
+def test_redis_gcra_decision_is_used():
+    redis = ScriptedRedis(result=[0, 1500])
+    rule = RateLimitRule("t", "/x", ("email",), 5, 900)
+    allowed, retry_after = asyncio.run(rate_limit.hit(redis, rule, "a@example.com"))
+    assert (allowed, retry_after) == (False, 2)
+    keys, args = redis.calls[0]
+    assert keys == ["rl:t:a@example.com"]
+    assert args == [180_000, 900_000]
+
+
+def test_falls_back_to_local_bucket_when_redis_fails():
+    redis = ScriptedRedis(error=ConnectionError("down"))
+    rule = RateLimitRule("t", "/x", ("email",), 3, 900)
+
+    async def run():
+        return [await rate_limit.hit(redis, rule, "a") for _ in range(4)]
+
+    results = asyncio.run(run())
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    assert results[-1][1] > 0
+
+
+def test_unconfigured_redis_does_not_block():
+    rule = RateLimitRule("t", "/x", ("email",), 1, 900)
+
+    async def run():
+        return [await rate_limit.hit(None, rule, "a") for _ in range(3)]
+
+    assert all(allowed for allowed, _ in asyncio.run(run()))
+
+
+def test_middleware_returns_429_with_retry_after(client, monkeypatch):
+    redis = ScriptedRedis(result=[0, 30_000])
+    monkeypatch.setattr(gateway_main, "_get_async_redis", lambda: redis)
+    resp = client.post("/api/v1/auth/login", json={"email": "a@example.com", "password": "x"})
+    assert resp.status_code == 429
+    assert resp.headers["retry-after"] == "30"
+    assert redis.calls[0][0] == ["rl:auth_login:a@example.com"]
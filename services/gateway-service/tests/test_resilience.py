@@ -0,0 +1,140 @@
+import httpx
+import pytest
+from app import resilience  # type: ignore
+from app.resilience import (  # type: ignore
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    parse_route_timeouts,
+    route_timeout,
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_guards(monkeypatch):
+    monkeypatch.setattr(resilience, "_guards", {})
+
+
+def _breaker(**overrides) -> CircuitBreaker:
+    options = dict(
+        window_seconds=30,
+        min_requests=4,
+        failure_rate=0.5,
+        slow_call_seconds=1.0,
+        slow_call_rate=0.75,
+        open_seconds=60,
+        half_open_calls=2,
+    )
+    options.update(overrides)
+    return CircuitBreaker("test", **options)
+
+
+def test_breaker_opens_on_failure_rate_after_min_requests():
+    breaker = _breaker()
+    for success in (True, False, False):
+        assert breaker.allow()
+        breaker.record(success, 0.01)
+    assert breaker.state == CLOSED  # below min_requests
+
+    breaker.record(True, 0.01)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_opens_on_slow_calls():
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record(True, 2.0)
+    assert breaker.state == OPEN
+
+
+def test_half_open_trials_close_or_reopen(monkeypatch):
+    breaker = _breaker(open_seconds=0)
+    for _ in range(4):
+        breaker.record(False, 0.01)
+    assert breaker.state == OPEN
+
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # trial budget exhausted
+    breaker.record(True, 0.01)
+    breaker.record(True, 0.01)
+    assert breaker.state == CLOSED
+
+    for _ in range(4):
+        breaker.record(False, 0.01)
+    assert breaker.allow()
+    breaker.record(False, 0.01)
+    assert breaker.state == OPEN
+
+
+def test_route_timeouts_use_longest_prefix(monkeypatch):
+    routes = parse_route_timeouts("/api/v1/media=120, /api/v1/media/presign=5,/api/v1/auth/=10")
+    monkeypatch.setattr(resilience, "ROUTE_TIMEOUTS", routes)
+    assert route_timeout("/api/v1/media/presign") == 5
+    assert route_timeout("/api/v1/media/abc/complete") == 120
+    assert route_timeout("/api/v1/auth/login") == 10
+    assert route_timeout("/api/v1/mediafiles") == resilience.UPSTREAM_TIMEOUT_SECONDS
+
+
+def test_full_bulkhead_sheds_with_503(client, mock_upstream, monkeypatch):
+    monkeypatch.setenv("UPSTREAM_MAX_IN_FLIGHT_LEADS", "0")
+    calls = []
+    mock_upstream("leads", lambda request: calls.append(request) or httpx.Response(201))
+
+    resp = client.post("/api/v1/leads", json={})
+    assert resp.status_code == 503
+    assert resp.json()["reason"] == "bulkhead_full"
+    assert "retry-after" in resp.headers
+    assert calls == []
+
+
+def test_failing_upstream_trips_breaker_and_sheds(client, mock_upstream):
+    def refuse(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    mock_upstream("leads", refuse)
+    guard = resilience.get_guard("leads")
+    guard.breaker.min_requests = 2
+
+    assert client.post("/api/v1/leads", json={}).status_code == 502
+    assert client.post("/api/v1/leads", json={}).status_code == 502
+    assert guard.breaker.state == OPEN
+
+    resp = client.post("/api/v1/leads", json={})
+    assert resp.status_code == 503
+    assert resp.json()["reason"] == "breaker_open"
+    assert guard.bulkhead.in_flight == 0
+
+
+def test_upstream_timeout_maps_to_504(client, mock_upstream):
+    def slow(request: httpx.Request) -> httpx.Response:
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    mock_upstream("leads", slow)
+    resp = client.post("/api/v1/leads", json={})
+    assert resp.status_code == 504
+    assert resp.json() == {"error": "Upstream timeout", "service": "leads"}
+
+
+def test_streamed_response_holds_bulkhead_until_closed(client, mock_upstream):
+    mock_upstream("leads", lambda request: httpx.Response(201, content=b"ok"))
+    assert client.post("/api/v1/leads", json={}).status_code == 201
+    assert resilience.get_guard("leads").bulkhead.in_flight == 0
+
+
+def test_unexpected_error_on_public_get_frees_the_half_open_trial(client, mock_upstream):
+    def broken(request: httpx.Request) -> httpx.Response:
+        raise RuntimeError("decoder blew up")
+
+    mock_upstream("plans", broken)
+    breaker = resilience.get_guard("plans").breaker
+    breaker.half_open_calls = 1
+    breaker._transition(HALF_OPEN)
+
+    with pytest.raises(RuntimeError):
+        client.get("/api/v1/plans")
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()  # the trial slot was handed back
@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from app import resilience, retry  # type: ignore
+from app.retry import DEADLINE_HEADER  # type: ignore
+
+
+@pytest.fixture(autouse=True)
+def _fast_retries(monkeypatch):
+    monkeypatch.setattr(resilience, "_guards", {})
+    monkeypatch.setattr(retry, "UPSTREAM_RETRY_BASE_SECONDS", 0.001)
+
+
+def _flaky(failures: int, error: type[Exception] = httpx.ConnectError):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) <= failures:
+            raise error("transient", request=request)
+        return httpx.Response(200, json={"attempt": len(calls)})
+
+    return handler, calls
+
+
+def test_idempotent_get_is_retried_on_connect_error(client, mock_upstream):
+    handler, calls = _flaky(failures=2)
+    mock_upstream("auth", handler)
+    resp = client.get("/api/v1/auth/sessions")
+    assert resp.status_code == 200
+    assert resp.json() == {"attempt": 3}
+
+
+def test_retries_are_bounded(client, mock_upstream):
+    handler, calls = _flaky(failures=10)
+    mock_upstream("auth", handler)
+    assert client.get("/api/v1/auth/sessions").status_code == 502
+    assert len(calls) == 1 + retry.UPSTREAM_RETRY_ATTEMPTS
+
+
+def test_read_timeouts_are_not_retried(client, mock_upstream):
+    handler, calls = _flaky(failures=1, error=httpx.ReadTimeout)
+    mock_upstream("auth", handler)
+    assert client.get("/api/v1/auth/sessions").status_code == 504
+    assert len(calls) == 1
+
+
+def test_non_idempotent_requests_are_not_retried(client, mock_upstream):
+    handler, calls = _flaky(failures=1)
+    mock_upstream("auth", handler)
+    assert client.post("/api/v1/auth/logout", json={}).status_code == 502
+    assert len(calls) == 1
+
+
+def test_gateway_stamps_deadline_header(client, mock_upstream):
+    seen = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.update(request.headers)
+        return httpx.Response(200)
+
+    mock_upstream("auth", handler)
+    before = time.time()
+    client.get("/api/v1/auth/sessions")
+    deadline = int(seen[DEADLINE_HEADER]) / 1000
+    assert before < deadline <= time.time() + resilience.route_timeout("/api/v1/auth/sessions")
+
+
+def test_client_deadline_can_only_shorten_budget(client, mock_upstream):
+    seen = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.update(request.headers)
+        return httpx.Response(200)
+
+    mock_upstream("auth", handler)
+    far_future = str(int((time.time() + 3600) * 1000))
+    client.get("/api/v1/auth/sessions", headers={DEADLINE_HEADER: far_future})
+    assert int(seen[DEADLINE_HEADER]) < int(far_future)
+
+    soon = str(int((time.time() + 2) * 1000))
+    client.get("/api/v1/auth/sessions", headers={DEADLINE_HEADER: soon})
+    assert seen[DEADLINE_HEADER] == soon
+
+
+def test_expired_deadline_is_rejected_without_upstream_call(client, mock_upstream):
+    calls = []
+    mock_upstream("auth", lambda request: calls.append(request) or httpx.Response(200))
+    past = str(int((time.time() - 1) * 1000))
+    resp = client.get("/api/v1/auth/sessions", headers={DEADLINE_HEADER: past})
+    assert resp.status_code == 504
+    assert calls == []
+
+
+def test_hedged_request_wins_over_slow_first_attempt(client, mock_upstream, monkeypatch):
+    monkeypatch.setattr(retry, "UPSTREAM_HEDGE_AFTER_SECONDS", 0.05)
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(1.0)
+            return httpx.Response(200, json={"attempt": "first"})
+        return httpx.Response(200, json={"attempt": "hedge"})
+
+    mock_upstream("auth", handler)
+    started = time.monotonic()
+    resp = client.get("/api/v1/auth/sessions")
+    assert resp.json() == {"attempt": "hedge"}
+    assert time.monotonic() - started < 0.9
@@ -0,0 +1,144 @@
+import asyncio
+import time
+import uuid
+
+import httpx
+import main as gateway_main  # type: ignore
+import pytest
+from app import invalidation  # type: ignore
+
+
+@pytest.fixture
+def lead_token(make_token):
+    def make(role: str = "cms_user") -> str:
+        return make_token(role, can_assign_leads=True, can_manage_unassigned_leads=True)
+
+    return make
+
+
+@pytest.fixture
+def auth_lookups(jwt_secret, fake_redis, mock_upstream):
+    gateway_main._role_cache.clear()
+    roles = {}
+    lookups = []
+
+    def auth_handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path.startswith("/api/v1/auth/internal/users/"):
+            user_id = path.rsplit("/", 1)[1]
+            lookups.append(user_id)
+            if user_id not in roles:
+                return httpx.Response(404, json={"detail": "User not found"})
+            return httpx.Response(200, json={"id": user_id, "role": roles[user_id]})
+        return httpx.Response(200, json={"ok": True})
+
+    mock_upstream("auth", auth_handler)
+    mock_upstream("leads", lambda request: httpx.Response(200, json={"ok": True}))
+    yield roles, lookups
+    gateway_main._role_cache.clear()
+
+
+def _assign(client, token, assignee):
+    return client.patch(
+        f"/api/v1/leads/{uuid.uuid4()}/assign",
+        json={"assigned_to": assignee},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+
+def test_bulk_assignment_looks_each_assignee_up_once(client, auth_lookups, lead_token):
+    roles, lookups = auth_lookups
+    assignee = str(uuid.uuid4())
+    roles[assignee] = "technician"
+    token = lead_token()
+
+    assert [_assign(client, token, assignee).status_code for _ in range(5)] == [200] * 5
+    assert lookups == [assignee]
+
+
+def test_admin_assignee_is_still_rejected_from_cache(client, auth_lookups, lead_token):
+    roles, lookups = auth_lookups
+    admin = str(uuid.uuid4())
+    roles[admin] = "admin"
+    token = lead_token()
+    assert _assign(client, token, admin).status_code == 400
+    assert _assign(client, token, admin).status_code == 400
+    assert len(lookups) == 1
+
+
+def test_unknown_users_are_not_cached(client, auth_lookups, lead_token):
+    _, lookups = auth_lookups
+    ghost = str(uuid.uuid4())
+    token = lead_token()
+    _assign(client, token, ghost)
+    _assign(client, token, ghost)
+    assert lookups == [ghost, ghost]
+
+
+def test_user_update_through_gateway_drops_cached_role(client, auth_lookups, lead_token):
+    roles, lookups = auth_lookups
+    assignee = str(uuid.uuid4())
+    roles[assignee] = "technician"
+    token = lead_token()
+    _assign(client, token, assignee)
+
+    resp = client.patch(
+        f"/api/v1/auth/users/{assignee}/capabilities",
+        json={"can_assign_leads": False},
+        headers={"Authorization": f"Bearer {lead_token('admin')}"},
+    )
+    assert resp.status_code == 200
+    _assign(client, token, assignee)
+    assert lookups == [assignee, assignee]
+
+
+class FakePubSub:
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.subscribed = []
+
+    async def subscribe(self, channel):
+        self.subscribed.append(channel)
+
+    async def get_message(self, ignore_subscribe_messages, timeout):
+        if self.messages:
+            return self.messages.pop(0)
+        await asyncio.sleep(timeout)
+        return None
+
+    async def aclose(self):
+        pass
+
+
+def test_auth_service_change_events_invalidate_the_cache():
+    pubsub = FakePubSub([{"type": "message", "data": "user-1"}])
+    changed, resets = [], []
+
+    class Redis:
+        def pubsub(self):
+            return pubsub
+
+    async def run():
+        task = asyncio.ensure_future(
+            invalidation.listen_user_changes(
+                lambda: Redis(), changed.append, lambda: resets.append(1)
+            )
+        )
+        for _ in range(50):
+            if changed:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert pubsub.subscribed == [invalidation.USER_CHANGED_CHANNEL]
+    assert resets == [1]
+    assert changed == ["user-1"]
+
+
+def test_forget_user_is_case_insensitive():
+    gateway_main._role_cache.set("abc", "technician", expires_at=time.time() + 60, size=64)
+    gateway_main._forget_user("ABC")
+    assert gateway_main._role_cache.get("abc") is None
@@ -0,0 +1,39 @@
+import os
+
+from shared_utils import server
+
+
+def test_worker_count_is_explicit_or_sized_to_the_cpus(monkeypatch):
+    monkeypatch.setattr(server, "available_cpus", lambda: 6)
+    assert server.worker_count("auto") == 6
+    assert server.worker_count("3") == 3
+    assert server.worker_count("0") == 1
+
+
+def test_available_cpus_is_at_least_one():
+    assert server.available_cpus() >= 1
+
+
+def test_single_worker_keeps_in_process_metrics(monkeypatch):
+    monkeypatch.delenv(server.MULTIPROC_DIR_ENV, raising=False)
+    assert server.prepare_multiprocess_metrics(1) is None
+    assert server.MULTIPROC_DIR_ENV not in os.environ
+
+
+def test_multiprocess_dir_is_emptied_before_workers_start(tmp_path, monkeypatch):
+    path = tmp_path / "metrics"
+    path.mkdir()
+    (path / "counter_123.db").write_bytes(b"stale")
+    monkeypatch.setenv(server.MULTIPROC_DIR_ENV, str(path))
+
+    assert server.prepare_multiprocess_metrics(4) == str(path)
+    assert list(path.iterdir()) == []
+
+
+def test_metrics_payload_reads_the_shared_directory_in_multiprocess_mode(
+    client, tmp_path, monkeypatch
+):
+    assert b"http_requests_total" in server.metrics_payload()
+    monkeypatch.setenv(server.MULTIPROC_DIR_ENV, str(tmp_path))
+    # No worker has written to the (empty) directory yet.
+    assert server.metrics_payload() == b""
@@ -0,0 +1,65 @@
+import httpx
+import main as gateway_main  # type: ignore
+
+
+def _echo(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(
+        201, content=request.read(), headers={"content-type": "application/octet-stream"}
+    )
+
+
+def test_streams_request_and_response_bodies(client, mock_upstream):
+    mock_upstream("leads", _echo)
+    payload = b"x" * (256 * 1024)
+    resp = client.post(
+        "/api/v1/leads", content=payload, headers={"content-type": "application/octet-stream"}
+    )
+    assert resp.status_code == 201
+    assert resp.content == payload
+
+
+def test_get_without_body_is_not_chunked(client, mock_upstream):
+    seen = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.update(request.headers)
+        return httpx.Response(200, json={"ok": True})
+
+    mock_upstream("plans", handler)
+    resp = client.get("/api/v1/plans")
+    assert resp.status_code == 200
+    assert "transfer-encoding" not in seen
+
+
+def test_rejects_declared_body_over_limit(client, mock_upstream, monkeypatch):
+    monkeypatch.setattr(gateway_main, "PROXY_MAX_BODY_BYTES", 1024)
+    mock_upstream("leads", _echo)
+    resp = client.post("/api/v1/leads", content=b"x" * 2048)
+    assert resp.status_code == 413
+
+
+def test_rejects_streamed_body_over_limit(client, mock_upstream, monkeypatch):
+    monkeypatch.setattr(gateway_main, "PROXY_MAX_BODY_BYTES", 1024)
+    mock_upstream("leads", _echo)
+
+    def chunks():
+        for _ in range(4):
+            yield b"x" * 512
+
+    resp = client.post("/api/v1/leads", content=chunks())
+    assert resp.status_code == 413
+
+
+def test_buffered_mode_still_available(client, mock_upstream, monkeypatch):
+    monkeypatch.setattr(gateway_main, "PROXY_STREAMING", False)
+    mock_upstream("leads", _echo)
+    resp = client.post("/api/v1/leads", content=b"hello")
+    assert resp.status_code == 201
+    assert resp.content == b"hello"
+
+
+def test_body_read_by_middleware_is_still_forwarded(client, mock_upstream):
+    mock_upstream("auth", _echo)
+    resp = client.post("/api/v1/auth/login", json={"email": "a@example.com", "password": "x"})
+    assert resp.status_code == 201
+    assert resp.json() == {"email": "a@example.com", "password": "x"}
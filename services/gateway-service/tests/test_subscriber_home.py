@@ -0,0 +1,135 @@
+import asyncio
+import time
+import uuid
+
+import httpx
+import main as gateway_main  # type: ignore
+import pytest
+from prometheus_client import REGISTRY
+
+
+def _leg_count(leg: str, outcome: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "gateway_aggregate_leg_duration_seconds_count",
+            {"view": "subscriber_home", "leg": leg, "outcome": outcome},
+        )
+        or 0.0
+    )
+
+
+@pytest.fixture
+def legs(jwt_secret, fake_redis, mock_upstream):
+    gateway_main._home_cache.clear()
+    state = {"calls": [], "fail": set(), "missing": set()}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        state["calls"].append(
+            (request.method, path, dict(request.url.params), request.headers.get("x-user-id"))
+        )
+        await asyncio.sleep(0.1)
+        if request.method != "GET":
+            return httpx.Response(200, json={"ok": True})
+        if path in state["fail"]:
+            return httpx.Response(500, json={"detail": "boom"})
+        if path in state["missing"]:
+            return httpx.Response(404, json={"detail": "Not found"})
+        return httpx.Response(200, json={"path": path})
+
+    for service in ("subscribers", "subscriptions", "billing", "tickets"):
+        mock_upstream(service, handler)
+    yield state
+    gateway_main._home_cache.clear()
+
+
+def _home(client, token):
+    return client.get("/api/v1/home", headers={"Authorization": f"Bearer {token}"})
+
+
+def test_fans_out_concurrently_and_assembles_the_view(client, legs, make_token):
+    user_id = str(uuid.uuid4())
+    started = time.monotonic()
+    resp = _home(client, make_token(sub=user_id))
+    elapsed = time.monotonic() - started
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["partial"] is False
+    assert body["profile"] == {"status": "ok", "data": {"path": "/api/v1/subscribers/me"}}
+    assert body["tickets"]["data"] == {"path": "/api/v1/tickets/me"}
+    assert (
+        resp.headers["cache-control"] == f"private, max-age={gateway_main.HOME_CACHE_TTL_SECONDS}"
+    )
+    assert len(legs["calls"]) == 5
+    assert {call[3] for call in legs["calls"]} == {user_id}
+    assert ("GET", "/api/v1/billing/me/invoices", {"limit": "5"}, user_id) in legs["calls"]
+    tickets_call = (
+        "GET",
+        "/api/v1/tickets/me",
+        {"status": "created,assigned,in_progress", "limit": "10"},
+        user_id,
+    )
+    assert tickets_call in legs["calls"]
+    # Five 100ms legs together, not in sequence.
+    assert elapsed < 0.4
+
+
+def test_view_is_cached_per_user(client, legs, make_token):
+    token = make_token()
+    assert _home(client, token).headers["x-cache"] == "MISS"
+    cached = _home(client, token)
+    assert cached.headers["x-cache"] == "HIT"
+    assert len(legs["calls"]) == 5
+
+    _home(client, make_token())
+    assert len(legs["calls"]) == 10
+
+
+def test_own_write_evicts_the_cached_view(client, legs, make_token):
+    token = make_token()
+    _home(client, token)
+    put = client.put(
+        "/api/v1/subscribers/me", json={"name": "x"}, headers={"Authorization": f"Bearer {token}"}
+    )
+    assert put.status_code == 200
+    assert _home(client, token).headers["x-cache"] == "MISS"
+
+
+def test_failed_optional_leg_degrades_and_is_not_cached(client, legs, make_token):
+    legs["fail"].add("/api/v1/billing/credits/me")
+    before = _leg_count("credits", "error")
+    token = make_token()
+
+    resp = _home(client, token)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["partial"] is True
+    assert body["failed_legs"] == ["credits"]
+    assert body["credits"]["status"] == "error"
+    assert body["credits"]["error"]["status_code"] == 500
+    assert body["invoices"]["status"] == "ok"
+    assert resp.headers["cache-control"] == "no-store"
+    assert _leg_count("credits", "error") - before == 1
+
+    assert _home(client, token).headers["x-cache"] == "MISS"
+
+
+def test_missing_subscription_is_empty_not_a_failure(client, legs, make_token):
+    legs["missing"].add("/api/v1/subscriptions/me")
+    body = _home(client, make_token()).json()
+    assert body["partial"] is False
+    assert body["subscription"] == {"status": "empty", "data": None}
+
+
+def test_failed_profile_fails_the_view(client, legs, make_token):
+    legs["fail"].add("/api/v1/subscribers/me")
+    resp = _home(client, make_token())
+    assert resp.status_code == 502
+    assert resp.json()["failed_legs"] == ["profile"]
+
+
+def test_only_subscribers_may_ask(client, legs, make_token):
+    assert _home(client, make_token("admin")).status_code == 403
+    assert client.get("/api/v1/home").status_code == 401
+    assert legs["calls"] == []
@@ -0,0 +1,35 @@
+import httpx
+from app import upstream  # type: ignore
+
+
+def test_one_pooled_client_per_service(client):
+    from main import SERVICE_URLS  # type: ignore
+
+    configured = {name for name, url in SERVICE_URLS.items() if url}
+    assert set(upstream._clients) == configured
+    assert upstream.get_client("plans") is upstream.get_client("plans")
+    assert not upstream.get_client("plans").is_closed
+
+
+def test_proxy_reuses_registered_client(client, mock_upstream):
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(str(request.url))
+        return httpx.Response(200, json={"items": []})
+
+    # Not an edge-cached route, so every request reaches the upstream client.
+    mock_upstream("auth", handler)
+    for _ in range(3):
+        resp = client.get("/api/v1/auth/sessions", params={"active": "true"})
+        assert resp.status_code == 200
+        assert resp.json() == {"items": []}
+    assert len(seen) == 3
+    assert seen[0].endswith("/api/v1/auth/sessions?active=true")
+
+
+def test_metrics_exports_pool_gauges(client):
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert "gateway_upstream_pool_max_connections" in resp.text
+    assert "gateway_upstream_pool_connections" in resp.text
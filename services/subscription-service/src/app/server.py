@@ -0,0 +1,8 @@
+"""Production launcher: `python -m app.server`. The implementation is `shared_utils.server`."""
+
+import os
+
+from shared_utils.server import run
+
+if __name__ == "__main__":
+    run(app_dir=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,62 @@
+"""
+Request deadlines set by the gateway (`x-request-deadline`, absolute Unix time in ms).
+
+Each service binds the header in its middleware and answers `504` when it has already
+passed. Internal `httpx` calls made while serving the request cap their timeout with
+`deadline_timeout()` and forward the header with `deadline_headers()`.
+
+Calls made after the service has committed a local change (telling subscription-service an
+order was paid, sending a notification) do not use these helpers. Timing them out would not
+undo the commit, only leave the other service behind, so they keep a plain fixed timeout.
+"""
+
+import time
+from contextvars import ContextVar, Token
+from typing import Dict
+
+DEADLINE_HEADER = "x-request-deadline"
+# Smallest timeout handed to httpx once the budget is (nearly) spent, so calls fail fast.
+MIN_TIMEOUT_SECONDS = 0.05
+
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+def bind_deadline(value: str | None) -> Token:
+    """Bind the caller's deadline (header value) to the current request context."""
+    deadline = None
+    if value:
+        try:
+            deadline = int(value) / 1000.0
+        except ValueError:
+            deadline = None
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token: Token) -> None:
+    _deadline.reset(token)
+
+
+def deadline_remaining() -> float | None:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.time()
+
+
+def deadline_expired() -> bool:
+    remaining = deadline_remaining()
+    return remaining is not None and remaining <= 0
+
+
+def deadline_timeout(default: float) -> float:
+    """`default`, capped to the time the caller has left."""
+    remaining = deadline_remaining()
+    if remaining is None:
+        return default
+    return max(MIN_TIMEOUT_SECONDS, min(default, remaining))
+
+
+def deadline_headers() -> Dict[str, str]:
+    """Headers that carry the current deadline on to internal services."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return {}
+    return {DEADLINE_HEADER: str(int(deadline * 1000))}
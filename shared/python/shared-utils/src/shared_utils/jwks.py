@@ -0,0 +1,116 @@
+"""
+Offline verification of auth-service access tokens against its published JWKS
+(`/.well-known/jwks.json`), so a service can authenticate a bearer token without calling
+auth-service.
+
+    keys = JWKSKeySet("http://auth-service:8000/.well-known/jwks.json")
+    claims = await keys.verify(token)  # raises jose.JWTError when the token is not valid
+
+The key set is fetched on first use and refreshed every `max_age_seconds` with
+`If-None-Match`. A token signed with an unknown `kid` (the key was just rotated in) triggers
+an immediate refresh, at most once per `min_refresh_seconds`. If a refresh fails, the last
+good keys are kept. Revocation is not checked here: tokens stay valid until `exp`.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+from jose import JWTError, jwt
+
+ASYMMETRIC_ALGORITHMS = ("RS256",)
+JWKS_PATH = "/.well-known/jwks.json"
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSKeySet:
+    def __init__(
+        self,
+        url: str,
+        *,
+        client: Optional[Callable[[], Optional[httpx.AsyncClient]]] = None,
+        max_age_seconds: float = 300.0,
+        min_refresh_seconds: float = 30.0,
+        timeout_seconds: float = 5.0,
+    ) -> None:
+        # `client` supplies a pooled client (url may then be relative to its base_url).
+        self.url = url
+        self._client = client
+        self.max_age_seconds = max_age_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self.timeout_seconds = timeout_seconds
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._etag: Optional[str] = None
+        self._fetched_at: Optional[float] = None
+        self._attempted_at: Optional[float] = None
+        self._refreshing: Optional[asyncio.Task] = None
+
+    def _stale(self, now: float) -> bool:
+        return self._fetched_at is None or now - self._fetched_at >= self.max_age_seconds
+
+    def _may_refresh(self, now: float) -> bool:
+        return self._attempted_at is None or now - self._attempted_at >= self.min_refresh_seconds
+
+    def get(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Cached public key for `kid`, without waiting on the network. A stale key set or an
+        unknown kid schedules a background refresh.
+        """
+        key = self._keys.get(kid or "")
+        now = time.monotonic()
+        if (key is None or self._stale(now)) and self._may_refresh(now):
+            self._schedule_refresh()
+        return key
+
+    def _schedule_refresh(self) -> None:
+        if self._refreshing is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._refreshing = loop.create_task(self.refresh())
+
+    async def refresh(self) -> bool:
+        self._attempted_at = time.monotonic()
+        try:
+            client = self._client() if self._client else None
+            headers = {"If-None-Match": self._etag} if self._etag and self._keys else {}
+            if client is not None:
+                resp = await client.get(self.url, headers=headers, timeout=self.timeout_seconds)
+            else:
+                async with httpx.AsyncClient(timeout=self.timeout_seconds) as own:
+                    resp = await own.get(self.url, headers=headers)
+            if resp.status_code != 304:
+                resp.raise_for_status()
+                self._keys = {
+                    key["kid"]: key
+                    for key in resp.json().get("keys", [])
+                    if key.get("kid") and key.get("alg") in ASYMMETRIC_ALGORITHMS
+                }
+                self._etag = resp.headers.get("etag")
+            self._fetched_at = time.monotonic()
+            return True
+        except Exception as exc:
+            logger.warning("JWKS refresh from %s failed: %s", self.url, exc)
+            return False
+        finally:
+            self._refreshing = None
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """Verify signature and expiry; returns the claims or raises JWTError."""
+        header = jwt.get_unverified_header(token)
+        algorithm, kid = header.get("alg"), header.get("kid")
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise JWTError(f"Unsupported signing algorithm: {algorithm}")
+        key = self._keys.get(kid or "")
+        now = time.monotonic()
+        if (key is None or self._stale(now)) and self._may_refresh(now):
+            await (self._refreshing or self.refresh())
+            key = self._keys.get(kid or "")
+        if key is None:
+            raise JWTError("Unknown signing key")
+        return jwt.decode(token, key, algorithms=[algorithm])
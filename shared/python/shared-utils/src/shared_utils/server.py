@@ -0,0 +1,106 @@
+"""
+Production launcher: `python -m app.server` (with `src/` on `PYTHONPATH`).
+
+Runs `main:app` under uvicorn with `WEB_CONCURRENCY` workers (`auto` = the CPUs the container
+may use). Workers are spawned, not forked, so every worker imports `main` itself and builds
+its own clients and caches in its lifespan. With more than one worker, prometheus_client
+writes to `PROMETHEUS_MULTIPROC_DIR` and `/metrics` (via `metrics_payload()`) sums the
+workers. uvloop and httptools are used when installed. On SIGTERM, in-flight requests get
+`GRACEFUL_SHUTDOWN_SECONDS` to finish.
+
+Each service's `app/server.py` only calls `run()` with its `src/` directory. That module is
+also the multiprocessing main module of the spawned workers, so this one must stay importable
+without the service's own modules.
+"""
+
+import math
+import os
+import shutil
+import tempfile
+from typing import Any
+
+from prometheus_client import CollectorRegistry, generate_latest, multiprocess
+
+WEB_CONCURRENCY = os.getenv("WEB_CONCURRENCY", "1")
+GRACEFUL_SHUTDOWN_SECONDS = int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", "20"))
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+METRICS_MAX_PATH_LABELS = int(os.getenv("METRICS_MAX_PATH_LABELS", "500"))
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: the cgroup v2 quota when one is set, else the affinity mask."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            count = min(count, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+def worker_count(value: str = WEB_CONCURRENCY) -> int:
+    if value.strip().lower() == "auto":
+        return available_cpus()
+    return max(1, int(value))
+
+
+def prepare_multiprocess_metrics(workers: int) -> str | None:
+    """Give the workers an empty shared metrics directory; must run before they start."""
+    path = os.getenv(MULTIPROC_DIR_ENV)
+    if workers <= 1 and not path:
+        return None
+    path = path or os.path.join(tempfile.gettempdir(), "prometheus-multiproc")
+    # Files left by a previous run would otherwise be summed into this one.
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    os.environ[MULTIPROC_DIR_ENV] = path
+    return path
+
+
+def metrics_payload() -> bytes:
+    """Prometheus exposition for this service: all workers in multiprocess mode."""
+    if not os.getenv(MULTIPROC_DIR_ENV):
+        return generate_latest()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+_metric_path_labels: set[str] = set()
+
+
+def metric_path(request: Any) -> str:
+    """
+    The `path` label for a request: its matched route template, so ids in the URL don't mint
+    new series. Past `METRICS_MAX_PATH_LABELS` distinct templates, new ones report `overflow`.
+    """
+    template = getattr(request.scope.get("route"), "path", None)
+    if not template:
+        return "unmatched"
+    if template not in _metric_path_labels:
+        if len(_metric_path_labels) >= METRICS_MAX_PATH_LABELS:
+            return "overflow"
+        _metric_path_labels.add(template)
+    return template
+
+
+def run(app_dir: str = ".") -> None:
+    """Serve `main:app` from `app_dir` (the service's `src/`)."""
+    import uvicorn
+
+    workers = worker_count()
+    prepare_multiprocess_metrics(workers)
+    uvicorn.run(
+        "main:app",
+        app_dir=app_dir,
+        host="0.0.0.0",
+        port=int(os.getenv("SERVICE_PORT", "8000")),
+        workers=workers,
+        log_level=os.getenv("LOG_LEVEL", "INFO").lower(),
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_SECONDS,
+    )
@@ -0,0 +1,150 @@
+"""
+auth-service login hashing benchmark: runs concurrent password verifications on one event loop,
+the way a single uvicorn worker serves a login burst, and reports logins/s (total and per core)
+and how long other requests on the same loop wait while it runs, as JSON.
+
+Modes:
+  inline  bcrypt called directly in the handler (blocks the event loop; the old behaviour)
+  pool    `app.security.verify_password`, i.e. the bounded hash pool in `app/hashing.py`
+
+The probe sleeps `--probe-interval-ms` in a loop and records how late it wakes up. That delay
+is what every other request on the worker (token validation, health checks) waits behind the
+hashes. Runs offline with only auth-service's requirements installed (no Postgres or Redis).
+
+  python tests/load/auth_login_bench.py --output bench-auth.json
+  python tests/load/auth_login_bench.py --modes pool --hash-workers 4 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from gateway_bench import _git_commit, percentile
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+AUTH_SRC = ROOT_DIR / "services" / "auth-service" / "src"
+MODES = ("inline", "pool")
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _latency(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "p50": _ms(percentile(ordered, 50)),
+        "p95": _ms(percentile(ordered, 95)),
+        "p99": _ms(percentile(ordered, 99)),
+        "max": _ms(ordered[-1]) if ordered else 0.0,
+    }
+
+
+async def run_mode(mode: str, password_hash: str, args: argparse.Namespace) -> dict:
+    from app import hashing, security
+    from shared_utils.server import available_cpus
+
+    async def verify() -> bool:
+        if mode == "inline":
+            return security.pwd_context.verify("bench-password", password_hash)
+        return await security.verify_password("bench-password", password_hash)
+
+    deadline = time.perf_counter() + args.duration
+    logins: List[float] = []
+    probe_lag: List[float] = []
+    rejected = 0
+
+    async def worker() -> None:
+        nonlocal rejected
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                await verify()
+            except hashing.HashQueueFull:
+                rejected += 1
+                await asyncio.sleep(0.01)
+                continue
+            logins.append(time.perf_counter() - started)
+            # Yield like a real handler returning its response.
+            await asyncio.sleep(0)
+
+    async def probe() -> None:
+        interval = args.probe_interval_ms / 1000.0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            probe_lag.append(time.perf_counter() - started - interval)
+
+    started = time.perf_counter()
+    await asyncio.gather(probe(), *(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    cpus = available_cpus()
+    rate = len(logins) / elapsed if elapsed > 0 else 0.0
+    return {
+        "logins": len(logins),
+        "rejected": rejected,
+        "duration_seconds": round(elapsed, 3),
+        "logins_per_second": round(rate, 2),
+        "logins_per_second_per_core": round(rate / cpus, 2),
+        "login_latency_ms": _latency(logins),
+        "probe_lag_ms": _latency(probe_lag),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated subset")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent logins")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per mode")
+    parser.add_argument("--hash-workers", type=int, default=1, help="HASH_WORKERS")
+    parser.add_argument("--hash-max-queue", type=int, default=64, help="HASH_MAX_QUEUE")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--probe-interval-ms", type=float, default=10.0)
+    parser.add_argument("--output", help="Write JSON results here (default: stdout)")
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = sorted(set(modes) - set(MODES))
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(unknown)}")
+
+    # Read by app.config at import time.
+    os.environ["HASH_WORKERS"] = str(args.hash_workers)
+    os.environ["HASH_MAX_QUEUE"] = str(args.hash_max_queue)
+    sys.path.insert(0, str(AUTH_SRC))
+    from app import config, hashing, security
+    from shared_utils.server import available_cpus
+
+    password_hash = security.pwd_context.hash("bench-password", rounds=args.rounds)
+    results_by_mode = {mode: asyncio.run(run_mode(mode, password_hash, args)) for mode in modes}
+    hashing.shutdown()
+
+    results = {
+        "benchmark": "auth-login",
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "available_cpus": available_cpus(),
+        "hash_workers": config.HASH_WORKERS,
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "modes": results_by_mode,
+    }
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n")
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
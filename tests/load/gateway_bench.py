@@ -0,0 +1,381 @@
+"""
+Gateway load benchmark: starts the gateway and a stub upstream as local processes, drives each
+scenario with concurrent clients and reports RPS and latency percentiles as JSON.
+
+Runs offline (no Redis, Postgres or real services). Needs the gateway's requirements installed.
+Without Redis the gateway's limiter allows everything, so `rate_limit` then measures only the
+work in front of it (rule match, body parse); pass --redis-url to include allow/deny decisions.
+
+  python tests/load/gateway_bench.py --output bench.json
+  python tests/load/gateway_bench.py --scenarios auth_proxy,streaming --concurrency 64
+  python tests/load/gateway_bench.py --baseline main.json --max-regression 15
+
+With --baseline, p95 and RPS are compared per scenario and the exit status is 1 when either
+regresses by more than --max-regression percent. Absolute numbers depend on the machine and
+the load generator shares it, so compare runs from the same host.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import httpx
+from jose import jwt
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+GATEWAY_SRC = ROOT_DIR / "services" / "gateway-service" / "src"
+LOAD_DIR = Path(__file__).resolve().parent
+JWT_SECRET = "bench-secret"
+
+UPSTREAM_ENV_VARS = (
+    "AUTH_SERVICE_URL",
+    "LEAD_SERVICE_URL",
+    "CONTENT_SERVICE_URL",
+    "SUBSCRIBER_SERVICE_URL",
+    "PLAN_SERVICE_URL",
+    "SUBSCRIPTION_SERVICE_URL",
+    "BILLING_SERVICE_URL",
+    "PAYMENT_SERVICE_URL",
+    "TICKET_SERVICE_URL",
+    "ASSIGNMENT_SERVICE_URL",
+    "MEDIA_SERVICE_URL",
+    "NOTIFICATION_SERVICE_URL",
+    "REPORTING_SERVICE_URL",
+    "AUDIT_SERVICE_URL",
+    "COUPON_SERVICE_URL",
+)
+
+
+def _token() -> str:
+    now = int(time.time())
+    claims = {
+        "sub": str(uuid.uuid4()),
+        "role": "subscriber",
+        "email": "bench@example.com",
+        "subscriber_id": None,
+        "can_assign_leads": False,
+        "can_manage_unassigned_leads": False,
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + 3600,
+    }
+    return jwt.encode(claims, JWT_SECRET, algorithm="HS256")
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    description: str
+    # (request number) -> (method, path, headers, json body)
+    build: Callable[[int], tuple]
+
+
+def _scenarios(token: str, identities: int) -> Dict[str, Scenario]:
+    bearer = {"Authorization": f"Bearer {token}"}
+    lead = {"name": "Bench", "email": "bench@example.com", "phone": "+910000000000"}
+    return {
+        s.name: s
+        for s in (
+            Scenario(
+                "public_proxy",
+                "Anonymous POST /api/v1/leads: routing and proxying only",
+                lambda i: ("POST", "/api/v1/leads", {}, lead),
+            ),
+            Scenario(
+                "auth_proxy",
+                "GET /api/v1/subscribers/me with a bearer token: local JWT check + route policy",
+                lambda i: ("GET", "/api/v1/subscribers/me", bearer, None),
+            ),
+            Scenario(
+                "edge_cache",
+                "Anonymous GET /api/v1/plans served from the edge cache",
+                lambda i: ("GET", "/api/v1/plans", {}, None),
+            ),
+            Scenario(
+                "streaming",
+                "GET /api/v1/media/{id}/download relayed as a stream (STUB_STREAM_BYTES)",
+                lambda i: (
+                    "GET",
+                    f"/api/v1/media/{uuid.UUID(int=i % 1000)}/download",
+                    bearer,
+                    None,
+                ),
+            ),
+            Scenario(
+                "rate_limit",
+                "POST /api/v1/auth/login across a fixed pool of emails (limiter decisions need --redis-url)",
+                lambda i: (
+                    "POST",
+                    "/api/v1/auth/login",
+                    {},
+                    {"email": f"user{i % identities}@example.com", "password": "x"},
+                ),
+            ),
+        )
+    }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(
+    latencies: List[float], statuses: Dict[str, int], errors: int, elapsed: float
+) -> dict:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    ms = lambda seconds: round(seconds * 1000, 3)  # noqa: E731
+    return {
+        "requests": count,
+        "errors": errors,
+        "duration_seconds": round(elapsed, 3),
+        "rps": round(count / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": ms(sum(ordered) / count) if count else 0.0,
+            "p50": ms(percentile(ordered, 50)),
+            "p95": ms(percentile(ordered, 95)),
+            "p99": ms(percentile(ordered, 99)),
+            "max": ms(ordered[-1]) if count else 0.0,
+        },
+        "status_codes": dict(sorted(statuses.items())),
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, *, concurrency: int, duration: float, warmup: int
+) -> dict:
+    for i in range(warmup):
+        method, path, headers, body = scenario.build(i)
+        await client.request(method, path, headers=headers, json=body)
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors = 0
+    counter = iter(range(10**12))
+    stop_at = time.perf_counter() + duration
+
+    async def worker() -> None:
+        nonlocal errors
+        while time.perf_counter() < stop_at:
+            method, path, headers, body = scenario.build(next(counter))
+            started = time.perf_counter()
+            try:
+                async with client.stream(method, path, headers=headers, json=body) as resp:
+                    async for _ in resp.aiter_raw():
+                        pass
+                status = str(resp.status_code)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, errors, time.perf_counter() - started)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start(app: str, app_dir: Path, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            app,
+            "--app-dir",
+            str(app_dir),
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env={**os.environ, **env},
+    )
+
+
+def _wait_healthy(url: str, proc: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{url} exited with status {proc.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Human-readable regressions beyond `max_regression` percent (p95 up or RPS down)."""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        p95_now, p95_before = current["latency_ms"]["p95"], before["latency_ms"]["p95"]
+        if p95_before > 0 and (p95_now - p95_before) / p95_before * 100 > max_regression:
+            regressions.append(f"{name}: p95 {p95_before}ms -> {p95_now}ms")
+        rps_now, rps_before = current["rps"], before["rps"]
+        if rps_before > 0 and (rps_before - rps_now) / rps_before * 100 > max_regression:
+            regressions.append(f"{name}: rps {rps_before} -> {rps_now}")
+    return regressions
+
+
+async def _run(args: argparse.Namespace, gateway_url: str, names: List[str]) -> dict:
+    scenarios = _scenarios(_token(), args.rate_limit_identities)
+    results = {}
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+    async with httpx.AsyncClient(base_url=gateway_url, limits=limits, timeout=30.0) as client:
+        for name in names:
+            results[name] = await run_scenario(
+                client,
+                scenarios[name],
+                concurrency=args.concurrency,
+                duration=args.duration,
+                warmup=args.warmup,
+            )
+            results[name]["description"] = scenarios[name].description
+            print(_format_row(name, results[name]), file=sys.stderr)
+    return results
+
+
+def _format_row(name: str, r: dict) -> str:
+    lat = r["latency_ms"]
+    return (
+        f"{name:<14} {r['rps']:>9.1f} rps  p50 {lat['p50']:>8.2f}ms  p95 {lat['p95']:>8.2f}ms  "
+        f"p99 {lat['p99']:>8.2f}ms  errors {r['errors']}  {r['status_codes']}"
+    )
+
+
+def main() -> int:
+    all_names = list(_scenarios("", 1))
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scenarios", default=",".join(all_names), help="Comma-separated subset")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument(
+        "--warmup", type=int, default=50, help="Requests per scenario before measuring"
+    )
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Stub upstream latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Stub upstream 500 rate")
+    parser.add_argument("--body-bytes", type=int, default=1024, help="Stub JSON body size")
+    parser.add_argument("--stream-bytes", type=int, default=1024 * 1024, help="Stub download size")
+    parser.add_argument("--rate-limit-identities", type=int, default=20)
+    parser.add_argument(
+        "--redis-url", default="", help="Redis for the gateway (rate limits, revocation)"
+    )
+    parser.add_argument("--output", help="Write JSON results here (default: stdout)")
+    parser.add_argument("--baseline", help="Earlier JSON results to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="Percent")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = sorted(set(names) - set(all_names))
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    stub_port, gateway_port = _free_port(), _free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    gateway_url = f"http://127.0.0.1:{gateway_port}"
+    stub_env = {
+        "STUB_LATENCY_MS": str(args.latency_ms),
+        "STUB_ERROR_RATE": str(args.error_rate),
+        "STUB_BODY_BYTES": str(args.body_bytes),
+        "STUB_STREAM_BYTES": str(args.stream_bytes),
+    }
+    gateway_env = {
+        **{var: stub_url for var in UPSTREAM_ENV_VARS},
+        "ENVIRONMENT": "bench",
+        "LOG_LEVEL": "WARNING",
+        "REDIS_URL": args.redis_url,
+        "JWT_SECRET": JWT_SECRET,
+        "INTERNAL_API_KEY": "bench-internal",
+        "CONSOLIDATED_OPENAPI_PATH": "/nonexistent/openapi.yaml",
+    }
+
+    procs = [
+        _start("stub_upstream:app", LOAD_DIR, stub_port, stub_env),
+        _start("main:app", GATEWAY_SRC, gateway_port, gateway_env),
+    ]
+    try:
+        _wait_healthy(f"{stub_url}/health", procs[0])
+        _wait_healthy(f"{gateway_url}/health", procs[1])
+        scenario_results = asyncio.run(_run(args, gateway_url, names))
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    results = {
+        "benchmark": "gateway",
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "scenarios": scenario_results,
+    }
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n")
+    else:
+        print(payload)
+
+    if args.baseline:
+        regressions = compare(
+            results, json.loads(Path(args.baseline).read_text()), args.max_regression
+        )
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,109 @@
+"""
+Stand-in for every upstream service during gateway benchmarks (a bare ASGI app, so the stub
+itself costs as little as possible).
+
+Configured through the environment:
+  STUB_LATENCY_MS    added to every response (default 5)
+  STUB_ERROR_RATE    share of requests answered with 500 (default 0)
+  STUB_BODY_BYTES    size of JSON response bodies (default 1024)
+  STUB_STREAM_BYTES  size of `/download` bodies, sent in 64 KiB chunks (default 1048576)
+
+Run with: python -m uvicorn stub_upstream:app --app-dir tests/load --port 9100
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+
+LATENCY_SECONDS = float(os.getenv("STUB_LATENCY_MS", "5")) / 1000.0
+ERROR_RATE = float(os.getenv("STUB_ERROR_RATE", "0"))
+BODY_BYTES = int(os.getenv("STUB_BODY_BYTES", "1024"))
+STREAM_BYTES = int(os.getenv("STUB_STREAM_BYTES", str(1024 * 1024)))
+CHUNK_BYTES = 64 * 1024
+
+
+def _json_body(size: int) -> bytes:
+    skeleton = json.dumps({"items": [], "padding": ""}).encode("utf-8")
+    padding = "x" * max(0, size - len(skeleton))
+    return json.dumps({"items": [], "padding": padding}).encode("utf-8")
+
+
+_BODY = _json_body(BODY_BYTES)
+_CHUNK = b"\0" * CHUNK_BYTES
+
+
+def _validate_body() -> bytes:
+    # Remote-validation fallback for tokens the gateway cannot verify locally.
+    return json.dumps(
+        {
+            "valid": True,
+            "user_id": "00000000-0000-4000-8000-000000000001",
+            "role": "subscriber",
+            "email": "bench@example.com",
+            "can_assign_leads": False,
+            "can_manage_unassigned_leads": False,
+            "expires_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + 3600)),
+        }
+    ).encode("utf-8")
+
+
+async def _drain(receive) -> None:
+    more_body = True
+    while more_body:
+        message = await receive()
+        more_body = message.get("more_body", False)
+
+
+async def app(scope, receive, send) -> None:
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    await _drain(receive)
+    path = scope["path"]
+    if path == "/health":
+        await _respond(send, 200, b'{"status":"healthy"}')
+        return
+    if LATENCY_SECONDS > 0:
+        await asyncio.sleep(LATENCY_SECONDS)
+    if ERROR_RATE > 0 and random.random() < ERROR_RATE:
+        await _respond(send, 500, b'{"detail":"stub failure"}')
+        return
+    if path == "/api/v1/auth/validate":
+        await _respond(send, 200, _validate_body())
+        return
+    if path.endswith("/download"):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/octet-stream")],
+            }
+        )
+        remaining = STREAM_BYTES
+        while remaining > 0:
+            chunk = _CHUNK[: min(CHUNK_BYTES, remaining)]
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        return
+    await _respond(send, 201 if scope["method"] == "POST" else 200, _BODY)
+
+
+async def _respond(send, status: int, body: bytes) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})